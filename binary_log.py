@@ -0,0 +1,266 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Binary project log (.cubelog). All integers are little-endian.
+#
+#   header   16 bytes   magic "CUBELOG\0", version u16, record size u16, reserved u32
+#   records  13 bytes   op u8, x i32, y i32, z i32 per record, packed, in log order
+#   index    40 bytes   per block of BLOCK_RECORDS records: first record u64,
+#                       record count u32, place count u32, cell bounds lo and hi 3 x i32
+#   snapshot cells      12 bytes (x, y, z i32) per cell, snapshots one after another
+#   snapshot directory  24 bytes per snapshot: records applied u64, first cell u64, cell count u64
+#   trailer  32 bytes   record count u64, block count u32, block size u32,
+#                       snapshot count u32, reserved u32, magic "CUBEEND\0"
+#
+# Version 1 files have no snapshot sections and a 24-byte trailer without the
+# snapshot count; they are still read.
+#
+# The records are read in place through mmap: the op and cell columns are
+# strided NumPy views of the file, so opening a log costs the same for ten
+# edits or ten million. The index gives per-block counts and bounds without
+# touching the records. Snapshots hold the cells present after every
+# SNAPSHOT_INTERVAL records and after the last one, so the latest scene is
+# restored without replaying the history, which stays in the file for audit,
+# and replay() of an earlier point starts from the nearest snapshot. A snapshot
+# is only written once at least as many records as it has cells were logged
+# since the previous one; with the final snapshot, which is always written,
+# the snapshots hold at most twice as many cells as there are records.
+import mmap
+import os
+import sys
+from contextlib import contextmanager
+import numpy as np
+from project_log import EventLog, read_project_log, replay_records
+
+MAGIC = b"CUBELOG\0"
+TRAILER_MAGIC = b"CUBEEND\0"
+VERSION = 2
+BINARY_LOG_EXTENSION = ".cubelog"
+BLOCK_RECORDS = 1 << 16
+SNAPSHOT_INTERVAL = 1 << 18  # Records between snapshots; 0 keeps only the final one
+
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u2"), ("record_size", "<u2"), ("reserved", "<u4")])
+RECORD_DTYPE = np.dtype([("op", "u1"), ("x", "<i4"), ("y", "<i4"), ("z", "<i4")])
+INDEX_DTYPE = np.dtype([("first", "<u8"), ("count", "<u4"), ("places", "<u4"), ("lo", "<i4", 3), ("hi", "<i4", 3)])
+SNAPSHOT_DTYPE = np.dtype([("records", "<u8"), ("first", "<u8"), ("count", "<u8")])
+CELL_DTYPE = np.dtype("<i4")
+TRAILER_DTYPES = {
+    1: np.dtype([("records", "<u8"), ("blocks", "<u4"), ("block_records", "<u4"), ("magic", "S8")]),
+    2: np.dtype([("records", "<u8"), ("blocks", "<u4"), ("block_records", "<u4"),
+                 ("snapshots", "<u4"), ("reserved", "<u4"), ("magic", "S8")]),
+}
+
+
+class BinaryLogError(ValueError):
+    """The file is not a binary project log this version can read."""
+
+
+def is_binary_log(filepath):
+    with open(filepath, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+@contextmanager
+def replacing(filepath, mode="wb"):
+    """Open a temporary file next to filepath that replaces it once completely written.
+
+    The log being written may be mapped from filepath itself, when a loaded
+    .cubelog is saved back to its own path. Truncating the file in place would
+    pull the records out from under the mapping; the replaced file stays
+    readable until the mapping is closed.
+    """
+    temporary = filepath + ".new"
+    try:
+        with open(temporary, mode) as file:
+            yield file
+        os.replace(temporary, filepath)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def block_index(ops, cells, block_records=BLOCK_RECORDS):
+    """Build the footer index entries for op and (N, 3) cell columns."""
+    count = len(ops)
+    firsts = np.arange(0, count, block_records)
+    index = np.zeros(len(firsts), dtype=INDEX_DTYPE)
+    if not count:
+        return index
+    index["first"] = firsts
+    index["count"] = np.diff(np.append(firsts, count))
+    index["places"] = np.add.reduceat((ops == 0).astype(np.uint32), firsts)
+    index["lo"] = np.minimum.reduceat(cells, firsts, axis=0)
+    index["hi"] = np.maximum.reduceat(cells, firsts, axis=0)
+    return index
+
+
+def write_binary_log(event_log, filepath, block_records=BLOCK_RECORDS, snapshot_interval=SNAPSHOT_INTERVAL):
+    """Write an EventLog as a binary project log, with scene snapshots."""
+    ops, cells = event_log.columns()
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["record_size"] = RECORD_DTYPE.itemsize
+    index = block_index(ops, cells, block_records)
+    trailer = np.zeros(1, dtype=TRAILER_DTYPES[VERSION])
+    trailer["records"] = len(ops)
+    trailer["blocks"] = len(index)
+    trailer["block_records"] = block_records
+    trailer["magic"] = TRAILER_MAGIC
+
+    with replacing(filepath) as file:
+        header.tofile(file)
+        # Packed in slices, so the temporary record array stays small
+        for start in range(0, len(ops), block_records):
+            stop = start + block_records
+            records = np.empty(len(ops[start:stop]), dtype=RECORD_DTYPE)
+            records["op"] = ops[start:stop]
+            records["x"] = cells[start:stop, 0]
+            records["y"] = cells[start:stop, 1]
+            records["z"] = cells[start:stop, 2]
+            records.tofile(file)
+        index.tofile(file)
+        snapshots = []
+        first = 0
+        for applied, present in event_log.checkpoints(snapshot_interval):
+            if applied < len(ops) and applied - (snapshots[-1][0] if snapshots else 0) < len(present):
+                continue  # Not enough records yet to pay for this snapshot
+            np.ascontiguousarray(present, dtype=CELL_DTYPE).tofile(file)
+            snapshots.append((applied, first, len(present)))
+            first += len(present)
+        np.array(snapshots, dtype=SNAPSHOT_DTYPE).tofile(file)
+        trailer["snapshots"] = len(snapshots)
+        trailer.tofile(file)
+
+
+class BinaryLog:
+    """A memory-mapped binary project log.
+
+    ops is a (N,) uint8 view and cells a (N, 3) int32 view of the records in
+    the file; index holds the footer entries and snapshots the snapshot
+    directory. Nothing is copied or parsed.
+    """
+
+    def __init__(self, filepath):
+        with open(filepath, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER_DTYPE.itemsize + min(dtype.itemsize for dtype in TRAILER_DTYPES.values()):
+                raise BinaryLogError(f"{filepath} is too short to be a binary project log")
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = np.frombuffer(self.map, dtype=HEADER_DTYPE, count=1)[0]
+        if header["magic"] != MAGIC.rstrip(b"\0"):
+            raise BinaryLogError(f"{filepath} is not a binary project log")
+        self.version = int(header["version"])
+        if self.version not in TRAILER_DTYPES:
+            raise BinaryLogError(f"{filepath} is binary project log version {self.version}, this reads up to {VERSION}")
+        if header["record_size"] != RECORD_DTYPE.itemsize:
+            raise BinaryLogError(f"{filepath} has {header['record_size']}-byte records, expected {RECORD_DTYPE.itemsize}")
+        trailer_dtype = TRAILER_DTYPES[self.version]
+        trailer = np.frombuffer(self.map, dtype=trailer_dtype, count=1, offset=size - trailer_dtype.itemsize)[0]
+        if trailer["magic"] != TRAILER_MAGIC.rstrip(b"\0"):
+            raise BinaryLogError(f"{filepath} has no footer; the file was not completely written")
+
+        self.count = int(trailer["records"])
+        self.block_records = int(trailer["block_records"])
+        snapshot_count = int(trailer["snapshots"]) if "snapshots" in trailer_dtype.names else 0
+        records_end = HEADER_DTYPE.itemsize + self.count * RECORD_DTYPE.itemsize
+        index_end = records_end + int(trailer["blocks"]) * INDEX_DTYPE.itemsize
+        directory_start = size - trailer_dtype.itemsize - snapshot_count * SNAPSHOT_DTYPE.itemsize
+        snapshot_bytes = directory_start - index_end
+        if snapshot_bytes < 0 or snapshot_bytes % (3 * CELL_DTYPE.itemsize) or (snapshot_bytes and not snapshot_count):
+            raise BinaryLogError(f"{filepath} is {size} bytes, which does not match its footer")
+
+        stride = RECORD_DTYPE.itemsize
+        self.ops = np.ndarray((self.count,), dtype=np.uint8, buffer=self.map,
+                              offset=HEADER_DTYPE.itemsize, strides=(stride,))
+        self.cells = np.ndarray((self.count, 3), dtype=CELL_DTYPE, buffer=self.map,
+                                offset=HEADER_DTYPE.itemsize + RECORD_DTYPE.fields["x"][1], strides=(stride, 4))
+        self.index = np.frombuffer(self.map, dtype=INDEX_DTYPE, count=int(trailer["blocks"]), offset=records_end)
+        self.snapshot_cells = np.frombuffer(self.map, dtype=CELL_DTYPE, count=snapshot_bytes // CELL_DTYPE.itemsize,
+                                            offset=index_end).reshape(-1, 3)
+        self.snapshots = np.frombuffer(self.map, dtype=SNAPSHOT_DTYPE, count=snapshot_count, offset=directory_start)
+        if len(self.snapshots) and (self.snapshots["first"] + self.snapshots["count"]).max() > len(self.snapshot_cells):
+            raise BinaryLogError(f"{filepath} has a snapshot past the end of the snapshot data")
+
+    def __len__(self):
+        return self.count
+
+    def snapshot(self, records=None):
+        """Return (record_count, cells) of the latest snapshot taken at or before `records`.
+
+        cells is a view into the file. Returns (0, no cells) if there is none,
+        which is the empty scene before the first record.
+        """
+        records = self.count if records is None else records
+        taken = np.flatnonzero(self.snapshots["records"] <= records)
+        if not len(taken):
+            return 0, np.zeros((0, 3), dtype=CELL_DTYPE)
+        entry = self.snapshots[taken[np.argmax(self.snapshots["records"][taken])]]
+        first = int(entry["first"])
+        return int(entry["records"]), self.snapshot_cells[first:first + int(entry["count"])]
+
+    def replay(self, records=None):
+        """Cells present after `records` records: the nearest snapshot plus the records after it."""
+        records = self.count if records is None else min(records, self.count)
+        start, cells = self.snapshot(records)
+        if start == records:
+            return cells
+        return replay_records(self.ops[start:records], self.cells[start:records], cells)
+
+    def event_log(self):
+        """An EventLog over the mapped columns; it copies them only when appended to."""
+        return EventLog.from_columns(self.ops, self.cells)
+
+    def bounds(self):
+        """Return ((xmin, ymin, zmin), (xmax, ymax, zmax)) of every cell in the log, or None."""
+        if not len(self.index):
+            return None
+        return tuple(self.index["lo"].min(axis=0).tolist()), tuple(self.index["hi"].max(axis=0).tolist())
+
+    def counts(self):
+        """Number of place and erase records, from the index."""
+        places = int(self.index["places"].sum())
+        return {"P": places, "E": self.count - places}
+
+
+def read_binary_log(filepath):
+    """Map a binary project log and return it as an EventLog."""
+    return BinaryLog(filepath).event_log()
+
+
+def write_text_log(event_log, filepath):
+    """Write an EventLog in the text format of save_event_log."""
+    with replacing(filepath, "w") as file:
+        file.write("\n".join(event_log.lines()))
+
+
+def convert_log(source, destination):
+    """Convert between text and binary project logs; the destination extension picks the format.
+
+    Returns the list of (line_number, line) of malformed text lines, which
+    cannot be represented in either format and are left out.
+    """
+    errors = []
+    if is_binary_log(source):
+        event_log = read_binary_log(source)
+    else:
+        ops, cells, errors = read_project_log(source)
+        event_log = EventLog.from_columns(ops, cells)
+    if destination.endswith(BINARY_LOG_EXTENSION):
+        write_binary_log(event_log, destination)
+    else:
+        write_text_log(event_log, destination)
+    return errors
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(f"usage: python binary_log.py SOURCE DESTINATION  (DESTINATION ending in {BINARY_LOG_EXTENSION} is written binary)")
+        sys.exit(2)
+    for line_number, line in convert_log(sys.argv[1], sys.argv[2]):
+        print(f"Invalid entry on line {line_number} of the log, left out: {line}")
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
@@ -0,0 +1,124 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Camera math for OpenGLGrid done in NumPy, so picking needs no GL context and no
+# glGet round-trip to the driver. Matrices match what paintGL/resizeGL used to
+# build with glTranslatef/glRotatef and gluPerspective.
+import math
+import numpy as np
+
+
+def translation(x, y, z):
+    m = np.identity(4)
+    m[:3, 3] = (x, y, z)
+    return m
+
+
+def rotation(angle, x, y, z):
+    """Rotation matrix for glRotatef(angle, x, y, z) with a unit axis."""
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    m = np.identity(4)
+    m[:3, :3] = [
+        [x * x * (1 - c) + c, x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+        [y * x * (1 - c) + z * s, y * y * (1 - c) + c, y * z * (1 - c) - x * s],
+        [x * z * (1 - c) - y * s, y * z * (1 - c) + x * s, z * z * (1 - c) + c],
+    ]
+    return m
+
+
+def perspective(fovy, aspect, near, far):
+    """Projection matrix for gluPerspective(fovy, aspect, near, far)."""
+    f = 1.0 / math.tan(math.radians(fovy) / 2)
+    m = np.zeros((4, 4))
+    m[0, 0] = f / aspect
+    m[1, 1] = f
+    m[2, 2] = (far + near) / (near - far)
+    m[2, 3] = 2 * far * near / (near - far)
+    m[3, 2] = -1.0
+    return m
+
+
+class ViewCamera:
+    """Orbit camera of the editor: pan, zoom and two rotations over the floor grid.
+
+    update() takes the camera parameters OpenGLGrid keeps; the matrices and their
+    inverse are only recomputed when one of them changed. All matrices are
+    row-major NumPy arrays; use gl_modelview()/gl_projection() for glLoadMatrixd.
+    """
+
+    def __init__(self, fovy=45.0, near=1.0, far=200.0):
+        self.fovy = fovy
+        self.near = near
+        self.far = far
+        self.key = None
+        self.width = 1
+        self.height = 1
+        self.modelview = np.identity(4)
+        self.projection = np.identity(4)
+        self.inverse = np.identity(4)
+
+    def update(self, pan_x, pan_y, zoom, rot_x, rot_y, width, height):
+        key = (pan_x, pan_y, zoom, rot_x, rot_y, width, height)
+        if key == self.key:
+            return self
+        self.key = key
+        self.width = max(1, width)
+        self.height = max(1, height)
+        self.modelview = translation(pan_x, pan_y, -20 * zoom) @ rotation(rot_x, 1, 0, 0) @ rotation(rot_y, 0, 1, 0)
+        self.projection = perspective(self.fovy, self.width / self.height, self.near, self.far)
+        self.inverse = np.linalg.inv(self.projection @ self.modelview)
+        return self
+
+    def gl_modelview(self):
+        return np.ascontiguousarray(self.modelview.T)
+
+    def gl_projection(self):
+        return np.ascontiguousarray(self.projection.T)
+
+    def frustum_planes(self):
+        """Return the six view frustum planes as a (6, 4) array of (a, b, c, d) rows.
+
+        A world point p is inside when a*x + b*y + c*z + d >= 0 for every plane.
+        """
+        clip = self.projection @ self.modelview
+        return np.array([
+            clip[3] + clip[0], clip[3] - clip[0],  # left, right
+            clip[3] + clip[1], clip[3] - clip[1],  # bottom, top
+            clip[3] + clip[2], clip[3] - clip[2],  # near, far
+        ])
+
+    def unproject(self, x, y, depth):
+        """World point under widget pixel (x, y) at normalized depth 0 (near) to 1 (far).
+
+        Same as gluUnProject, except that y counts down from the top like Qt events.
+        """
+        ndc = np.array([2.0 * x / self.width - 1.0, 1.0 - 2.0 * y / self.height, 2.0 * depth - 1.0, 1.0])
+        point = self.inverse @ ndc
+        return point[:3] / point[3]
+
+    def ray(self, x, y):
+        """Return (origin, direction) of the view ray under widget pixel (x, y).
+
+        origin is on the near plane and direction points to the far plane point,
+        so origin + direction is on the far plane.
+        """
+        near = self.unproject(x, y, 0.0)
+        far = self.unproject(x, y, 1.0)
+        return near, far - near
+
+    def pick_plane(self, x, y, z=0.0):
+        """World (x, y) where the view ray under pixel (x, y) hits the plane at height z.
+
+        Returns None if the ray runs parallel to the plane or hits it behind the camera.
+        """
+        origin, direction = self.ray(x, y)
+        if direction[2] == 0:
+            return None
+        t = (z - origin[2]) / direction[2]
+        if t < 0:
+            return None
+        return origin[0] + t * direction[0], origin[1] + t * direction[1]
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
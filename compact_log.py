@@ -0,0 +1,161 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Project log compaction: rewrite a log as the fewest records that produce the
+# same scene. Without checkpoints that is one place per cube of the final
+# scene. Each checkpoint (a record count of the original log) is kept as a
+# point of the compacted history: the compacted log first builds the scene as
+# it was at the first checkpoint, then erases and places only the difference
+# to the next one, and so on to the end.
+#
+# The log is read COMPACT_CHUNK_RECORDS at a time and folded into 16^3
+# occupancy chunks, so time is linear in the log length and memory depends on
+# the extent of the scene, not on the length of the history.
+import sys
+import numpy as np
+from project_log import EventLog, LogStreamParser, PLACE, ERASE, last_records
+from binary_log import BinaryLog, BINARY_LOG_EXTENSION, is_binary_log, write_binary_log, write_text_log
+from scene_model import CHUNK_SIZE
+
+COMPACT_CHUNK_RECORDS = 1 << 20
+READ_SIZE = 1 << 22  # Bytes of a text log read at a time
+
+
+def iter_log_chunks(filepath, errors=None, chunk_records=COMPACT_CHUNK_RECORDS):
+    """Yield the (ops, cells) of a text or binary project log in order, a bounded chunk at a time.
+
+    Malformed text lines are appended to errors as (line_number, line).
+    """
+    if is_binary_log(filepath):
+        binary_log = BinaryLog(filepath)
+        for start in range(0, len(binary_log), chunk_records):
+            yield binary_log.ops[start:start + chunk_records], binary_log.cells[start:start + chunk_records]
+        return
+    parser = LogStreamParser()
+    with open(filepath, "rb") as file:
+        for data in iter(lambda: file.read(READ_SIZE), b""):
+            parser.feed(data)
+            yield parser.drain()
+    ops, cells, parse_errors = parser.finish()
+    yield ops, cells
+    if errors is not None:
+        errors.extend(parse_errors)
+
+
+class OccupancyChunks:
+    """Scene state of the compaction: chunk key -> 16^3 bool occupancy."""
+
+    def __init__(self):
+        self.chunks = {}
+
+    def apply(self, ops, cells):
+        """Apply records in log order."""
+        ops, cells = last_records(ops, np.asarray(cells, dtype=np.int32))
+        if not len(ops):
+            return
+        keys = cells // CHUNK_SIZE
+        local = cells % CHUNK_SIZE
+        present = ops == PLACE
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        order = np.argsort(inverse.reshape(-1), kind="stable")
+        bounds = np.searchsorted(inverse.reshape(-1)[order], np.arange(len(unique) + 1))
+        for group, key in enumerate(map(tuple, unique.tolist())):
+            rows = order[bounds[group]:bounds[group + 1]]
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                if not present[rows].any():
+                    continue
+                chunk = self.chunks[key] = np.zeros((CHUNK_SIZE,) * 3, dtype=bool)
+            chunk[local[rows, 0], local[rows, 1], local[rows, 2]] = present[rows]
+
+    def copy(self):
+        state = OccupancyChunks()
+        state.chunks = {key: chunk.copy() for key, chunk in self.chunks.items()}
+        return state
+
+    def difference(self, earlier):
+        """Return (erased, placed) (N, 3) cells that turn `earlier` into this state."""
+        erased, placed = [], []
+        empty = np.zeros((CHUNK_SIZE,) * 3, dtype=bool)
+        for key in sorted(set(self.chunks) | set(earlier.chunks)):
+            now = self.chunks.get(key, empty)
+            before = earlier.chunks.get(key, empty)
+            base = np.asarray(key, dtype=np.int32) * CHUNK_SIZE
+            erased.append(np.argwhere(before & ~now).astype(np.int32) + base)
+            placed.append(np.argwhere(now & ~before).astype(np.int32) + base)
+        if not erased:
+            return np.zeros((0, 3), dtype=np.int32), np.zeros((0, 3), dtype=np.int32)
+        return np.concatenate(erased), np.concatenate(placed)
+
+
+def compact_records(chunks, checkpoints=()):
+    """Compact a log given as (ops, cells) chunks in order.
+
+    Returns (event_log, records_in, marks): the compacted EventLog, the number
+    of records read, and for each checkpoint kept the record count of the
+    compacted log that reproduces it. Checkpoints past the end are ignored.
+    """
+    checkpoints = sorted(set(int(c) for c in checkpoints if c > 0))
+    state = OccupancyChunks()
+    emitted = OccupancyChunks()  # State the compacted log has produced so far
+    compacted = EventLog()
+    marks = []
+    done = 0
+
+    def emit():
+        erased, placed = state.difference(emitted)
+        compacted.extend(np.full(len(erased), ERASE, dtype=np.uint8), erased)
+        compacted.extend(np.full(len(placed), PLACE, dtype=np.uint8), placed)
+        return state.copy()
+
+    for ops, cells in chunks:
+        base = done  # Records before this chunk
+        start = 0
+        while start < len(ops):
+            # Stop at the next checkpoint inside this chunk, if any
+            stop = len(ops)
+            if checkpoints and checkpoints[0] < base + stop:
+                stop = checkpoints[0] - base
+            state.apply(ops[start:stop], cells[start:stop])
+            done += stop - start
+            start = stop
+            if checkpoints and checkpoints[0] == done:
+                emitted = emit()
+                marks.append((checkpoints.pop(0), len(compacted)))
+    emit()
+    return compacted, done, marks
+
+
+def compact_log(source, destination, checkpoints=()):
+    """Compact the project log file source into destination (.cubelog is written binary).
+
+    Returns (records_in, records_out, marks, errors); see compact_records.
+    """
+    errors = []
+    compacted, records_in, marks = compact_records(iter_log_chunks(source, errors), checkpoints)
+    if destination.endswith(BINARY_LOG_EXTENSION):
+        write_binary_log(compacted, destination)
+    else:
+        write_text_log(compacted, destination)
+    return records_in, len(compacted), marks, errors
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    checkpoints = []
+    while "--checkpoint" in args:
+        at = args.index("--checkpoint")
+        checkpoints.append(int(args[at + 1]))
+        del args[at:at + 2]
+    if len(args) != 2:
+        print("usage: python compact_log.py SOURCE DESTINATION [--checkpoint ENTRY ...]")
+        sys.exit(2)
+    records_in, records_out, marks, errors = compact_log(args[0], args[1], checkpoints)
+    for line_number, line in errors:
+        print(f"Invalid entry on line {line_number} of the log, left out: {line}")
+    print(f"{records_in} entries compacted to {records_out}")
+    for entry, compacted_entry in marks:
+        print(f"Entry {entry} is entry {compacted_entry} of the compacted log")
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
@@ -0,0 +1,476 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from OpenGL.GLUT import *
+import numpy as np
+from voxel_mesh import chunk_surface
+
+# Vertices glutSolidCube and glutWireCube send per cube (6 quads, 6 line loops)
+GLUT_CUBE_VERTICES = 24 + 24
+
+# Every renderer keeps last_draw = (draw calls, vertices) of its last draw()
+# for the frame metrics.
+
+# Cube colors, same as draw_cube in upload_project_log.py
+FACE_COLOR = (0.5, 0.5, 0.5)
+EDGE_COLOR = (0.0, 0.0, 0.0)
+EDGE_SCALE = 1.02  # glutWireCube(1.02) draws the edges slightly outside the faces
+
+# Unit cube corners centered on the origin
+_CORNERS = np.array([
+    [-0.5, -0.5, -0.5], [0.5, -0.5, -0.5], [0.5, 0.5, -0.5], [-0.5, 0.5, -0.5],
+    [-0.5, -0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, 0.5], [-0.5, 0.5, 0.5],
+], dtype=np.float32)
+
+# Six faces as quads (counter-clockwise seen from outside)
+_QUADS = [
+    (0, 3, 2, 1),  # bottom (-z)
+    (4, 5, 6, 7),  # top (+z)
+    (0, 1, 5, 4),  # front (-y)
+    (2, 3, 7, 6),  # back (+y)
+    (0, 4, 7, 3),  # left (-x)
+    (1, 2, 6, 5),  # right (+x)
+]
+
+# Twelve edges as line segments
+_EDGES = [
+    (0, 1), (1, 2), (2, 3), (3, 0),
+    (4, 5), (5, 6), (6, 7), (7, 4),
+    (0, 4), (1, 5), (2, 6), (3, 7),
+]
+
+# 36 triangle vertices and 24 line vertices for one cube
+CUBE_FACE_VERTICES = _CORNERS[[i for a, b, c, d in _QUADS for i in (a, b, c, a, c, d)]]
+CUBE_EDGE_VERTICES = _CORNERS[[i for edge in _EDGES for i in edge]] * EDGE_SCALE
+
+
+# Instanced drawing: one cube mesh moved by a per-instance offset attribute.
+# Colors still come from glColor and matrices from the fixed-function stack.
+INSTANCE_VERTEX_SHADER = """
+#version 120
+attribute vec3 position;
+attribute vec3 offset;
+void main() {
+    gl_FrontColor = gl_Color;
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(position + offset, 1.0);
+}
+"""
+
+INSTANCE_FRAGMENT_SHADER = """
+#version 120
+void main() {
+    gl_FragColor = gl_Color;
+}
+"""
+
+
+def cube_cells(cube_positions):
+    """Return an (N, 3) int64 array of cells from a scene model or any iterable of cells.
+
+    (x, y) cells sit on the ground layer z = 0.
+    """
+    if hasattr(cube_positions, "positions"):
+        cells = cube_positions.positions()
+    else:
+        cells = np.array(list(cube_positions), dtype=np.int64)
+    if cells.size == 0:
+        return np.zeros((0, 3), dtype=np.int64)
+    if cells.shape[1] == 2:
+        cells = np.column_stack([cells, np.zeros(len(cells), dtype=np.int64)])
+    return cells
+
+
+def cube_centers(cube_positions):
+    """Return an (N, 3) float32 array of cube centers."""
+    return cube_cells(cube_positions).astype(np.float32) + 0.5
+
+
+def cube_center(pos):
+    z = pos[2] if len(pos) > 2 else 0
+    return (pos[0] + 0.5, pos[1] + 0.5, z + 0.5)
+
+
+def upload_vertices(vbo, vertices):
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices if len(vertices) else None, GL_STATIC_DRAW)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+
+def draw_faces_and_edges(face_vbo, face_vertex_count, edge_vbo, edge_vertex_count):
+    """Draw a GL_TRIANGLES face buffer in grey and a GL_LINES edge buffer in black.
+
+    Returns (draw calls, vertices).
+    """
+    glEnableClientState(GL_VERTEX_ARRAY)
+
+    glColor3f(*FACE_COLOR)
+    glBindBuffer(GL_ARRAY_BUFFER, face_vbo)
+    glVertexPointer(3, GL_FLOAT, 0, None)
+    glDrawArrays(GL_TRIANGLES, 0, face_vertex_count)
+
+    glColor3f(*EDGE_COLOR)
+    glBindBuffer(GL_ARRAY_BUFFER, edge_vbo)
+    glVertexPointer(3, GL_FLOAT, 0, None)
+    glDrawArrays(GL_LINES, 0, edge_vertex_count)
+
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    return 2, face_vertex_count + edge_vertex_count
+
+
+class ImmediateCubeRenderer:
+    """Original immediate-mode path: one glutSolidCube/glutWireCube pair per cube."""
+
+    def __init__(self):
+        self.last_draw = (0, 0)
+
+    def scene_changed(self):
+        pass
+
+    def cube_added(self, pos):
+        pass
+
+    def cube_removed(self, pos):
+        pass
+
+    def cubes_changed(self, added, removed):
+        pass
+
+    def draw(self, cube_positions, visible_chunks=None):
+        count = 0
+        for pos in cube_positions:
+            self.draw_cube(*pos)
+            count += 1
+        self.last_draw = (2 * count, GLUT_CUBE_VERTICES * count)
+
+    def draw_cube(self, x, y, z=0):
+        glPushMatrix()
+        glTranslatef(x + 0.5, y + 0.5, z + 0.5)
+
+        # Draw solid cube (gray)
+        glColor3f(*FACE_COLOR)
+        glutSolidCube(1)
+
+        # Draw black edges
+        glColor3f(*EDGE_COLOR)
+        glutWireCube(EDGE_SCALE)
+
+        glPopMatrix()
+
+    def release(self):
+        pass
+
+
+class VBOCubeRenderer:
+    """Retained-mode renderer: all cube faces and edges live in two vertex buffers.
+
+    The buffers are rebuilt only after scene_changed() is called, so an idle frame
+    costs two glDrawArrays calls no matter how many cubes are in the scene.
+    """
+
+    def __init__(self):
+        self.face_vbo = None
+        self.edge_vbo = None
+        self.face_vertex_count = 0
+        self.edge_vertex_count = 0
+        self.dirty = True
+        self.last_draw = (0, 0)
+
+    def scene_changed(self):
+        self.dirty = True
+
+    def cube_added(self, pos):
+        self.dirty = True
+
+    def cube_removed(self, pos):
+        self.dirty = True
+
+    def cubes_changed(self, added, removed):
+        self.dirty = True
+
+    def build_vertices(self, cube_positions):
+        """Return (face_vertices, edge_vertices) float32 arrays for every cube."""
+        centers = cube_centers(cube_positions)
+        faces = (centers[:, None, :] + CUBE_FACE_VERTICES[None, :, :]).reshape(-1, 3)
+        edges = (centers[:, None, :] + CUBE_EDGE_VERTICES[None, :, :]).reshape(-1, 3)
+        return faces, edges
+
+    def rebuild(self, cube_positions):
+        """Upload fresh geometry for the whole scene. Needs a current GL context."""
+        if self.face_vbo is None:
+            self.face_vbo, self.edge_vbo = glGenBuffers(2)
+
+        faces, edges = self.build_vertices(cube_positions)
+        upload_vertices(self.face_vbo, faces)
+        upload_vertices(self.edge_vbo, edges)
+        self.face_vertex_count = len(faces)
+        self.edge_vertex_count = len(edges)
+        self.dirty = False
+
+    def draw(self, cube_positions, visible_chunks=None):
+        if self.dirty:
+            self.rebuild(cube_positions)
+        self.last_draw = (0, 0)
+        if self.face_vertex_count:
+            self.last_draw = draw_faces_and_edges(self.face_vbo, self.face_vertex_count,
+                                                  self.edge_vbo, self.edge_vertex_count)
+
+    def release(self):
+        """Free the GPU buffers. Needs a current GL context."""
+        if self.face_vbo is not None:
+            glDeleteBuffers(2, [self.face_vbo, self.edge_vbo])
+            self.face_vbo = self.edge_vbo = None
+        self.dirty = True
+
+
+class InstancedCubeRenderer:
+    """Instanced renderer: one cube mesh plus a per-instance offset buffer.
+
+    Every cube owns one slot in the offset buffer. A position-to-slot index makes
+    cube_added/cube_removed O(1): an add appends a slot, a remove moves the last
+    slot into the hole (swap-remove). Only the touched slots are re-uploaded on
+    the next draw, so a single edit never re-sends the whole scene.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self):
+        self.program = None
+        self.mesh_vbo = None
+        self.instance_vbo = None
+        self.position_location = -1
+        self.offset_location = -1
+
+        self.slot_of = {}  # (x, y) -> slot in the offset buffer
+        self.cells = []  # slot -> (x, y)
+        self.offsets = np.zeros((self.INITIAL_CAPACITY, 3), dtype=np.float32)
+        self.dirty_slots = set()
+        self.reallocate = True  # Buffer storage has to be (re)created on the GPU
+        self.needs_reset = True  # Rebuild the slots from cube_positions on the next draw
+        self.last_draw = (0, 0)
+
+    def init_gl(self):
+        """Compile the shader and create the buffers. Returns False if instancing is unavailable."""
+        if not bool(glDrawArraysInstanced) or not bool(glVertexAttribDivisor):
+            print("Instanced rendering unavailable: needs OpenGL 3.3 or ARB_instanced_arrays")
+            return False
+        try:
+            self.program = shaders.compileProgram(
+                shaders.compileShader(INSTANCE_VERTEX_SHADER, GL_VERTEX_SHADER),
+                shaders.compileShader(INSTANCE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+            )
+        except Exception as e:
+            print(f"Instanced rendering unavailable: {e}")
+            self.program = None
+            return False
+
+        self.position_location = glGetAttribLocation(self.program, "position")
+        self.offset_location = glGetAttribLocation(self.program, "offset")
+
+        self.mesh_vbo, self.instance_vbo = glGenBuffers(2)
+        mesh = np.concatenate([CUBE_FACE_VERTICES, CUBE_EDGE_VERTICES])
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_vbo)
+        glBufferData(GL_ARRAY_BUFFER, mesh.nbytes, mesh, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.reallocate = True
+        return True
+
+    def scene_changed(self):
+        self.needs_reset = True
+
+    def reset(self, cube_positions):
+        cells = cube_cells(cube_positions)
+        self.cells = list(map(tuple, cells.tolist()))
+        self.slot_of = {pos: slot for slot, pos in enumerate(self.cells)}
+        capacity = max(self.INITIAL_CAPACITY, len(self.offsets))
+        while capacity < len(self.cells):
+            capacity *= 2
+        self.offsets = np.zeros((capacity, 3), dtype=np.float32)
+        self.offsets[:len(self.cells)] = cells + 0.5
+        self.dirty_slots.clear()
+        self.reallocate = True
+        self.needs_reset = False
+
+    def cube_added(self, pos):
+        if self.needs_reset or pos in self.slot_of:
+            return
+        slot = len(self.cells)
+        if slot == len(self.offsets):
+            # Double the capacity; the GPU buffer is recreated once on the next draw
+            self.offsets = np.concatenate([self.offsets, np.zeros_like(self.offsets)])
+            self.reallocate = True
+        self.cells.append(pos)
+        self.slot_of[pos] = slot
+        self.offsets[slot] = cube_center(pos)
+        self.dirty_slots.add(slot)
+
+    def cube_removed(self, pos):
+        if self.needs_reset:
+            return
+        slot = self.slot_of.pop(pos, None)
+        if slot is None:
+            return
+        last = len(self.cells) - 1
+        moved = self.cells.pop()
+        self.dirty_slots.discard(last)
+        if slot != last:
+            # Swap-remove: the last instance fills the hole
+            self.cells[slot] = moved
+            self.slot_of[moved] = slot
+            self.offsets[slot] = self.offsets[last]
+            self.dirty_slots.add(slot)
+
+    def cubes_changed(self, added, removed):
+        """Patch the slots of (N, 3) added and removed cells, or rebuild them all if there are many."""
+        if self.needs_reset:
+            return
+        if len(added) + len(removed) > len(self.cells) // 4:
+            self.needs_reset = True
+            return
+        for pos in map(tuple, removed.tolist()):
+            self.cube_removed(pos)
+        for pos in map(tuple, added.tolist()):
+            self.cube_added(pos)
+
+    def flush(self):
+        """Send pending slot changes to the GPU. Needs a current GL context."""
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        if self.reallocate:
+            glBufferData(GL_ARRAY_BUFFER, self.offsets.nbytes, self.offsets, GL_DYNAMIC_DRAW)
+            self.reallocate = False
+        else:
+            stride = self.offsets.itemsize * 3
+            for slot in self.dirty_slots:
+                glBufferSubData(GL_ARRAY_BUFFER, slot * stride, stride, self.offsets[slot])
+        self.dirty_slots.clear()
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self, cube_positions, visible_chunks=None):
+        if self.needs_reset:
+            self.reset(cube_positions)
+        if self.reallocate or self.dirty_slots:
+            self.flush()
+        count = len(self.cells)
+        self.last_draw = (0, 0)
+        if not count:
+            return
+
+        glUseProgram(self.program)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.mesh_vbo)
+        glEnableVertexAttribArray(self.position_location)
+        glVertexAttribPointer(self.position_location, 3, GL_FLOAT, GL_FALSE, 0, None)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glEnableVertexAttribArray(self.offset_location)
+        glVertexAttribPointer(self.offset_location, 3, GL_FLOAT, GL_FALSE, 0, None)
+        glVertexAttribDivisor(self.offset_location, 1)
+
+        glColor3f(*FACE_COLOR)
+        glDrawArraysInstanced(GL_TRIANGLES, 0, len(CUBE_FACE_VERTICES), count)
+        glColor3f(*EDGE_COLOR)
+        glDrawArraysInstanced(GL_LINES, len(CUBE_FACE_VERTICES), len(CUBE_EDGE_VERTICES), count)
+        self.last_draw = (2, (len(CUBE_FACE_VERTICES) + len(CUBE_EDGE_VERTICES)) * count)
+
+        glVertexAttribDivisor(self.offset_location, 0)
+        glDisableVertexAttribArray(self.offset_location)
+        glDisableVertexAttribArray(self.position_location)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+
+    def release(self):
+        """Free the GPU objects. Needs a current GL context."""
+        if self.mesh_vbo is not None:
+            glDeleteBuffers(2, [self.mesh_vbo, self.instance_vbo])
+            self.mesh_vbo = self.instance_vbo = None
+        if self.program is not None:
+            glDeleteProgram(self.program)
+            self.program = None
+        self.reallocate = True
+
+
+class SurfaceCubeRenderer:
+    """Retained-mode renderer that only uploads exposed faces, one pair of buffers per chunk.
+
+    Needs a ChunkedVoxelGrid scene. Faces touching a neighbouring cube or the
+    ground plane are culled by voxel_mesh; with greedy=True coplanar faces are
+    merged into large quads. Edges are taken from the unmerged exposed faces so
+    the scene keeps its per-cube black outlines. Only chunks whose version stamp
+    changed since they were built are meshed and uploaded again, and chunks
+    outside the view frustum are not drawn.
+    """
+
+    def __init__(self, greedy=False):
+        self.greedy = greedy
+        self.chunk_buffers = {}  # chunk key -> [version, face_vbo, face_count, edge_vbo, edge_count]
+        self.built_version = None
+        self.last_draw = (0, 0)
+
+    def scene_changed(self):
+        # The scene may be a different grid whose version stamps overlap the ones
+        # cached here, so every chunk is re-meshed
+        self.built_version = None
+        for entry in self.chunk_buffers.values():
+            entry[0] = None
+
+    def cube_added(self, pos):
+        pass
+
+    def cube_removed(self, pos):
+        pass
+
+    def cubes_changed(self, added, removed):
+        pass  # The changed chunks carry new version stamps
+
+    def build_vertices(self, scene, key):
+        """Return (face_vertices, edge_vertices) float32 arrays for one chunk."""
+        culled = chunk_surface(scene, key)
+        faces = chunk_surface(scene, key, greedy=True) if self.greedy else culled
+        return faces.triangles(), culled.unique_edges()
+
+    def update_chunks(self, scene):
+        """Re-mesh stale chunks and drop buffers of chunks that are gone. Needs a current GL context."""
+        if scene.version == self.built_version:
+            return
+        for key in [key for key in self.chunk_buffers if key not in scene.chunks]:
+            glDeleteBuffers(2, [self.chunk_buffers[key][1], self.chunk_buffers[key][3]])
+            del self.chunk_buffers[key]
+        for key, version in scene.chunk_versions.items():
+            entry = self.chunk_buffers.get(key)
+            if entry is not None and entry[0] == version:
+                continue
+            if entry is None:
+                face_vbo, edge_vbo = glGenBuffers(2)
+                entry = self.chunk_buffers[key] = [version, face_vbo, 0, edge_vbo, 0]
+            faces, edges = self.build_vertices(scene, key)
+            upload_vertices(entry[1], faces)
+            upload_vertices(entry[3], edges)
+            entry[0], entry[2], entry[4] = version, len(faces), len(edges)
+        self.built_version = scene.version
+
+    def draw(self, scene, visible_chunks=None):
+        """Draw the scene; if visible_chunks is given, chunks not in it are skipped."""
+        self.update_chunks(scene)
+        # Push the faces back slightly so the edges drawn on them win the depth test
+        glEnable(GL_POLYGON_OFFSET_FILL)
+        glPolygonOffset(1.0, 1.0)
+        calls = vertices = 0
+        for key, (_, face_vbo, face_count, edge_vbo, edge_count) in self.chunk_buffers.items():
+            if face_count and (visible_chunks is None or key in visible_chunks):
+                chunk_calls, chunk_vertices = draw_faces_and_edges(face_vbo, face_count, edge_vbo, edge_count)
+                calls += chunk_calls
+                vertices += chunk_vertices
+        self.last_draw = (calls, vertices)
+        glDisable(GL_POLYGON_OFFSET_FILL)
+
+    def release(self):
+        """Free the GPU buffers. Needs a current GL context."""
+        for _, face_vbo, _, edge_vbo, _ in self.chunk_buffers.values():
+            glDeleteBuffers(2, [face_vbo, edge_vbo])
+        self.chunk_buffers.clear()
+        self.built_version = None
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
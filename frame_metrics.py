@@ -0,0 +1,149 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Frame instrumentation for OpenGLGrid: paintGL CPU time per frame and per
+# section, draw calls and vertices sent, and repaint requests against frames
+# drawn, over the last FRAME_HISTORY frames. Times are CPU time spent in
+# paintGL; the GPU may still be working when it returns.
+#
+# The optional overlay draws the figures as GLUT bitmap text, like
+# display_mouse_info in old_programs/OpenGL_pink_flat_rect.py, but the text is
+# compiled into a display list and only rebuilt every OVERLAY_REFRESH seconds,
+# so showing it costs one glCallList per frame.
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLUT import *
+
+FRAME_HISTORY = 240  # Frames the statistics are taken over
+SECTIONS = ("grid", "cubes", "composite", "highlight", "overlay")
+PERCENTILES = (50, 90, 99)
+OVERLAY_REFRESH = 0.25  # Seconds between rebuilds of the overlay text
+OVERLAY_FONT = GLUT_BITMAP_HELVETICA_12
+OVERLAY_LINE_HEIGHT = 15
+
+
+class FrameMetrics:
+    """Timings and draw counts of the frames painted, see the module comment.
+
+    paintGL calls begin_frame(), wraps its parts in timed(section), reports
+    the draw calls it made with count(), and ends with end_frame().
+    """
+
+    def __init__(self, history=FRAME_HISTORY):
+        self.frame_ms = deque(maxlen=history)
+        self.section_ms = {name: deque(maxlen=history) for name in SECTIONS}
+        self.draw_calls = deque(maxlen=history)
+        self.vertices = deque(maxlen=history)
+        self.frame_start = None
+        self.current = dict.fromkeys(SECTIONS, 0.0)
+        self.current_calls = 0
+        self.current_vertices = 0
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+        self.current = dict.fromkeys(SECTIONS, 0.0)
+        self.current_calls = 0
+        self.current_vertices = 0
+
+    @contextmanager
+    def timed(self, section):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[section] += (time.perf_counter() - start) * 1000.0
+
+    def count(self, calls, vertices):
+        self.current_calls += calls
+        self.current_vertices += vertices
+
+    def end_frame(self):
+        """Record the frame and return its paintGL time in ms."""
+        frame_ms = (time.perf_counter() - self.frame_start) * 1000.0
+        self.frame_ms.append(frame_ms)
+        for name, ms in self.current.items():
+            self.section_ms[name].append(ms)
+        self.draw_calls.append(self.current_calls)
+        self.vertices.append(self.current_vertices)
+        return frame_ms
+
+    def snapshot(self, scheduler=None):
+        """The statistics as a dict; with the FrameScheduler, also its request and frame counts.
+
+        frame_ms holds percentiles and the maximum of the frame times,
+        sections_ms the mean time of each section, draw_calls and vertices
+        the last frame's counts and their mean.
+        """
+        frames = len(self.frame_ms)
+        stats = {"frames": frames}
+        if frames:
+            times = np.fromiter(self.frame_ms, dtype=np.float64, count=frames)
+            stats["frame_ms"] = {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(times, PERCENTILES))}
+            stats["frame_ms"]["max"] = float(times.max())
+            stats["sections_ms"] = {name: float(np.mean(self.section_ms[name])) for name in SECTIONS}
+            stats["draw_calls"] = {"last": self.draw_calls[-1], "mean": float(np.mean(self.draw_calls))}
+            stats["vertices"] = {"last": self.vertices[-1], "mean": float(np.mean(self.vertices))}
+        if scheduler is not None:
+            stats["repaint_requests"] = scheduler.request_count
+            stats["frames_drawn"] = scheduler.frame_count
+        return stats
+
+    def lines(self, scheduler=None):
+        """The snapshot as short lines of text for the overlay."""
+        stats = self.snapshot(scheduler)
+        lines = []
+        if stats["frames"]:
+            frame_ms = stats["frame_ms"]
+            lines.append("Frame ms  " + "  ".join(f"{name} {ms:.2f}" for name, ms in frame_ms.items()))
+            lines.append("Mean ms  " + "  ".join(f"{name} {ms:.2f}" for name, ms in stats["sections_ms"].items()))
+            lines.append(f"Draw calls {stats['draw_calls']['last']}  Vertices {stats['vertices']['last']}")
+        if scheduler is not None:
+            lines.append(f"Repaint requests {stats['repaint_requests']}  Frames drawn {stats['frames_drawn']}")
+        return lines
+
+
+class MetricsOverlay:
+    """FrameMetrics as text in the bottom-left corner, cached in a display list.
+
+    Needs GLUT initialized and a current GL context for draw() and release().
+    """
+
+    def __init__(self, refresh=OVERLAY_REFRESH):
+        self.refresh = refresh
+        self.display_list = None
+        self.text = None
+        self.built_time = None
+
+    def draw(self, metrics, scheduler=None):
+        now = time.perf_counter()
+        if self.built_time is None or now - self.built_time >= self.refresh:
+            self.built_time = now
+            lines = metrics.lines(scheduler)
+            if lines != self.text:
+                self.build(lines)
+        glCallList(self.display_list)
+
+    def build(self, lines):
+        if self.display_list is None:
+            self.display_list = glGenLists(1)
+        glNewList(self.display_list, GL_COMPILE)
+        glColor3f(0.0, 0.0, 0.0)
+        for row, line in enumerate(reversed(lines)):
+            glWindowPos2f(10, 10 + row * OVERLAY_LINE_HEIGHT)
+            for char in line:
+                glutBitmapCharacter(OVERLAY_FONT, ord(char))
+        glEndList()
+        self.text = lines
+
+    def release(self):
+        if self.display_list is not None:
+            glDeleteLists(self.display_list, 1)
+        self.display_list = None
+        self.text = None
+        self.built_time = None
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
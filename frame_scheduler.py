@@ -0,0 +1,67 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import time
+from PyQt5.QtCore import QObject, QTimer
+
+# Kinds of dirty state a redraw can be requested for
+CAMERA = "camera"
+SCENE = "scene"
+OVERLAY = "overlay"
+
+
+class FrameScheduler(QObject):
+    """Central redraw scheduler for an OpenGL widget.
+
+    Call request() instead of widget.update(). Requests only mark what is dirty;
+    all requests that arrive before the next frame are merged into one repaint,
+    repaints are spaced at least 1 / max_fps apart, and when nothing is dirty no
+    timer runs and nothing is rendered. paintGL calls begin_frame() to find out
+    what changed since the previous frame.
+    """
+
+    def __init__(self, widget, max_fps=60):
+        super().__init__(widget)
+        self.widget = widget
+        self.min_interval = 1.0 / max_fps
+        self.dirty = set()
+        self.last_frame_time = 0.0
+        self.paint_pending = False  # update() was called and paintGL has not run yet
+        self.request_count = 0
+        self.frame_count = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.fire)
+
+    def set_max_fps(self, max_fps):
+        self.min_interval = 1.0 / max_fps
+
+    def request(self, *kinds):
+        """Mark kinds (CAMERA, SCENE, OVERLAY) dirty and schedule a repaint if needed."""
+        self.request_count += 1
+        self.dirty.update(kinds or (SCENE,))
+        if self.paint_pending or self.timer.isActive():
+            return  # Merged into the frame that is already on its way
+        wait = self.min_interval - (time.perf_counter() - self.last_frame_time)
+        self.timer.start(max(0, int(wait * 1000)))
+
+    def fire(self):
+        self.paint_pending = True
+        self.widget.update()
+
+    def begin_frame(self):
+        """Return the set of dirty kinds for the frame being painted and reset it."""
+        dirty = self.dirty
+        self.dirty = set()
+        self.paint_pending = False
+        self.last_frame_time = time.perf_counter()
+        self.frame_count += 1
+        return dirty
+
+    @property
+    def idle(self):
+        return not (self.dirty or self.paint_pending or self.timer.isActive())
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
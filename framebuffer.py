@@ -0,0 +1,71 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Offscreen color + depth framebuffer in plain GL calls, so it works in any
+# current context: a QOpenGLWidget's as well as the EGL context of
+# offscreen_render, where Qt's QOpenGLFramebufferObject has no QOpenGLContext.
+from OpenGL.GL import *
+
+
+def bound_framebuffer():
+    """The framebuffer currently drawn to; QOpenGLWidget binds its own before paintGL."""
+    return int(glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING))
+
+
+class Framebuffer:
+    """A framebuffer object with an RGBA8 color and a 24-bit depth renderbuffer.
+
+    resize() (re)creates the storage; all methods need a current GL context.
+    """
+
+    def __init__(self):
+        self.framebuffer = None
+        self.renderbuffers = None
+        self.size = None
+
+    @staticmethod
+    def supported():
+        return bool(glGenFramebuffers) and bool(glBlitFramebuffer)
+
+    def resize(self, width, height):
+        """Make the buffers width x height pixels; returns False if the driver rejects them."""
+        if (width, height) == self.size:
+            return True
+        self.release()
+        previous = bound_framebuffer()
+        self.framebuffer = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        self.renderbuffers = glGenRenderbuffers(2)
+        for renderbuffer, storage, attachment in zip(self.renderbuffers, (GL_RGBA8, GL_DEPTH_COMPONENT24),
+                                                     (GL_COLOR_ATTACHMENT0, GL_DEPTH_ATTACHMENT)):
+            glBindRenderbuffer(GL_RENDERBUFFER, renderbuffer)
+            glRenderbufferStorage(GL_RENDERBUFFER, storage, width, height)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, attachment, GL_RENDERBUFFER, renderbuffer)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        complete = glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE
+        glBindFramebuffer(GL_FRAMEBUFFER, previous)
+        if not complete:
+            self.release()
+            return False
+        self.size = (width, height)
+        return True
+
+    def bind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+
+    def blit_to(self, target):
+        """Copy the color buffer 1:1 into framebuffer `target` and leave `target` bound."""
+        width, height = self.size
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.framebuffer)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target)
+        glBlitFramebuffer(0, 0, width, height, 0, 0, width, height, GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        glBindFramebuffer(GL_FRAMEBUFFER, target)
+
+    def release(self):
+        if self.framebuffer is not None:
+            glDeleteFramebuffers(1, [self.framebuffer])
+            glDeleteRenderbuffers(2, self.renderbuffers)
+        self.framebuffer = self.renderbuffers = self.size = None
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
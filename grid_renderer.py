@@ -0,0 +1,138 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import math
+from OpenGL.GL import *
+import numpy as np
+
+GRID_COLOR = (0.0, 0.0, 0.0)
+
+# Normalized device coordinates of the 8 view frustum corners (near face, then far face)
+_NDC_CORNERS = np.array([
+    [-1, -1, -1, 1], [1, -1, -1, 1], [1, 1, -1, 1], [-1, 1, -1, 1],
+    [-1, -1, 1, 1], [1, -1, 1, 1], [1, 1, 1, 1], [-1, 1, 1, 1],
+], dtype=np.float64)
+
+# The 12 frustum edges as pairs of corner indices
+_FRUSTUM_EDGES = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 0),
+    (4, 5), (5, 6), (6, 7), (7, 4),
+    (0, 4), (1, 5), (2, 6), (3, 7),
+])
+
+
+def grid_line_vertices(grid_size):
+    """Return the GL_LINES vertices of a grid_size floor grid as float32.
+
+    The grid_size[0] + 1 lines of constant x come first, then the grid_size[1] + 1
+    lines of constant y, so any run of neighbouring lines is a contiguous range.
+    """
+    nx, ny = grid_size
+    xs = np.arange(nx + 1, dtype=np.float32)
+    ys = np.arange(ny + 1, dtype=np.float32)
+    x_lines = np.zeros((nx + 1, 2, 3), dtype=np.float32)
+    x_lines[:, :, 0] = xs[:, None]
+    x_lines[:, 1, 1] = ny
+    y_lines = np.zeros((ny + 1, 2, 3), dtype=np.float32)
+    y_lines[:, :, 1] = ys[:, None]
+    y_lines[:, 1, 0] = nx
+    return np.concatenate([x_lines, y_lines]).reshape(-1, 3)
+
+
+def frustum_corners(modelview, projection):
+    """Return the (8, 3) world-space corners of the view frustum.
+
+    modelview and projection are 4x4 matrices in OpenGL (column-major) layout, as
+    returned by glGetDoublev.
+    """
+    clip = np.asarray(projection, dtype=np.float64).T @ np.asarray(modelview, dtype=np.float64).T
+    corners = _NDC_CORNERS @ np.linalg.inv(clip).T
+    return corners[:, :3] / corners[:, 3:]
+
+
+def visible_floor_bounds(corners, z=0.0):
+    """Return (xmin, ymin, xmax, ymax) of the part of the plane at height z inside the frustum.
+
+    Returns None when the plane is not visible. The frustum is convex, so its slice
+    through the plane is spanned by the points where the frustum edges cross it.
+    """
+    a = corners[_FRUSTUM_EDGES[:, 0]]
+    b = corners[_FRUSTUM_EDGES[:, 1]]
+    da = a[:, 2] - z
+    db = b[:, 2] - z
+    crosses = (da * db <= 0) & (da != db)
+    if not crosses.any():
+        return None
+    t = da[crosses] / (da[crosses] - db[crosses])
+    points = a[crosses] + t[:, None] * (b[crosses] - a[crosses])
+    return points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()
+
+
+def visible_line_ranges(grid_size, bounds):
+    """Return (firsts, counts) vertex ranges of the grid lines inside bounds."""
+    nx, ny = grid_size
+    firsts = np.zeros(2, dtype=np.int32)
+    counts = np.zeros(2, dtype=np.int32)
+    if bounds is None:
+        return firsts, counts
+    xmin, ymin, xmax, ymax = bounds
+    if xmax < 0 or ymax < 0 or xmin > nx or ymin > ny:
+        return firsts, counts
+    i0, i1 = max(0, math.ceil(xmin)), min(nx, math.floor(xmax))
+    j0, j1 = max(0, math.ceil(ymin)), min(ny, math.floor(ymax))
+    if i1 >= i0:
+        firsts[0], counts[0] = 2 * i0, 2 * (i1 - i0 + 1)
+    if j1 >= j0:
+        firsts[1], counts[1] = 2 * (nx + 1 + j0), 2 * (j1 - j0 + 1)
+    return firsts, counts
+
+
+class GridRenderer:
+    """Floor grid kept in a vertex buffer that is rebuilt only when grid_size changes.
+
+    Each frame the lines outside the view are skipped and the rest go out in a
+    single glMultiDrawArrays call.
+    """
+
+    def __init__(self):
+        self.vbo = None
+        self.built_size = None
+        self.last_draw = (0, 0)  # (draw calls, vertices) of the last draw()
+
+    def rebuild(self, grid_size):
+        if self.vbo is None:
+            self.vbo = glGenBuffers(1)
+        vertices = grid_line_vertices(grid_size)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.built_size = tuple(grid_size)
+
+    def draw(self, grid_size, modelview, projection):
+        if self.built_size != tuple(grid_size):
+            self.rebuild(grid_size)
+
+        bounds = visible_floor_bounds(frustum_corners(modelview, projection))
+        firsts, counts = visible_line_ranges(grid_size, bounds)
+        self.last_draw = (0, 0)
+        if not counts.any():
+            return
+
+        glColor3f(*GRID_COLOR)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glMultiDrawArrays(GL_LINES, firsts, counts, 2)
+        self.last_draw = (1, int(counts.sum()))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    def release(self):
+        """Free the GPU buffer. Needs a current GL context."""
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+        self.built_size = None
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
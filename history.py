@@ -0,0 +1,149 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Stepping the scene through the project history. Checkpoints of the scene
+# are kept every CHECKPOINT_INTERVAL records, so the scene after edit n is the
+# checkpoint at or before n plus at most CHECKPOINT_INTERVAL records replayed on
+# top, however long the history is. A short move of the history slider only
+# applies the records in between instead: going forward, the last record of
+# each cell in between decides it; going back, the record before the first one
+# in between does. For that HistoryIndex links every record to the previous
+# record of the same cell, and extends the links as records are appended.
+import numpy as np
+from project_log import PLACE, cell_difference, last_records, replay_records
+
+CHECKPOINT_INTERVAL = 1 << 14
+CELL_KEY = np.dtype([("x", "<i4"), ("y", "<i4"), ("z", "<i4")])  # Sorts like lexsort by x, y, z
+
+
+def cell_keys(cells):
+    """View (N, 3) int32 cells as (N,) structured keys that sort and search as one value."""
+    return np.ascontiguousarray(cells, dtype=np.int32).view(CELL_KEY).reshape(-1)
+
+
+def first_records(cells):
+    """Return the indices of the first record of each distinct cell in an (N, 3) array."""
+    if not len(cells):
+        return np.zeros(0, dtype=np.int64)
+    # lexsort is stable: the records of each cell stay in log order, oldest first
+    order = np.lexsort((cells[:, 2], cells[:, 1], cells[:, 0]))
+    ordered = cells[order]
+    first = np.ones(len(ordered), dtype=bool)
+    first[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    return order[first]
+
+
+class HistoryIndex:
+    """Scene checkpoints and record links over an append-only EventLog.
+
+    checkpoints maps i to the (N, 3) cells present after i * interval records;
+    one is built the first time a position past it is asked for, from the
+    nearest one below it that exists. previous[i] is the
+    index of the last record before record i with the same cell, or -1; it
+    covers the records there were at the last backward step, and last_keys /
+    last_index (every cell seen so far, sorted, with its latest record) let it
+    grow by the appended records alone. Records appended later invalidate
+    neither. Call reset() when the log is replaced.
+    """
+
+    def __init__(self, event_log, interval=CHECKPOINT_INTERVAL):
+        self.interval = interval
+        self.reset(event_log)
+
+    def reset(self, event_log):
+        self.event_log = event_log
+        self.checkpoints = {0: np.zeros((0, 3), dtype=np.int32)}
+        self.previous = np.zeros(0, dtype=np.int64)
+        self.last_keys = np.zeros(0, dtype=CELL_KEY)
+        self.last_index = np.zeros(0, dtype=np.int64)
+
+    def nearest_checkpoint(self, position):
+        """Index of the last checkpoint built at or before `position` records."""
+        return max(index for index in self.checkpoints if index * self.interval <= position)
+
+    def checkpoint(self, index):
+        """Return the cells present after index * interval records."""
+        if index not in self.checkpoints:
+            ops, cells = self.event_log.columns()
+            base = self.nearest_checkpoint(index * self.interval)
+            start, stop = base * self.interval, index * self.interval
+            self.checkpoints[index] = replay_records(ops[start:stop], cells[start:stop], self.checkpoints[base])
+        return self.checkpoints[index]
+
+    def scene_at(self, position):
+        """Return the (N, 3) cells present after the first `position` records."""
+        position = max(0, min(position, len(self.event_log)))
+        index = position // self.interval
+        start = index * self.interval
+        base = self.checkpoint(index)
+        if start == position:
+            return base
+        ops, cells = self.event_log.columns()
+        return replay_records(ops[start:position], cells[start:position], base)
+
+    def update(self):
+        """Link the records appended since the last call to their previous records."""
+        ops, cells = self.event_log.columns()
+        done = len(self.previous)
+        if done == len(ops):
+            return
+        block = cells[done:]
+        order = np.lexsort((block[:, 2], block[:, 1], block[:, 0]))
+        ordered = block[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+        previous = np.full(len(order), -1, dtype=np.int64)
+        previous[order[~first]] = order[np.flatnonzero(~first) - 1] + done
+
+        # The first record of each cell in the block links to the cell's latest earlier record
+        keys = cell_keys(ordered[first])
+        slots = np.searchsorted(self.last_keys, keys)
+        found = slots < len(self.last_keys)
+        found[found] = self.last_keys[slots[found]] == keys[found]
+        previous[order[first][found]] = self.last_index[slots[found]]
+        self.previous = np.concatenate([self.previous, previous])
+
+        latest = order[np.append(np.flatnonzero(first)[1:], len(order)) - 1] + done
+        self.last_index[slots[found]] = latest[found]
+        self.last_keys = np.insert(self.last_keys, slots[~found], keys[~found])
+        self.last_index = np.insert(self.last_index, slots[~found], latest[~found])
+
+    def changes(self, start, stop):
+        """Return (placed, erased) (N, 3) cells that turn the scene after `start` records into the one after `stop`.
+
+        Every cell touched in between is in one of the two, whether or not its
+        state differs at the two positions.
+        """
+        ops, cells = self.event_log.columns()
+        start = max(0, min(start, len(ops)))
+        stop = max(0, min(stop, len(ops)))
+        if stop >= start:
+            ops, cells = last_records(ops[start:stop], cells[start:stop])
+            present = ops == PLACE
+        else:
+            self.update()
+            first = stop + first_records(cells[stop:start])
+            previous = self.previous[first]
+            present = previous >= 0
+            present[present] = ops[previous[present]] == PLACE
+            cells = cells[first]
+        return cells[present], cells[~present]
+
+    def step(self, start, stop, scene):
+        """Return (placed, erased) that move `scene`, the ChunkedVoxelGrid after `start` records, to `stop`.
+
+        Short steps apply the records in between, see changes(). A long jump
+        takes the scene at `stop` from the nearest checkpoint and compares it
+        with `scene` instead, when that sorts fewer rows.
+        """
+        stop = max(0, min(stop, len(self.event_log)))
+        base = self.nearest_checkpoint(stop)
+        jump_cost = stop - base * self.interval + len(self.checkpoints[base]) + 2 * len(scene)
+        if abs(stop - start) <= jump_cost:
+            return self.changes(start, stop)
+        target = self.scene_at(stop)
+        current = scene.positions()
+        return cell_difference(target, current), cell_difference(current, target)
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
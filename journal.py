@@ -0,0 +1,221 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Append-only autosave journal. Every logged edit is appended to it; a writer
+# thread commits the edits that piled up in one write + fsync (group commit),
+# every COMMIT_INTERVAL seconds or as soon as COMMIT_RECORDS are waiting, so
+# the GUI thread never waits for the disk.
+#
+#   header   magic "CUBEJRNL", version u16, reserved u16, base record count u64,
+#            base path length u32, base path (UTF-8)
+#   frames   record count u32, CRC-32 of the records u32, records (binary_log.RECORD_DTYPE)
+#
+# The base is the project log file the session started from or was last saved
+# to; the journal holds the edits made since. A crash can only cut the last
+# frame short, and a frame whose length or CRC does not check out ends the
+# journal.
+#
+# Journals live in a per-user data directory, not the working directory. Each
+# running instance holds an exclusive lock on the one it writes, so a second
+# instance takes the next free slot instead of writing into the same file.
+import os
+import struct
+import sys
+import threading
+import zlib
+import numpy as np
+from binary_log import RECORD_DTYPE
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+MAGIC = b"CUBEJRNL"
+VERSION = 1
+HEADER = struct.Struct("<8sHHQI")
+FRAME = struct.Struct("<II")
+COMMIT_INTERVAL = 0.2  # Seconds an edit may wait for its commit
+COMMIT_RECORDS = 4096  # Commit early once this many edits are waiting
+JOURNAL_SLOTS = 16  # Instances that can each keep an autosave journal at the same time
+
+
+class JournalError(ValueError):
+    """The file is not an autosave journal this version can read."""
+
+
+def read_journal(path):
+    """Read a journal and return (base_path, base_records, ops, cells, end).
+
+    base_path is None for a session that did not start from a file. end is
+    the byte length of the intact part of the journal; anything after it is
+    a torn or corrupt frame.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise JournalError(f"{path} is too short to be an autosave journal")
+    magic, version, _, base_records, path_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise JournalError(f"{path} is not an autosave journal of version {VERSION}")
+    position = HEADER.size + path_length
+    base_path = data[HEADER.size:position].decode("utf-8") or None
+
+    frames = []
+    while position + FRAME.size <= len(data):
+        count, checksum = FRAME.unpack_from(data, position)
+        start = position + FRAME.size
+        stop = start + count * RECORD_DTYPE.itemsize
+        if stop > len(data) or zlib.crc32(data[start:stop]) != checksum:
+            break
+        frames.append(np.frombuffer(data, dtype=RECORD_DTYPE, count=count, offset=start))
+        position = stop
+    records = np.concatenate(frames) if frames else np.zeros(0, dtype=RECORD_DTYPE)
+    cells = np.column_stack([records["x"], records["y"], records["z"]]).astype(np.int32).reshape(-1, 3)
+    return base_path, base_records, records["op"].copy(), cells, position
+
+
+def user_data_dir():
+    """Per-user directory for the autosave journals, following each platform's convention."""
+    if sys.platform == "win32":
+        return os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "CubeCAD")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support/CubeCAD")
+    return os.path.join(os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), "cubecad")
+
+
+def lock_journal(path):
+    """Lock the journal at path for this process; return the lock file to keep open, or None if it is taken.
+
+    The lock is on path + ".lock", as the journal itself is replaced by
+    Journal.create. It is released when the returned file is closed or the
+    process ends.
+    """
+    file = open(path + ".lock", "a+b")
+    try:
+        if fcntl:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        file.close()
+        return None
+    return file
+
+
+def claim_journal(directory=None, slots=JOURNAL_SLOTS):
+    """Lock the first autosave journal in directory no other instance holds; return (path, lock).
+
+    The journal may exist already, left by a session that crashed. Returns
+    (None, None) if every slot is taken.
+    """
+    directory = directory or user_data_dir()
+    os.makedirs(directory, exist_ok=True)
+    for slot in range(slots):
+        path = os.path.join(directory, "autosave.cubejournal" if not slot else f"autosave-{slot + 1}.cubejournal")
+        lock = lock_journal(path)
+        if lock:
+            return path, lock
+    return None, None
+
+
+def encode_frame(ops, cells):
+    records = np.empty(len(ops), dtype=RECORD_DTYPE)
+    records["op"] = ops
+    records["x"], records["y"], records["z"] = cells[:, 0], cells[:, 1], cells[:, 2]
+    payload = records.tobytes()
+    return FRAME.pack(len(ops), zlib.crc32(payload)) + payload
+
+
+class Journal:
+    """Autosave journal writer; see the module comment for the format.
+
+    Use Journal.create() to start a journal for a base file, or Journal.resume()
+    to keep appending to a recovered one. append() only queues the edit. If the
+    writer thread fails to write, it stops and keeps the OSError in error; the
+    next append(), commit() or close() raises it.
+    """
+
+    def __init__(self, path, file, commit_interval=COMMIT_INTERVAL, commit_records=COMMIT_RECORDS):
+        self.path = path
+        self.file = file
+        self.commit_interval = commit_interval
+        self.commit_records = commit_records
+        self.pending = []  # (op, x, y, z) waiting for the writer
+        self.records = 0  # Edits since the base, committed or pending
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.closing = False
+        self.error = None  # OSError that stopped the writer
+        self.writer = threading.Thread(target=self.write_loop, name="journal writer", daemon=True)
+        self.writer.start()
+
+    @classmethod
+    def create(cls, path, base_path=None, base_records=0, **options):
+        """Start an empty journal for base_path, replacing any journal at path in one step."""
+        encoded = os.path.abspath(base_path).encode("utf-8") if base_path else b""
+        temporary = path + ".new"
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, 0, base_records, len(encoded)) + encoded)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        return cls(path, open(path, "ab"), **options)
+
+    @classmethod
+    def resume(cls, path, end, records, **options):
+        """Continue a journal read by read_journal, cutting off a torn tail at end."""
+        file = open(path, "r+b")
+        file.truncate(end)
+        file.seek(end)
+        journal = cls(path, file, **options)
+        journal.records = records
+        return journal
+
+    def append(self, op, cell):
+        if self.error:
+            raise self.error
+        with self.lock:
+            self.pending.append((op, cell[0], cell[1], cell[2]))
+            self.records += 1
+            full = len(self.pending) >= self.commit_records
+        if full:
+            self.wake.set()
+
+    def write_loop(self):
+        while not self.closing:
+            self.wake.wait(self.commit_interval)
+            self.wake.clear()
+            try:
+                self.commit()
+            except OSError as e:
+                # A frame may be half written, so nothing more goes after it
+                self.error = e
+                return
+
+    def commit(self):
+        """Write and fsync everything pending as one frame."""
+        if self.error:
+            raise self.error
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if not pending:
+            return
+        rows = np.array(pending, dtype=np.int64)
+        self.file.write(encode_frame(rows[:, 0], rows[:, 1:]))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """Commit what is pending and stop the writer."""
+        self.closing = True
+        self.wake.set()
+        self.writer.join()
+        try:
+            self.commit()
+        finally:
+            self.file.close()
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
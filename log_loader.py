@@ -0,0 +1,108 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Loading a project log off the GUI thread. The worker streams the file through
+# LogStreamParser and builds a complete EventLog and ChunkedVoxelGrid of its own;
+# the widget's log and scene are only touched once, on the GUI thread, when the
+# worker hands the finished result over. A cancelled or failed load changes nothing.
+import os
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from project_log import EventLog, LogStreamParser
+from binary_log import BinaryLog, is_binary_log
+from scene_model import ChunkedVoxelGrid
+
+LOAD_CHUNK_SIZE = 1 << 20  # Bytes read per step; progress and cancel are checked in between
+PARSE_SHARE = 90  # Percent of the progress bar spent reading; the rest is the replay
+
+
+def load_project(filepath, progress=None, is_cancelled=None, chunk_size=LOAD_CHUNK_SIZE):
+    """Read a project log into a new (event_log, scene, errors).
+
+    progress(percent) is called as the file is read; if is_cancelled() returns
+    True the load stops and None is returned. errors is the list of
+    (line_number, line) of malformed lines from the parser. Binary logs are
+    memory-mapped instead of read.
+    """
+    if is_binary_log(filepath):
+        # The final snapshot is the scene; the records are mapped for the history
+        binary_log = BinaryLog(filepath)
+        return build_project(binary_log.event_log(), [], progress, binary_log.replay())
+
+    total = max(1, os.path.getsize(filepath))
+    parser = LogStreamParser()
+    done = 0
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            if is_cancelled and is_cancelled():
+                return None
+            parser.feed(chunk)
+            done += len(chunk)
+            if progress:
+                progress(min(PARSE_SHARE, done * PARSE_SHARE // total))
+    ops, cells, errors = parser.finish()
+    if is_cancelled and is_cancelled():
+        return None
+    return build_project(EventLog.from_columns(ops, cells), errors, progress)
+
+
+def build_project(event_log, errors, progress=None, cells=None):
+    """Return (event_log, scene, errors) with the scene holding `cells`, or else the log replayed."""
+    if cells is None:
+        # Only the last record of each cell decides whether it ends up placed
+        cells = event_log.replay()
+    scene = ChunkedVoxelGrid()
+    scene.add_many(cells)
+    if progress:
+        progress(100)
+    return event_log, scene, errors
+
+
+class ProjectLogLoader(QObject):
+    """Worker for load_project; lives on its own QThread, see make_loader."""
+
+    progress = pyqtSignal(int)
+    loaded = pyqtSignal(object, object, object)  # event_log, scene, errors
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, filepath):
+        super().__init__()
+        self.filepath = filepath
+        self.cancel_requested = False
+
+    def cancel(self):
+        """Ask the worker to stop; safe to call from the GUI thread."""
+        self.cancel_requested = True
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            project = load_project(self.filepath, self.progress.emit, lambda: self.cancel_requested)
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
+        else:
+            if project is None:
+                self.cancelled.emit()
+            else:
+                self.loaded.emit(*project)
+        self.finished.emit()
+
+
+def make_loader(filepath, parent):
+    """Return (thread, loader): a ProjectLogLoader moved to a new, not yet started thread.
+
+    Connect to the loader's signals, then call thread.start(); signals
+    connected to GUI objects are delivered on the GUI thread. The caller has
+    to keep the loader referenced until finished is emitted.
+    """
+    thread = QThread(parent)
+    loader = ProjectLogLoader(filepath)
+    loader.moveToThread(thread)
+    thread.started.connect(loader.run)
+    loader.finished.connect(thread.quit)
+    thread.finished.connect(thread.deleteLater)
+    return thread, loader
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
@@ -0,0 +1,122 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+from PyQt5.QtWidgets import QWidget, QTableView, QHeaderView, QSpinBox, QPushButton, QHBoxLayout, QVBoxLayout, QLabel, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QVariant
+
+
+class EventLogModel(QAbstractListModel):
+    """List model over the project log records, without copying them.
+
+    records is any sequence whose items are the display lines (OpenGLGrid.event_log).
+    The view asks only for the rows it paints, so memory and layout cost do not
+    grow with the length of the log.
+    """
+
+    def __init__(self, records=None, parent=None):
+        super().__init__(parent)
+        self.records = records if records is not None else []
+        self.shown = len(self.records)  # Rows the view knows about
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.shown
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid() and index.row() < self.shown:
+            return self.records[index.row()]
+        return QVariant()
+
+    def set_records(self, records):
+        """Show a new (or rewritten) record sequence."""
+        self.beginResetModel()
+        self.records = records
+        self.shown = len(records)
+        self.endResetModel()
+
+    def records_appended(self):
+        """Announce records appended to the sequence since the last call."""
+        count = len(self.records)
+        if count > self.shown:
+            self.beginInsertRows(QModelIndex(), self.shown, count - 1)
+            self.shown = count
+            self.endInsertRows()
+
+
+class EventLogView(QWidget):
+    """Virtualized project log panel: a uniform-row view plus a jump-to-entry box."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = EventLogModel(parent=self)
+        # A one-column QTableView with fixed row heights rather than a QListView or
+        # QTreeView: those keep per-row layout state and rebuild it on every insert,
+        # while the table maps scroll offsets to rows arithmetically
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setShowGrid(False)
+        self.view.setWordWrap(False)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.view.horizontalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        rows = self.view.verticalHeader()
+        rows.hide()
+        rows.setSectionResizeMode(QHeaderView.Fixed)
+        rows.setDefaultSectionSize(self.fontMetrics().height() + 4)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setStyleSheet("background-color: #f0f0f0;")
+
+        self.entry_box = QSpinBox()
+        self.entry_box.setMinimum(1)
+        self.entry_box.setMaximum(1)
+        self.entry_box.setPrefix("Entry ")
+        go_button = QPushButton("Go")
+        go_button.clicked.connect(lambda: self.jump_to_entry(self.entry_box.value()))
+        self.entry_box.editingFinished.connect(lambda: self.jump_to_entry(self.entry_box.value()))
+        self.count_label = QLabel()
+
+        jump_layout = QHBoxLayout()
+        jump_layout.addWidget(self.entry_box)
+        jump_layout.addWidget(go_button)
+        jump_layout.addWidget(self.count_label)
+        jump_layout.addStretch(1)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.view, 1)
+        layout.addLayout(jump_layout)
+        self.setLayout(layout)
+        self.update_count()
+
+    def update_count(self):
+        count = self.model.rowCount()
+        self.entry_box.setMaximum(max(1, count))
+        self.count_label.setText(f"{count} entries")
+
+    def set_records(self, records):
+        self.model.set_records(records)
+        self.update_count()
+        self.view.scrollToBottom()
+
+    def records_appended(self):
+        # Follow the end of the log only if the user was already looking at it
+        scroll_bar = self.view.verticalScrollBar()
+        at_bottom = scroll_bar.value() == scroll_bar.maximum()
+        self.model.records_appended()
+        self.update_count()
+        if at_bottom:
+            self.view.scrollToBottom()
+
+    def jump_to_entry(self, number):
+        """Scroll to and select log entry `number` (1-based, as in the log)."""
+        if not self.model.rowCount():
+            return
+        row = min(max(number, 1), self.model.rowCount()) - 1
+        index = self.model.index(row)
+        self.view.setCurrentIndex(index)
+        self.view.scrollTo(index, QAbstractItemView.PositionAtCenter)
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
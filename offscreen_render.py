@@ -0,0 +1,180 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Headless rendering of project logs to PNG, for thumbnails and regression
+# checks on machines with no display and no GPU. The frame is drawn by
+# OpenGLGrid.paintGL, with its camera and renderers, into a framebuffer object
+# of an EGL context that needs no window system; without a GPU, Mesa renders
+# it in software. Qt runs on its offscreen platform and only hosts the widget,
+# which is never shown.
+#
+# Import this module before anything else imports OpenGL: PyOpenGL picks its
+# platform (EGL here) on first import.
+#
+# One context, framebuffer and OpenGLGrid are reused for every render, so a
+# batch pays the setup once and each project only costs its load, one frame
+# and the PNG encoding.
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+import ctypes
+import sys
+import numpy as np
+from OpenGL import EGL
+from OpenGL.GL import *
+from PyQt5.QtWidgets import QApplication
+from framebuffer import Framebuffer
+from log_loader import load_project
+from software_render import write_png
+from upload_project_log import OpenGLGrid
+
+DEFAULT_SIZE = (640, 480)
+CAMERA_FIELDS = ("pan_x", "pan_y", "zoom", "rot_x", "rot_y")  # OpenGLGrid attributes a camera dict may set
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+
+
+def create_egl_context():
+    """Create and make current a window-system-free OpenGL context; return (display, context)."""
+    display = EGL.EGL_NO_DISPLAY
+    if bool(EGL.eglGetPlatformDisplayEXT):
+        display = EGL.eglGetPlatformDisplayEXT(EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+    if display == EGL.EGL_NO_DISPLAY:
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+        raise RuntimeError("No EGL display available for headless rendering")
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    config, count = EGL.EGLConfig(), EGL.EGLint()
+    attributes = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                  EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+    EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count))
+    if not count.value:
+        raise RuntimeError("EGL has no desktop OpenGL configuration")
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    if context == EGL.EGL_NO_CONTEXT or not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+        raise RuntimeError("Could not create a headless OpenGL context")
+    return display, context
+
+
+class OffscreenRenderer:
+    """Draws scenes the way OpenGLGrid does on screen, into an offscreen framebuffer.
+
+    camera is a dict of CAMERA_FIELDS; missing fields keep the editor's
+    defaults. render_mode is one of the OpenGLGrid cube renderers, except
+    "immediate", which needs GLUT and so a display.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE, render_mode="instanced"):
+        self.app = QApplication.instance() or QApplication([])
+        self.display, self.context = create_egl_context()
+        self.framebuffer = Framebuffer()
+        self.grid = OpenGLGrid(None)
+        del self.grid.cube_renderers["immediate"]
+        self.default_camera = {field: getattr(self.grid, field) for field in CAMERA_FIELDS}
+        self.set_size(*size)
+        self.grid.initializeGL()
+        if render_mode in self.grid.cube_renderers:
+            self.grid.render_mode = render_mode
+        elif render_mode != "instanced":  # Without OpenGL 3.3 instanced falls back to vbo
+            raise ValueError(f"Render mode {render_mode!r} is not available headless")
+        self.render_mode = self.grid.render_mode
+
+    def set_size(self, width, height):
+        """(Re)create the framebuffer for width x height pixel images."""
+        if (width, height) == self.framebuffer.size:
+            return
+        if not self.framebuffer.resize(width, height):
+            raise RuntimeError(f"Offscreen framebuffer of {width}x{height} is not supported")
+        self.framebuffer.bind()
+        self.grid.resize(width, height)
+        self.grid.resizeGL(width, height)
+
+    def render(self, scene, camera=None, render_mode=None):
+        """Draw a ChunkedVoxelGrid and return the frame as an (H, W, 3) uint8 RGB array."""
+        grid = self.grid
+        for field, value in {**self.default_camera, **(camera or {})}.items():
+            setattr(grid, field, value)
+        render_mode = render_mode or self.render_mode
+        if render_mode not in grid.cube_renderers:
+            raise ValueError(f"Render mode {render_mode!r} is not available headless")
+        grid.render_mode = render_mode
+        grid.cube_positions.take(scene)
+        grid.scene_changed()
+        grid.paintGL()
+
+        width, height = self.framebuffer.size
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        pixels = glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE)
+        # GL rows start at the bottom
+        return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 3)[::-1]
+
+    def render_log(self, log_path, png_path, camera=None, render_mode=None):
+        """Render the final scene of a text or binary project log to a PNG file.
+
+        Returns the (line_number, line) list of malformed log lines.
+        """
+        _, scene, errors = load_project(log_path)
+        write_png(self.render(scene, camera, render_mode), png_path)
+        return errors
+
+    def close(self):
+        """Free the GPU objects and the context."""
+        for renderer in self.grid.cube_renderers.values():
+            renderer.release()
+        if self.grid.scene_cache is not None:
+            self.grid.scene_cache.release()
+        self.framebuffer.release()
+        EGL.eglMakeCurrent(self.display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(self.display, self.context)
+        EGL.eglTerminate(self.display)
+
+
+def render_logs(jobs, size=DEFAULT_SIZE, camera=None, render_mode="instanced"):
+    """Render (log_path, png_path) jobs with one renderer; yield (log_path, errors) as each is written.
+
+    A log that cannot be read yields its exception as errors instead of
+    stopping the batch.
+    """
+    renderer = OffscreenRenderer(size, render_mode)
+    try:
+        for log_path, png_path in jobs:
+            try:
+                yield log_path, renderer.render_log(log_path, png_path, camera)
+            except (OSError, ValueError) as e:
+                yield log_path, e
+    finally:
+        renderer.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--size": "x".join(map(str, DEFAULT_SIZE)), "--mode": "instanced"}
+    camera = {}
+    while args and args[0].startswith("--"):
+        if args[0] == "--camera":
+            # --camera zoom=2 rot_x=-30 ...: every following FIELD=VALUE argument
+            del args[0]
+            while args and "=" in args[0] and args[0].split("=")[0] in CAMERA_FIELDS:
+                field, value = args.pop(0).split("=")
+                camera[field] = float(value)
+        elif args[0] in options and len(args) > 1:
+            options[args[0]] = args[1]
+            del args[:2]
+        else:
+            break
+    if len(args) < 2:
+        print("usage: python offscreen_render.py [--size WxH] [--mode MODE] [--camera FIELD=VALUE ...] OUTPUT_DIR LOG [LOG ...]")
+        print(f"       camera fields: {', '.join(CAMERA_FIELDS)}")
+        sys.exit(2)
+    output_dir, logs = args[0], args[1:]
+    os.makedirs(output_dir, exist_ok=True)
+    size = tuple(int(n) for n in options["--size"].split("x"))
+    jobs = [(log, os.path.join(output_dir, os.path.splitext(os.path.basename(log))[0] + ".png")) for log in logs]
+    for log, errors in render_logs(jobs, size, camera, options["--mode"]):
+        if isinstance(errors, Exception):
+            print(f"{log}: not rendered: {errors}")
+        elif errors:
+            print(f"{log}: {len(errors)} invalid entries left out")
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
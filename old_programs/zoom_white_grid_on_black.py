@@ -53,8 +53,6 @@ class OpenGLWidget(QOpenGLWidget):
         if self.hover_cell:
             self.draw_cube(self.hover_cell[0], self.hover_cell[1], color=(1, 0.5, 0.5))  # Pink highlight
 
-        self.update()
-
     def draw_grid(self):
         """Draws the 10x10 grid on the XZ plane."""
         glColor3f(1, 1, 1)  # White grid lines
@@ -0,0 +1,361 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# The project log as typed columns instead of formatted strings. Each record is
+# an op code and the (x, y, z) cell it applies to, 13 bytes per record; the
+# "12: P(3,4)" text is only produced for the log panel and for saving.
+import re
+import numpy as np
+
+PLACE = 0
+ERASE = 1
+OP_LETTERS = "PE"  # Log letter of each op code
+
+LINE_PATTERN = re.compile(r"[ \t]*(\d+):[ \t]*([PE])\((-?\d{1,9}),(-?\d{1,9})(?:,(-?\d{1,9}))?\)[ \t\r]*")
+PARSE_BLOCK_SIZE = 1 << 23  # Bytes of log parsed per vectorized pass, bounds the temporary arrays
+
+# Separator bytes of the lines save_event_log writes, with the digits removed:
+# "12: P(3,4)" -> ": P(,)" and "12: P(3,4,5)" -> ": P(,,)". Index 2 is the op letter.
+CANONICAL_SEPARATORS = {count: np.frombuffer(text.encode(), dtype=np.uint8) for count, text in ((6, ": P(,)"), (7, ": P(,,)"))}
+
+def format_cell(cell):
+    """Coordinates as written in the project log: "x,y" on the ground layer, else "x,y,z"."""
+    if cell[2] == 0:
+        return f"{cell[0]},{cell[1]}"
+    return f"{cell[0]},{cell[1]},{cell[2]}"
+
+
+def format_record(number, op, cell):
+    """One project log line, e.g. "12: P(3,4)"."""
+    return f"{number}: {OP_LETTERS[op]}({format_cell(cell)})"
+
+
+def _parse_block(data):
+    """Parse the lines of a uint8 array that ends with a newline.
+
+    Returns (ops, cells, valid, slow): per-line op codes and cells, the lines
+    they are valid for, and the lines the vectorized pass could not read,
+    which are left to LINE_PATTERN.
+    """
+    is_newline = data == 10
+    ends = np.flatnonzero(is_newline)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    line_count = len(ends)
+    is_digit = (data >= 48) & (data <= 57)
+    is_minus = data == 45
+
+    separators = np.flatnonzero(~is_digit & ~is_minus & ~is_newline)
+    separator_line = np.searchsorted(ends, separators)
+    separator_count = np.bincount(separator_line, minlength=line_count)
+    first = np.searchsorted(separator_line, np.arange(line_count))
+
+    # A minus sign may only start a coordinate
+    bad = np.zeros(line_count, dtype=bool)
+    minus = np.flatnonzero(is_minus)
+    before = data[minus - 1] if len(minus) else minus
+    misplaced = ((before != 40) & (before != 44)) | ~is_digit[minus + 1]
+    misplaced[minus == 0] = True
+    bad[np.searchsorted(ends, minus[misplaced])] = True
+
+    ops = np.zeros(line_count, dtype=np.uint8)
+    cells = np.zeros((line_count, 3), dtype=np.int32)
+    valid = np.zeros(line_count, dtype=bool)
+    for count, template in CANONICAL_SEPARATORS.items():
+        lines = np.flatnonzero((separator_count == count) & ~bad)
+        if not len(lines):
+            continue
+        positions = separators[first[lines][:, None] + np.arange(count)]
+        chars = data[positions]
+        letter = chars[:, 2]
+        ok = ((chars[:, [0, 1, 3]] == template[[0, 1, 3]]).all(axis=1)
+              & ((chars[:, 4:] == template[4:]).all(axis=1))
+              & ((letter == 80) | (letter == 69))
+              & (positions[:, -1] == ends[lines] - 1))
+        gaps = np.diff(np.column_stack([starts[lines] - 1, positions]), axis=1) - 1
+        # Entry number, then ": X(" with nothing between, then one coordinate per gap
+        ok &= (gaps[:, 0] >= 1) & (gaps[:, 1:4] == 0).all(axis=1)
+        field_starts = positions[:, 3:-1] + 1
+        field_ends = positions[:, 4:]
+        signs = data[field_starts] == 45
+        digit_counts = field_ends - field_starts - signs
+        ok &= ((digit_counts >= 1) & (digit_counts <= 9)).all(axis=1)
+        lines, field_starts, field_ends, signs = lines[ok], field_starts[ok], field_ends[ok], signs[ok]
+
+        if not len(lines):
+            continue
+        # Right-align every coordinate in a window as wide as the longest one and
+        # sum digit * 10^power; nine digits still fit in int32
+        width = int(digit_counts[ok].max())
+        power = np.arange(width - 1, -1, -1, dtype=np.int32)
+        index = field_ends[..., None] - 1 - power
+        digits = data[index] - np.uint8(48)
+        digits[index < (field_starts + signs)[..., None]] = 0
+        values = (digits * 10 ** power).sum(axis=-1, dtype=np.int32)
+        values[signs] *= -1
+        ops[lines] = np.where(data[positions[ok][:, 2]] == 80, PLACE, ERASE)
+        cells[lines, :count - 4] = values
+        valid[lines] = True
+
+    blank = starts == ends
+    slow = ~valid & ~blank
+    return ops, cells, valid, slow, starts, ends
+
+
+def last_records(ops, cells):
+    """Reduce records to the last one of each cell: returns (ops, cells) with every cell once."""
+    if not len(ops):
+        return np.zeros(0, dtype=np.uint8), np.zeros((0, 3), dtype=np.int32)
+    # lexsort is stable: the records of each cell stay in log order, newest last
+    order = np.lexsort((cells[:, 2], cells[:, 1], cells[:, 0]))
+    ordered = cells[order]
+    last = np.ones(len(ordered), dtype=bool)
+    last[:-1] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    return ops[order][last], ordered[last]
+
+
+def replay_records(ops, cells, base=None):
+    """Return the (N, 3) cells present after applying records to the cells in base.
+
+    A cell is present exactly when its last record is a place, so this is one
+    sort over the records rather than a set update per record. base counts as
+    places made before the first record.
+    """
+    if base is not None and len(base):
+        ops = np.concatenate([np.full(len(base), PLACE, dtype=np.uint8), ops])
+        cells = np.concatenate([np.asarray(base, dtype=np.int32).reshape(-1, 3), cells])
+    ops, cells = last_records(ops, cells)
+    return cells[ops == PLACE]
+
+
+def cell_difference(cells, other):
+    """Return the (N, 3) cells of `cells` that are not in `other`, sorted by x, y, z.
+
+    Both are sets of distinct cells, as replay_records returns them. One sort
+    over both: each cell of `cells` is followed by its copy from `other`, if any.
+    """
+    cells = np.asarray(cells, dtype=np.int32).reshape(-1, 3)
+    other = np.asarray(other, dtype=np.int32).reshape(-1, 3)
+    both = np.concatenate([cells, other])
+    from_other = np.arange(len(both)) >= len(cells)
+    order = np.lexsort((from_other, both[:, 2], both[:, 1], both[:, 0]))
+    ordered, ordered_other = both[order], from_other[order]
+    matched = np.zeros(len(both), dtype=bool)
+    matched[:-1] = (ordered[1:] == ordered[:-1]).all(axis=1) & ordered_other[1:]
+    return ordered[~ordered_other & ~matched]
+
+
+class LogStreamParser:
+    """Incremental project log parser: feed() file chunks as they are read, then finish().
+
+    Only complete lines are parsed; a partial last line is kept until the next
+    chunk. Results are the same as parsing the whole file at once.
+    """
+
+    def __init__(self):
+        self.pending = b""
+        self.line_count = 0
+        self.ops = []
+        self.cells = []
+        self.errors = []
+
+    def feed(self, chunk):
+        data = self.pending + chunk
+        end = data.rfind(b"\n") + 1
+        self.pending = data[end:]
+        # Parse in blocks that end on a newline, so the temporary arrays stay bounded
+        position = 0
+        while position < end:
+            stop = data.find(b"\n", min(position + PARSE_BLOCK_SIZE, end) - 1) + 1
+            self.parse_block(np.frombuffer(data, dtype=np.uint8, count=stop - position, offset=position))
+            position = stop
+
+    def finish(self):
+        """Parse whatever is left and return (ops, cells, errors); see parse_log_bytes."""
+        if self.pending:
+            self.parse_block(np.frombuffer(self.pending + b"\n", dtype=np.uint8))
+            self.pending = b""
+        ops, cells = self.drain()
+        return ops, cells, self.errors
+
+    def drain(self):
+        """Return (ops, cells) of the records parsed since the last drain and forget them.
+
+        Lets a caller process a file of any length with bounded memory.
+        """
+        if not self.ops:
+            return np.zeros(0, dtype=np.uint8), np.zeros((0, 3), dtype=np.int32)
+        ops, cells = np.concatenate(self.ops), np.concatenate(self.cells)
+        self.ops, self.cells = [], []
+        return ops, cells
+
+    def parse_block(self, block):
+        ops, cells, valid, slow, starts, ends = _parse_block(block)
+        for line in np.flatnonzero(slow):
+            text = block[starts[line]:ends[line]].tobytes().decode("utf-8", errors="replace")
+            match = LINE_PATTERN.fullmatch(text)
+            if match:
+                ops[line] = PLACE if match.group(2) == "P" else ERASE
+                cells[line] = (int(match.group(3)), int(match.group(4)), int(match.group(5) or 0))
+                valid[line] = True
+            elif text.strip():
+                self.errors.append((self.line_count + int(line) + 1, text.rstrip("\r")))
+        self.ops.append(ops[valid])
+        self.cells.append(cells[valid])
+        self.line_count += len(starts)
+
+
+def parse_log_bytes(data):
+    """Parse project log bytes into (ops, cells, errors).
+
+    ops is a uint8 array of op codes, cells an (N, 3) int32 array; a missing z
+    is 0. errors lists (line_number, line) for every malformed line, which is
+    left out of ops and cells. Lines in the form save_event_log writes are read
+    by a vectorized pass over the bytes; other spacing or line endings go
+    through LINE_PATTERN. Entry numbers are checked for format only: records
+    are kept in file order and renumbered when written again.
+    """
+    parser = LogStreamParser()
+    parser.feed(bytes(data))
+    return parser.finish()
+
+
+def parse_log_text(text):
+    """Parse project log text; see parse_log_bytes."""
+    return parse_log_bytes(text.encode())
+
+
+def read_project_log(filepath, chunk_size=PARSE_BLOCK_SIZE):
+    """Parse a project log file chunk by chunk; see parse_log_bytes."""
+    parser = LogStreamParser()
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            parser.feed(chunk)
+    return parser.finish()
+
+
+class EventLog:
+    """Append-only buffer of (op, x, y, z) records with amortized O(1) appends.
+
+    ops and cells are grown by doubling, like the instance buffer of
+    InstancedCubeRenderer; columns() returns views of the used part for
+    vectorized passes. Indexing and iteration yield the text lines, so the log
+    panel model and the save code can read the log as a sequence of strings.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self):
+        self.count = 0
+        self.ops = np.zeros(self.INITIAL_CAPACITY, dtype=np.uint8)
+        self.cells = np.zeros((self.INITIAL_CAPACITY, 3), dtype=np.int32)
+
+    @classmethod
+    def from_columns(cls, ops, cells):
+        """Wrap existing op and (N, 3) cell arrays without copying them.
+
+        The arrays may be read-only views, such as the columns of a memory-mapped
+        binary log; they are copied into buffers of the log's own on the first
+        append.
+        """
+        log = cls()
+        log.ops = ops
+        log.cells = cells
+        log.count = len(ops)
+        return log
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("event log index out of range")
+        return format_record(index + 1, self.ops[index], self.cells[index].tolist())
+
+    def __iter__(self):
+        return self.lines()
+
+    def reserve(self, capacity):
+        if capacity <= len(self.ops) and self.ops.flags.writeable:
+            return
+        size = max(len(self.ops), self.INITIAL_CAPACITY)
+        while size < capacity:
+            size *= 2
+        ops = np.zeros(size, dtype=np.uint8)
+        cells = np.zeros((size, 3), dtype=np.int32)
+        ops[:self.count] = self.ops[:self.count]
+        cells[:self.count] = self.cells[:self.count]
+        self.ops, self.cells = ops, cells
+
+    def append(self, op, cell):
+        """Append one record and return its 1-based entry number."""
+        self.reserve(self.count + 1)
+        self.ops[self.count] = op
+        self.cells[self.count] = cell
+        self.count += 1
+        return self.count
+
+    def extend(self, ops, cells):
+        """Append arrays of op codes and (N, 3) cells in one copy."""
+        ops = np.asarray(ops, dtype=np.uint8).reshape(-1)
+        cells = np.asarray(cells, dtype=np.int32).reshape(-1, 3)
+        if not len(ops):
+            return
+        end = self.count + len(ops)
+        self.reserve(end)
+        self.ops[self.count:end] = ops
+        self.cells[self.count:end] = cells
+        self.count = end
+
+    def clear(self):
+        self.count = 0
+
+    def columns(self):
+        """Return (ops, cells) views of the records; do not keep them across appends."""
+        return self.ops[:self.count], self.cells[:self.count]
+
+    def lines(self, start=0, stop=None):
+        """Yield the text lines of records start..stop."""
+        stop = self.count if stop is None else min(stop, self.count)
+        ops = self.ops[start:stop].tolist()
+        cells = self.cells[start:stop].tolist()
+        for number, op, cell in zip(range(start + 1, stop + 1), ops, cells):
+            yield format_record(number, op, cell)
+
+    def counts(self):
+        """Number of records of each op, as {letter: count}."""
+        totals = np.bincount(self.ops[:self.count], minlength=len(OP_LETTERS))
+        return {letter: int(totals[op]) for op, letter in enumerate(OP_LETTERS)}
+
+    def replay(self, stop=None, start=0, base=None):
+        """Return the (N, 3) cells present after the first `stop` records.
+
+        With base, the cells present after record `start`, only records
+        start..stop are applied to it; that is how a checkpoint plus a tail is
+        replayed. See replay_records.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        start = min(start, stop)
+        return replay_records(self.ops[start:stop], self.cells[start:stop], base)
+
+    def checkpoints(self, interval):
+        """Yield (record_count, cells) for the scene every `interval` records and at the end."""
+        cells = np.zeros((0, 3), dtype=np.int32)
+        done = 0
+        while True:
+            stop = min(done + interval, self.count) if interval else self.count
+            cells = self.replay(stop, done, cells)
+            done = stop
+            yield done, cells
+            if done == self.count:
+                return
+
+    def diff(self, other):
+        """Return (added, removed) (N, 3) cells that turn this log's final scene into another's."""
+        mine = self.replay()
+        theirs = other.replay()
+        return cell_difference(theirs, mine), cell_difference(mine, theirs)
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
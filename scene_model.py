@@ -0,0 +1,387 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import numpy as np
+from voxel_octree import VoxelOctree
+from voxel_raycast import voxel_raycast
+
+
+CHUNK_SIZE = 16
+FACE_OFFSETS = ((1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1))
+
+def as_cell(pos):
+    """Return pos as an (x, y, z) tuple; (x, y) cells sit on the ground layer z = 0."""
+    if len(pos) == 2:
+        return (pos[0], pos[1], 0)
+    return (pos[0], pos[1], pos[2])
+
+
+def group_rows(keys):
+    """Group the rows of an (N, 3) int64 key array; return (unique keys, order, starts).
+
+    The rows of group g are order[starts[g]:starts[g + 1]]. Keys are packed
+    into one int64 over their bounding box for a 1-D sort where they fit.
+    """
+    lo = keys.min(axis=0)
+    span = keys.max(axis=0) - lo + 1
+    if float(span[0]) * float(span[1]) * float(span[2]) < 2.0 ** 62:
+        packed = ((keys[:, 0] - lo[0]) * span[1] + (keys[:, 1] - lo[1])) * span[2] + (keys[:, 2] - lo[2])
+    else:
+        packed = np.unique(keys, axis=0, return_inverse=True)[1].reshape(-1)
+    order = np.argsort(packed, kind="stable")
+    ordered = packed[order]
+    starts = np.flatnonzero(np.concatenate([[True], ordered[1:] != ordered[:-1], [True]]))
+    return keys[order[starts[:-1]]], order, starts
+
+
+class ChunkedVoxelGrid:
+    """Sparse 3D cube store made of CHUNK_SIZE^3 boolean chunks kept in a dict.
+
+    chunks maps a chunk coordinate (cx, cy, cz) to its array; only chunks that hold
+    at least one cube exist, so memory follows the occupied chunks and not the
+    bounding volume, and coordinates are unbounded in every direction.
+    Cells are (x, y, z) tuples; (x, y) is accepted as shorthand for z = 0.
+
+    chunk_versions gives every chunk a stamp that changes whenever the chunk, or a
+    cube right across one of its faces, changes. Renderers and meshers compare it
+    with the stamp they built from to redo only the stale chunks.
+
+    octree is a VoxelOctree over the same cubes, kept current on every edit, for
+    ray, box, nearest and frustum queries. chunk_size must be a power of two so
+    that chunks line up with octree nodes (see chunk_level). A view-only grid
+    made with octree=False has octree None and skips that upkeep.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, octree=True):
+        self.chunk_size = chunk_size
+        self.chunk_level = chunk_size.bit_length() - 1  # Octree level whose nodes are chunks
+        self.chunks = {}
+        self.chunk_counts = {}
+        self.chunk_versions = {}
+        self.count = 0
+        self.version = 0
+        self.octree = VoxelOctree() if octree else None
+
+    def split(self, cell):
+        """Return (chunk key, local index) of an (x, y, z) cell."""
+        n = self.chunk_size
+        x, y, z = cell
+        return (x // n, y // n, z // n), (x % n, y % n, z % n)
+
+    def touch(self, key, local):
+        """Stamp the chunk holding a changed cell and any chunk across a face of that cell."""
+        self.version += 1
+        self.chunk_versions[key] = self.version
+        last = self.chunk_size - 1
+        for axis in range(3):
+            if local[axis] in (0, last):
+                neighbour = list(key)
+                neighbour[axis] += 1 if local[axis] == last else -1
+                neighbour = tuple(neighbour)
+                if neighbour in self.chunks:
+                    self.chunk_versions[neighbour] = self.version
+
+    def add(self, pos):
+        cell = as_cell(pos)
+        key, local = self.split(cell)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = np.zeros((self.chunk_size,) * 3, dtype=bool)
+            self.chunk_counts[key] = 0
+        if not chunk[local]:
+            chunk[local] = True
+            self.chunk_counts[key] += 1
+            self.count += 1
+            self.touch(key, local)
+            if self.octree is not None:
+                self.octree.add(cell)
+
+    def discard(self, pos):
+        cell = as_cell(pos)
+        key, local = self.split(cell)
+        chunk = self.chunks.get(key)
+        if chunk is None or not chunk[local]:
+            return
+        chunk[local] = False
+        self.chunk_counts[key] -= 1
+        self.count -= 1
+        self.touch(key, local)
+        if self.octree is not None:
+            self.octree.discard(cell)
+        if not self.chunk_counts[key]:
+            del self.chunks[key]
+            del self.chunk_counts[key]
+            del self.chunk_versions[key]
+
+    def clear(self):
+        self.chunks.clear()
+        self.chunk_counts.clear()
+        self.chunk_versions.clear()
+        if self.octree is not None:
+            self.octree.clear()
+        self.count = 0
+        self.version += 1
+
+    def take(self, other):
+        """Replace the contents with those of another grid, e.g. one built on a loader thread.
+
+        Chunk versions are restamped from this grid's counter, so a renderer can
+        never mistake a chunk of the new scene for one it has already meshed.
+        A grid without an octree stays without one.
+        """
+        self.chunk_size = other.chunk_size
+        self.chunk_level = other.chunk_level
+        self.chunks = other.chunks
+        self.chunk_counts = other.chunk_counts
+        self.count = other.count
+        if self.octree is not None:
+            self.octree = other.octree
+            if self.octree is None:
+                self.octree = VoxelOctree()
+                self.octree.rebuild(self.positions())
+        self.version += 1
+        self.chunk_versions = dict.fromkeys(self.chunks, self.version)
+
+    def copy(self, octree=True):
+        """Return a grid with copies of the chunks; octree=False leaves out the octree."""
+        grid = ChunkedVoxelGrid(self.chunk_size, octree=False)
+        grid.chunks = {key: chunk.copy() for key, chunk in self.chunks.items()}
+        grid.chunk_counts = dict(self.chunk_counts)
+        grid.chunk_versions = dict(self.chunk_versions)
+        grid.count = self.count
+        grid.version = self.version
+        if octree:
+            grid.octree = VoxelOctree()
+            grid.octree.rebuild(grid.positions())
+        return grid
+
+    def __contains__(self, pos):
+        key, local = self.split(as_cell(pos))
+        chunk = self.chunks.get(key)
+        return chunk is not None and bool(chunk[local])
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for x, y, z in self.positions().tolist():
+            yield (x, y, z)
+
+    def chunk_positions(self, key):
+        """Return an (N, 3) int64 array of the cubes in one chunk."""
+        return np.argwhere(self.chunks[key]) + np.asarray(key, dtype=np.int64) * self.chunk_size
+
+    def positions(self):
+        """Return an (N, 3) int64 array of all cubes."""
+        if not self.chunks:
+            return np.zeros((0, 3), dtype=np.int64)
+        return np.concatenate([self.chunk_positions(key) for key in self.chunks])
+
+    def add_many(self, positions):
+        """Place all (N, 2) or (N, 3) positions, one vectorized scatter per chunk."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if not positions.size:
+            return
+        if positions.shape[1] == 2:
+            positions = np.column_stack([positions, np.zeros(len(positions), dtype=np.int64)])
+        keys = positions // self.chunk_size
+        local = positions % self.chunk_size
+        unique, order, starts = group_rows(keys)
+        for group, key in enumerate(map(tuple, unique.tolist())):
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                chunk = self.chunks[key] = np.zeros((self.chunk_size,) * 3, dtype=bool)
+                self.chunk_counts[key] = 0
+            cells = local[order[starts[group]:starts[group + 1]]]
+            flat = np.unique((cells[:, 0] * self.chunk_size + cells[:, 1]) * self.chunk_size + cells[:, 2])
+            occupied = chunk.reshape(-1)  # A view: writes go to the chunk
+            self.chunk_counts[key] += len(flat) - int(np.count_nonzero(occupied[flat]))
+            occupied[flat] = True
+        self.count = sum(self.chunk_counts.values())
+        # Bulk load: stamp every chunk, neighbours included
+        self.version += 1
+        for key in self.chunks:
+            self.chunk_versions[key] = self.version
+        if self.octree is not None:
+            self.octree.rebuild(self.positions())
+
+    def change_many(self, placed, erased):
+        """Place the (N, 3) cells of `placed` and remove those of `erased`, one scatter per chunk.
+
+        Unlike add_many, only the chunks with a cell that actually changed, and
+        the chunks across a face of such a cell, are restamped. A cell may only
+        appear once in both. Returns the (added, removed) int64 cells that changed.
+        """
+        placed = np.asarray(placed, dtype=np.int64).reshape(-1, 3)
+        erased = np.asarray(erased, dtype=np.int64).reshape(-1, 3)
+        positions = np.concatenate([placed, erased])
+        present = np.arange(len(positions)) < len(placed)
+        if not len(positions):
+            return placed, erased
+        n = self.chunk_size
+        keys = positions // n
+        local = positions % n
+        unique, order, starts = group_rows(keys)
+        changed = np.zeros(len(positions), dtype=bool)
+        emptied = []
+        self.version += 1
+        for group, key in enumerate(map(tuple, unique.tolist())):
+            rows = order[starts[group]:starts[group + 1]]
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                if not present[rows].any():
+                    continue
+                chunk = self.chunks[key] = np.zeros((n,) * 3, dtype=bool)
+                self.chunk_counts[key] = 0
+            cells = local[rows]
+            values = present[rows]
+            rows_changed = chunk[cells[:, 0], cells[:, 1], cells[:, 2]] != values
+            if not rows_changed.any():
+                continue
+            changed[rows[rows_changed]] = True
+            cells = cells[rows_changed]
+            chunk[cells[:, 0], cells[:, 1], cells[:, 2]] = values[rows_changed]
+            delta = 2 * int(values[rows_changed].sum()) - len(cells)
+            self.chunk_counts[key] += delta
+            self.count += delta
+            if not self.chunk_counts[key]:
+                emptied.append(key)
+            self.chunk_versions[key] = self.version
+            # Faces on the chunk border also change what its neighbours show
+            for axis in range(3):
+                for side, edge in ((-1, 0), (1, n - 1)):
+                    if (cells[:, axis] == edge).any():
+                        neighbour = list(key)
+                        neighbour[axis] += side
+                        neighbour = tuple(neighbour)
+                        if neighbour in self.chunks:
+                            self.chunk_versions[neighbour] = self.version
+        for key in emptied:
+            del self.chunks[key]
+            del self.chunk_counts[key]
+            del self.chunk_versions[key]
+        added = positions[changed & present]
+        removed = positions[changed & ~present]
+        if self.octree is not None:
+            for cell in map(tuple, added.tolist()):
+                self.octree.add(cell)
+            for cell in map(tuple, removed.tolist()):
+                self.octree.discard(cell)
+        return added, removed
+
+    def raycast(self, origin, direction, t_max=1.0):
+        """Return (cell, normal, t) of the first cube along origin + t * direction, or None.
+
+        Uses the octree; a grid without one steps the ray through the cells
+        of its chunks with voxel_raycast.
+        """
+        if self.octree is not None:
+            return self.octree.raycast(origin, direction, t_max)
+        bounds = self.chunk_bounds()
+        if bounds is None:
+            return None
+        return voxel_raycast(origin, direction, self.__contains__, bounds[0], bounds[1], t_max)
+
+    def visible_chunks(self, planes):
+        """Return the set of chunk keys whose box intersects the frustum planes.
+
+        Uses the octree; a grid without one tests every chunk box, all at once.
+        """
+        if self.octree is not None:
+            return self.octree.visible_nodes(planes, self.chunk_level)
+        if not self.chunks:
+            return set()
+        keys = np.array(list(self.chunks), dtype=np.int64)
+        lo = keys * self.chunk_size
+        hi = lo + self.chunk_size
+        inside = np.ones(len(keys), dtype=bool)
+        for plane in np.asarray(planes, dtype=np.float64):
+            # Corner of each box furthest along the plane normal
+            corner = np.where(plane[:3] >= 0, hi, lo)
+            inside &= corner @ plane[:3] + plane[3] >= 0
+        return set(map(tuple, keys[inside].tolist()))
+
+    def bounding_box(self):
+        """Return ((xmin, ymin, zmin), (xmax, ymax, zmax)) of the cubes, or None if empty."""
+        if not self.count:
+            return None
+        lo = []
+        hi = []
+        for key, chunk in self.chunks.items():
+            base = np.asarray(key) * self.chunk_size
+            axes = [np.flatnonzero(chunk.any(axis=tuple(a for a in range(3) if a != axis))) for axis in range(3)]
+            lo.append([base[axis] + axes[axis][0] for axis in range(3)])
+            hi.append([base[axis] + axes[axis][-1] for axis in range(3)])
+        return tuple(int(v) for v in np.min(lo, axis=0)), tuple(int(v) for v in np.max(hi, axis=0))
+
+    def chunk_bounds(self):
+        """Return the inclusive cell range ((x, y, z), (x, y, z)) covered by all chunks, or None."""
+        if not self.chunks:
+            return None
+        keys = np.array(list(self.chunks), dtype=np.int64)
+        lo = keys.min(axis=0) * self.chunk_size
+        hi = (keys.max(axis=0) + 1) * self.chunk_size - 1
+        return tuple(int(v) for v in lo), tuple(int(v) for v in hi)
+
+    def chunk_volume(self, key, border=1):
+        """Return a chunk padded with `border` cells of its face neighbours' contents.
+
+        The padding lets a mesher decide whether faces on the chunk boundary are
+        covered without looking at the whole scene.
+        """
+        n = self.chunk_size
+        volume = np.zeros((n + 2 * border,) * 3, dtype=bool)
+        volume[border:border + n, border:border + n, border:border + n] = self.chunks[key]
+        if not border:
+            return volume
+        for axis in range(3):
+            for side in (-1, 1):
+                neighbour = list(key)
+                neighbour[axis] += side
+                chunk = self.chunks.get(tuple(neighbour))
+                if chunk is None:
+                    continue
+                src = [slice(None)] * 3
+                dst = [slice(border, border + n)] * 3
+                if side < 0:
+                    src[axis] = slice(n - border, n)
+                    dst[axis] = slice(0, border)
+                else:
+                    src[axis] = slice(0, border)
+                    dst[axis] = slice(n + border, n + 2 * border)
+                volume[tuple(dst)] = chunk[tuple(src)]
+        return volume
+
+    def neighbour_mask(self, key, offset):
+        """Boolean array aligned with chunk `key`: True where cell + offset holds a cube.
+
+        offset is one of FACE_OFFSETS; cells across the chunk border are read
+        from the neighbouring chunks.
+        """
+        n = self.chunk_size
+        volume = self.chunk_volume(key)
+        dx, dy, dz = offset
+        return volume[1 + dx:1 + dx + n, 1 + dy:1 + dy + n, 1 + dz:1 + dz + n]
+
+    def neighbour_count(self, key):
+        """Number of face neighbours holding a cube, for every cell of chunk `key`, as int8."""
+        n = self.chunk_size
+        volume = self.chunk_volume(key).astype(np.int8)
+        count = np.zeros((n,) * 3, dtype=np.int8)
+        for dx, dy, dz in FACE_OFFSETS:
+            count += volume[1 + dx:1 + dx + n, 1 + dy:1 + dy + n, 1 + dz:1 + dz + n]
+        return count
+
+    def volume(self):
+        """Return (volume, origin) as one dense array over the bounding box, for small scenes."""
+        box = self.bounding_box()
+        if box is None:
+            return np.zeros((0, 0, 0), dtype=bool), np.zeros(3, dtype=np.int64)
+        origin = np.asarray(box[0], dtype=np.int64)
+        volume = np.zeros(np.asarray(box[1]) - origin + 1, dtype=bool)
+        local = self.positions() - origin
+        volume[local[:, 0], local[:, 1], local[:, 2]] = True
+        return volume, origin
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
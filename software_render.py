@@ -0,0 +1,258 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Software voxel rasterizer in NumPy for previews: no Qt, no OpenGL, no GLUT.
+# The exposed faces from voxel_mesh are filled grey and their edges drawn black
+# like draw_cube, through a z-buffer. Cells are meshed chunk by chunk from a
+# ChunkedVoxelGrid, so sparse scenes spread far apart never need a dense
+# array, and by default coplanar faces are greedy-merged into large quads so
+# that big scenes rasterize a few quads instead of every cube face. Triangles are rasterized in batches: every
+# triangle is expanded into the pixels of its bounding box, pixels outside it
+# are dropped by their barycentric weights, and the nearest fragment per pixel
+# wins. Faces are pushed back by their depth slope, as glPolygonOffset does in
+# SurfaceCubeRenderer, so that edges lying on a visible face pass the depth
+# test and hidden edges do not.
+#
+# Primitives with a corner behind the camera are skipped rather than clipped;
+# keep the scene in front of the camera.
+import math
+import struct
+import sys
+import zlib
+import numpy as np
+from camera import ViewCamera, rotation
+from voxel_mesh import surface_from_cells
+from scene_model import ChunkedVoxelGrid
+from binary_log import BinaryLog, is_binary_log
+from project_log import read_project_log, replay_records
+
+# Same colors as draw_cube and the floor grid
+FACE_COLOR = (0.5, 0.5, 0.5)
+EDGE_COLOR = (0.0, 0.0, 0.0)
+GRID_COLOR = (0.0, 0.0, 0.0)
+BACKGROUND = (1.0, 1.0, 1.0)
+# With shade=True faces are lit per direction (-x, +x, -y, +y, -z, +z)
+FACE_SHADES = {(0, -1): 0.8, (0, 1): 0.8, (1, -1): 0.9, (1, 1): 0.9, (2, -1): 0.7, (2, 1): 1.15}
+DEFAULT_CAMERA = {"pan_x": -5.0, "pan_y": -8.0, "zoom": 1.3, "rot_x": 0, "rot_y": 0}  # OpenGLGrid's start view
+ISOMETRIC_VIEW = rotation(-math.degrees(math.atan(math.sqrt(2))), 1, 0, 0) @ rotation(-45, 0, 0, 1)
+ISOMETRIC_MARGIN = 0.05  # Fraction of the image left free around the scene
+BATCH_FRAGMENTS = 1 << 22  # Candidate pixels rasterized at a time; bounds the memory
+
+
+def orthographic(left, right, bottom, top, near, far):
+    """Projection matrix for glOrtho(left, right, bottom, top, near, far)."""
+    m = np.identity(4)
+    m[0, 0] = 2 / (right - left)
+    m[1, 1] = 2 / (top - bottom)
+    m[2, 2] = -2 / (far - near)
+    m[:3, 3] = (-(right + left) / (right - left), -(top + bottom) / (top - bottom), -(far + near) / (far - near))
+    return m
+
+
+def isometric_matrix(points, width, height):
+    """Orthographic isometric view matrix (projection @ modelview) framing all points."""
+    view = (np.c_[points, np.ones(len(points))] @ ISOMETRIC_VIEW.T)[:, :3]
+    lo, hi = view.min(axis=0), view.max(axis=0)
+    center = (lo + hi) / 2
+    # Keep square pixels: widen whichever extent is short for the image aspect
+    half = np.maximum((hi - lo)[:2] / 2, 0.5) * (1 + 2 * ISOMETRIC_MARGIN)
+    half = np.maximum(half, (half[1] * width / height, half[0] * height / width))
+    projection = orthographic(center[0] - half[0], center[0] + half[0], center[1] - half[1], center[1] + half[1],
+                              -hi[2] - 1, -lo[2] + 1)
+    return projection @ ISOMETRIC_VIEW
+
+
+class Raster:
+    """Color and depth buffers of one image; depth is normalized device z, smaller is nearer."""
+
+    def __init__(self, width, height, background=BACKGROUND):
+        self.width = width
+        self.height = height
+        self.color = np.empty((height * width, 3), dtype=np.float32)
+        self.color[:] = background
+        self.depth = np.full(height * width, np.inf)
+
+    def to_screen(self, matrix, points):
+        """Project (..., 3) world points to (..., 3) pixel x, pixel y (down), depth; None where behind the camera."""
+        clip = np.c_[points.reshape(-1, 3), np.ones(points.size // 3)] @ matrix.T
+        w = clip[:, 3]
+        in_front = w > 1e-6
+        w = np.where(in_front, w, 1.0)
+        screen = np.column_stack([
+            (clip[:, 0] / w + 1) * 0.5 * self.width,
+            (1 - clip[:, 1] / w) * 0.5 * self.height,
+            clip[:, 2] / w,
+        ])
+        return screen.reshape(points.shape), in_front.reshape(points.shape[:-1])
+
+    def fill_triangles(self, triangles, colors):
+        """Fill (T, 3, 3) screen triangles with (T, 3) colors, pushed back by their depth slope."""
+        x, y, z = triangles[:, :, 0], triangles[:, :, 1], triangles[:, :, 2]
+        area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+        # Pixel (i, j) has its center at (i + 0.5, j + 0.5)
+        x0 = np.clip(np.ceil(x.min(axis=1) - 0.5), 0, self.width).astype(np.int64)
+        x1 = np.clip(np.floor(x.max(axis=1) - 0.5) + 1, 0, self.width).astype(np.int64)
+        y0 = np.clip(np.ceil(y.min(axis=1) - 0.5), 0, self.height).astype(np.int64)
+        y1 = np.clip(np.floor(y.max(axis=1) - 0.5) + 1, 0, self.height).astype(np.int64)
+        nx = np.maximum(x1 - x0, 0)
+        counts = nx * np.maximum(y1 - y0, 0) * (area != 0)
+        keep = np.flatnonzero(counts)
+        if not len(keep):
+            return
+        # Depth plane z = a * px + b * py + c of every triangle
+        dzdx = ((z[:, 1] - z[:, 0]) * (y[:, 2] - y[:, 0]) - (z[:, 2] - z[:, 0]) * (y[:, 1] - y[:, 0])) / np.where(area, area, 1)
+        dzdy = ((x[:, 1] - x[:, 0]) * (z[:, 2] - z[:, 0]) - (x[:, 2] - x[:, 0]) * (z[:, 1] - z[:, 0])) / np.where(area, area, 1)
+        offset = np.maximum(np.abs(dzdx), np.abs(dzdy)) + 1e-9
+
+        ends = np.cumsum(counts[keep])
+        start = 0
+        while start < len(keep):
+            stop = max(start + 1, int(np.searchsorted(ends, ends[start] - counts[keep[start]] + BATCH_FRAGMENTS, "right")))
+            batch = keep[start:stop]
+            start = stop
+            n = counts[batch]
+            tri = np.repeat(batch, n)
+            local = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+            px = x0[tri] + local % nx[tri]
+            py = y0[tri] + local // nx[tri]
+            cx, cy = px + 0.5, py + 0.5
+            # Barycentric weights, positive inside whatever the winding
+            w1 = ((cx - x[tri, 0]) * (y[tri, 2] - y[tri, 0]) - (x[tri, 2] - x[tri, 0]) * (cy - y[tri, 0])) / area[tri]
+            w2 = ((x[tri, 1] - x[tri, 0]) * (cy - y[tri, 0]) - (cx - x[tri, 0]) * (y[tri, 1] - y[tri, 0])) / area[tri]
+            inside = (w1 >= 0) & (w2 >= 0) & (w1 + w2 <= 1)
+            tri, px, py, w1, w2 = tri[inside], px[inside], py[inside], w1[inside], w2[inside]
+            depth = z[tri, 0] + w1 * (z[tri, 1] - z[tri, 0]) + w2 * (z[tri, 2] - z[tri, 0]) + offset[tri]
+            self.resolve(py * self.width + px, depth, colors[tri])
+
+    def resolve(self, pixels, depth, colors):
+        """Keep the nearest fragment per pixel where it is nearer than the buffer."""
+        order = np.lexsort((depth, pixels))
+        pixels, depth = pixels[order], depth[order]
+        first = np.ones(len(pixels), dtype=bool)
+        first[1:] = pixels[1:] != pixels[:-1]
+        pixels, depth, order = pixels[first], depth[first], order[first]
+        nearer = depth < self.depth[pixels]
+        self.depth[pixels[nearer]] = depth[nearer]
+        self.color[pixels[nearer]] = colors[order[nearer]]
+
+    def draw_lines(self, segments, color):
+        """Draw (S, 2, 3) screen segments one pixel wide where they are not behind a face."""
+        start, end = segments[:, 0], segments[:, 1]
+        n = (np.ceil(np.abs(end[:, :2] - start[:, :2]).max(axis=1)) + 1).astype(np.int64)
+        n = np.minimum(n, 4 * (self.width + self.height))  # Long lines are mostly off screen
+        segment = np.repeat(np.arange(len(segments)), n)
+        t = (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)) / np.maximum(np.repeat(n, n) - 1, 1)
+        points = start[segment] + t[:, None] * (end[segment] - start[segment])
+        px = np.floor(points[:, 0]).astype(np.int64)
+        py = np.floor(points[:, 1]).astype(np.int64)
+        on_image = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+        pixels = py[on_image] * self.width + px[on_image]
+        visible = points[on_image, 2] <= self.depth[pixels]
+        self.color[pixels[visible]] = color
+
+    def image(self):
+        """The image as an (H, W, 3) uint8 RGB array, top row first."""
+        return (np.clip(self.color, 0, 1) * 255 + 0.5).astype(np.uint8).reshape(self.height, self.width, 3)
+
+
+def grid_segments(grid_size):
+    """The floor grid lines as (S, 2, 3) world segments, like OpenGLGrid.draw_grid."""
+    nx, ny = grid_size
+    xs = np.arange(nx + 1, dtype=np.float64)
+    ys = np.arange(ny + 1, dtype=np.float64)
+    x_lines = np.stack([np.c_[xs, np.zeros_like(xs), np.zeros_like(xs)], np.c_[xs, np.full_like(xs, ny), np.zeros_like(xs)]], axis=1)
+    y_lines = np.stack([np.c_[np.zeros_like(ys), ys, np.zeros_like(ys)], np.c_[np.full_like(ys, nx), ys, np.zeros_like(ys)]], axis=1)
+    return np.concatenate([x_lines, y_lines])
+
+
+def scene_from_cells(cells):
+    """A ChunkedVoxelGrid (without octree) of (N, 3) cells; scene models pass through."""
+    if hasattr(cells, "chunk_volume"):
+        return cells
+    scene = ChunkedVoxelGrid(octree=False)
+    scene.add_many(np.asarray(cells, dtype=np.int64).reshape(-1, 3))
+    return scene
+
+
+def render_cells(cells, size=(256, 256), projection="isometric", camera=None, grid_size=None, shade=False,
+                 greedy=True):
+    """Render cells, a scene model or any (N, 3) cells, to an (H, W, 3) uint8 RGB image.
+
+    projection "isometric" frames the whole scene; "perspective" uses the
+    editor camera, a dict of pan_x, pan_y, zoom, rot_x and rot_y (missing
+    fields keep the editor's start view). grid_size adds the floor grid. shade
+    lights the faces per direction instead of the flat grey of draw_cube.
+    greedy merges coplanar faces, so edges outline the merged quads; with
+    greedy=False every cube face and its edges are drawn, as draw_cube does.
+    """
+    width, height = size
+    culled = surface_from_cells(scene_from_cells(cells), greedy=greedy)
+    grid = grid_segments(grid_size) if grid_size else np.zeros((0, 2, 3))
+    if projection == "isometric":
+        points = np.concatenate([culled.quads.reshape(-1, 3), grid.reshape(-1, 3)])
+        if not len(points):
+            points = np.zeros((1, 3))
+        matrix = isometric_matrix(points, width, height)
+    elif projection == "perspective":
+        view = ViewCamera().update(*({**DEFAULT_CAMERA, **(camera or {})}[field] for field in DEFAULT_CAMERA),
+                                   width, height)
+        matrix = view.projection @ view.modelview
+    else:
+        raise ValueError(f"Unknown projection {projection!r}")
+
+    raster = Raster(width, height)
+    if len(culled):
+        triangles, in_front = raster.to_screen(matrix, culled.triangles().reshape(-1, 3, 3).astype(np.float64))
+        colors = np.empty((len(culled), 3), dtype=np.float32)
+        colors[:] = FACE_COLOR
+        if shade:
+            axis = np.argmax(np.abs(culled.normals), axis=1)
+            sign = np.sign(culled.normals[np.arange(len(axis)), axis]).astype(int)
+            colors *= np.array([FACE_SHADES[key] for key in zip(axis.tolist(), sign.tolist())], dtype=np.float32)[:, None]
+        colors = np.repeat(colors, 2, axis=0)  # Two triangles per quad
+        visible = in_front.all(axis=1)
+        raster.fill_triangles(triangles[visible], colors[visible])
+    for segments, color in ((grid, GRID_COLOR), (culled.unique_edges().reshape(-1, 2, 3), EDGE_COLOR)):
+        if len(segments):
+            screen, in_front = raster.to_screen(matrix, segments.astype(np.float64))
+            raster.draw_lines(screen[in_front.all(axis=1)], color)
+    return raster.image()
+
+
+def write_png(image, filepath):
+    """Write an (H, W, 3) uint8 RGB array, top row first, as a PNG file, with zlib only."""
+    height, width = image.shape[:2]
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)], axis=1)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    with open(filepath, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        file.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        file.write(chunk(b"IEND", b""))
+
+
+def final_scene(filepath):
+    """The final scene of a text or binary project log, as a ChunkedVoxelGrid."""
+    if is_binary_log(filepath):
+        return scene_from_cells(BinaryLog(filepath).replay())
+    ops, cells, _ = read_project_log(filepath)
+    return scene_from_cells(replay_records(ops, cells))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--size": "256x256", "--projection": "isometric"}
+    while args and args[0] in options and len(args) > 1:
+        options[args[0]] = args[1]
+        del args[:2]
+    if len(args) != 2:
+        print("usage: python software_render.py [--size WxH] [--projection isometric|perspective] LOG IMAGE.png")
+        sys.exit(2)
+    size = tuple(int(n) for n in options["--size"].split("x"))
+    write_png(render_cells(final_scene(args[0]), size, options["--projection"]), args[1])
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
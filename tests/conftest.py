@@ -0,0 +1,25 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# The modules sit at the top of the repository, next to this directory.
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def random_log():
+    """Make (ops, cells) columns of n random records over cells in [-extent, extent)."""
+    rng = np.random.default_rng(0)
+
+    def make(n, extent=20, erase_share=0.3):
+        ops = (rng.random(n) < erase_share).astype(np.uint8)
+        cells = rng.integers(-extent, extent, (n, 3)).astype(np.int32)
+        return ops, cells
+    return make
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
@@ -0,0 +1,102 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import numpy as np
+import pytest
+from binary_log import BinaryLog, BinaryLogError, convert_log, read_binary_log, write_binary_log
+from project_log import EventLog, read_project_log, replay_records
+
+
+def as_set(cells):
+    return set(map(tuple, np.asarray(cells).tolist()))
+
+
+def test_snapshots_every_interval(tmp_path, random_log):
+    ops, cells = random_log(5000, extent=4)  # At most 512 cells, so every snapshot pays for itself
+    path = str(tmp_path / "log.cubelog")
+    write_binary_log(EventLog.from_columns(ops, cells), path, block_records=256, snapshot_interval=1000)
+    log = BinaryLog(path)
+    assert log.snapshots["records"].tolist() == [1000, 2000, 3000, 4000, 5000]
+    for entry in log.snapshots:
+        applied = int(entry["records"])
+        first, count = int(entry["first"]), int(entry["count"])
+        assert as_set(log.snapshot_cells[first:first + count]) == as_set(replay_records(ops[:applied], cells[:applied]))
+
+
+def test_mid_log_replay_starts_from_nearest_snapshot(tmp_path, random_log):
+    ops, cells = random_log(5000, extent=4)
+    path = str(tmp_path / "log.cubelog")
+    write_binary_log(EventLog.from_columns(ops, cells), path, snapshot_interval=1000)
+    log = BinaryLog(path)
+    start, _ = log.snapshot(2500)
+    assert start == 2000
+    assert log.snapshot(999)[0] == 0
+    assert log.snapshot()[0] == 5000
+    for position in (0, 999, 1000, 2500, 4999, 5000):
+        assert as_set(log.replay(position)) == as_set(replay_records(ops[:position], cells[:position]))
+
+
+def test_snapshots_are_skipped_until_the_records_pay_for_them(tmp_path, random_log):
+    ops, cells = random_log(4000, extent=100, erase_share=0.0)  # Almost every record places a new cube
+    path = str(tmp_path / "log.cubelog")
+    write_binary_log(EventLog.from_columns(ops, cells), path, snapshot_interval=500)
+    log = BinaryLog(path)
+    # The first snapshot can never hold more cells than records; the next one would
+    assert log.snapshots["records"].tolist() == [500, 4000]
+    assert len(log.snapshot_cells) <= 2 * len(log)
+
+
+def test_round_trip(tmp_path, random_log):
+    ops, cells = random_log(3000, extent=1000)
+    path = str(tmp_path / "log.cubelog")
+    write_binary_log(EventLog.from_columns(ops, cells), path, block_records=256)
+    log = BinaryLog(path)
+    assert len(log) == 3000
+    assert (log.ops == ops).all() and (log.cells == cells).all()
+    assert len(log.index) == 12
+    assert log.bounds() == (tuple(cells.min(axis=0).tolist()), tuple(cells.max(axis=0).tolist()))
+    assert log.counts() == EventLog.from_columns(ops, cells).counts()
+
+    write_binary_log(EventLog(), path)
+    empty = BinaryLog(path)
+    assert len(empty) == 0 and empty.bounds() is None and len(empty.replay()) == 0
+
+
+def test_save_back_to_the_mapped_file(tmp_path, random_log):
+    ops, cells = random_log(2000)
+    path = str(tmp_path / "log.cubelog")
+    write_binary_log(EventLog.from_columns(ops, cells), path)
+    event_log = read_binary_log(path)
+    mapped = event_log.ops
+    event_log.append(0, (100, 100, 100))
+    write_binary_log(event_log, path)
+    # The old mapping still reads the records it had
+    assert (mapped == ops).all()
+    saved = BinaryLog(path)
+    assert len(saved) == 2001 and saved.cells[-1].tolist() == [100, 100, 100]
+    assert (saved.ops[:2000] == ops).all() and (saved.cells[:2000] == cells).all()
+
+
+def test_convert_log(tmp_path, random_log):
+    ops, cells = random_log(2000)
+    text = tmp_path / "project_log_a.txt"
+    text.write_text("\n".join(EventLog.from_columns(ops, cells).lines()) + "\n2001: P(oops)\n")
+    assert convert_log(str(text), str(tmp_path / "a.cubelog")) == [(2001, "2001: P(oops)")]
+    assert convert_log(str(tmp_path / "a.cubelog"), str(tmp_path / "b.txt")) == []
+    back_ops, back_cells, errors = read_project_log(tmp_path / "b.txt")
+    assert errors == [] and (back_ops == ops).all() and (back_cells == cells).all()
+
+
+def test_rejects_bad_files(tmp_path, random_log):
+    path = tmp_path / "log.cubelog"
+    path.write_bytes(b"1: P(1,2)\n" * 20)
+    with pytest.raises(BinaryLogError):
+        BinaryLog(str(path))
+    ops, cells = random_log(100)
+    write_binary_log(EventLog.from_columns(ops, cells), str(path))
+    path.write_bytes(path.read_bytes()[:-8])  # Cut short while writing
+    with pytest.raises(BinaryLogError):
+        BinaryLog(str(path))
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
@@ -0,0 +1,57 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import numpy as np
+from binary_log import read_binary_log
+from compact_log import compact_log, compact_records
+from project_log import EventLog, PLACE, read_project_log, replay_records
+
+
+def as_set(cells):
+    return set(map(tuple, np.asarray(cells).tolist()))
+
+
+def split(ops, cells, size):
+    for start in range(0, len(ops), size):
+        yield ops[start:start + size], cells[start:start + size]
+
+
+def test_compaction_keeps_the_final_scene(random_log):
+    ops, cells = random_log(5000, extent=40)
+    compacted, records_in, marks = compact_records(split(ops, cells, 777))
+    out_ops, out_cells = compacted.columns()
+    assert records_in == 5000 and marks == []
+    assert (out_ops == PLACE).all()
+    assert as_set(out_cells) == as_set(replay_records(ops, cells))
+    assert len(out_cells) == len(as_set(out_cells))
+
+
+def test_checkpoints_replay_to_the_original_scenes(random_log):
+    ops, cells = random_log(5000, extent=10, erase_share=0.45)
+    checkpoints = [100, 777, 778, 2500, 4999, 9000]
+    compacted, records_in, marks = compact_records(split(ops, cells, 1000), checkpoints)
+    assert [entry for entry, _ in marks] == checkpoints[:-1]
+    assert len(compacted) < records_in
+    for entry, compacted_entry in marks:
+        assert as_set(compacted.replay(compacted_entry)) == as_set(replay_records(ops[:entry], cells[:entry]))
+    assert as_set(compacted.replay()) == as_set(replay_records(ops, cells))
+
+
+def test_compact_log_files(tmp_path, random_log):
+    ops, cells = random_log(3000, extent=12)
+    source = tmp_path / "project_log_source.txt"
+    source.write_text("\n".join(EventLog.from_columns(ops, cells).lines()) + "\nbroken line\n")
+    expected = as_set(replay_records(ops, cells))
+
+    records_in, records_out, marks, errors = compact_log(str(source), str(tmp_path / "out.txt"), [1500])
+    assert records_in == 3000 and errors == [(3001, "broken line")]
+    out_ops, out_cells, _ = read_project_log(tmp_path / "out.txt")
+    assert len(out_ops) == records_out
+    assert as_set(replay_records(out_ops, out_cells)) == expected
+    assert as_set(replay_records(out_ops[:marks[0][1]], out_cells[:marks[0][1]])) == as_set(replay_records(ops[:1500], cells[:1500]))
+
+    compact_log(str(tmp_path / "out.txt"), str(tmp_path / "out.cubelog"))
+    assert as_set(read_binary_log(str(tmp_path / "out.cubelog")).replay()) == expected
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
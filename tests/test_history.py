@@ -0,0 +1,97 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import numpy as np
+from history import HistoryIndex
+from project_log import EventLog, replay_records
+from scene_model import ChunkedVoxelGrid
+
+
+def as_set(cells):
+    return set(map(tuple, np.asarray(cells).tolist()))
+
+
+def scene(ops, cells, position):
+    return as_set(replay_records(ops[:position], cells[:position]))
+
+
+def test_scene_at_uses_checkpoints(random_log):
+    ops, cells = random_log(3000)
+    history = HistoryIndex(EventLog.from_columns(ops, cells), interval=256)
+    for position in (0, 1, 255, 256, 257, 1500, 3000, 5000):
+        assert as_set(history.scene_at(position)) == scene(ops, cells, min(position, 3000))
+    assert sorted(history.checkpoints) == [0, 1, 5, 11]
+    assert history.nearest_checkpoint(2000) == 5
+
+
+def test_changes_forward_and_back(random_log):
+    ops, cells = random_log(2000)
+    history = HistoryIndex(EventLog.from_columns(ops, cells))
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        start, stop = (int(p) for p in rng.integers(0, 2001, 2))
+        placed, erased = history.changes(start, stop)
+        before, after = scene(ops, cells, start), scene(ops, cells, stop)
+        assert after - before <= as_set(placed) <= after
+        assert before - after <= as_set(erased)
+        assert not as_set(erased) & after
+
+
+def test_links_grow_with_appended_records(random_log):
+    ops, cells = random_log(3000)
+    event_log = EventLog()
+    history = HistoryIndex(event_log)
+    for stop in (1, 2, 10, 500, 501, 3000):
+        event_log.extend(ops[len(event_log):stop], cells[len(event_log):stop])
+        history.update()
+        whole = HistoryIndex(EventLog.from_columns(ops[:stop], cells[:stop]))
+        whole.update()
+        assert history.previous.tolist() == whole.previous.tolist()
+    for index in (5, 1200, 2999):
+        same = np.flatnonzero((cells[:index] == cells[index]).all(axis=1))
+        assert history.previous[index] == (same[-1] if len(same) else -1)
+
+
+def test_grid_follows_steps_and_jumps(random_log):
+    ops, cells = random_log(4000, extent=40)
+    history = HistoryIndex(EventLog.from_columns(ops, cells), interval=512)
+    grid = ChunkedVoxelGrid(octree=False)
+    position = 0
+    for stop in (10, 9, 2000, 1990, 3999, 5, 4000, 3500, 0):
+        before = as_set(grid.positions())
+        added, removed = grid.change_many(*history.step(position, stop, grid))
+        position = stop
+        after = scene(ops, cells, stop)
+        assert as_set(grid.positions()) == after
+        assert as_set(added) == after - before and as_set(removed) == before - after
+        assert len(grid) == len(after)
+        assert set(grid.chunk_versions) == set(grid.chunks)
+
+
+def test_long_jump_starts_from_a_checkpoint(random_log, monkeypatch):
+    ops, cells = random_log(6000, extent=3)
+    history = HistoryIndex(EventLog.from_columns(ops, cells), interval=512)
+    history.scene_at(5000)
+    grid = ChunkedVoxelGrid(octree=False)
+    grid.change_many(*history.step(0, 100, grid))
+    monkeypatch.setattr(history, "changes", None)  # A record-by-record step would fail
+    grid.change_many(*history.step(100, 5100, grid))
+    assert as_set(grid.positions()) == scene(ops, cells, 5100)
+
+
+def test_change_many_restamps_changed_chunks_and_neighbours():
+    grid = ChunkedVoxelGrid(octree=False)
+    grid.add_many([(0, 0, 0), (15, 0, 0), (16, 0, 0), (40, 40, 40)])
+    versions = dict(grid.chunk_versions)
+    added, removed = grid.change_many([(15, 1, 0), (0, 0, 0)], [(40, 40, 40), (99, 99, 99)])
+    assert as_set(added) == {(15, 1, 0)} and as_set(removed) == {(40, 40, 40)}
+    assert (2, 2, 2) not in grid.chunks and len(grid) == 4
+    # (15, 1, 0) is on the face shared with chunk (1, 0, 0)
+    assert grid.chunk_versions[(0, 0, 0)] != versions[(0, 0, 0)]
+    assert grid.chunk_versions[(1, 0, 0)] != versions[(1, 0, 0)]
+    versions = dict(grid.chunk_versions)
+    grid.change_many([(5, 5, 5)], [])
+    assert grid.chunk_versions[(1, 0, 0)] == versions[(1, 0, 0)]
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
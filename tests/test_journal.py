@@ -0,0 +1,91 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import os
+import pytest
+from journal import HEADER, FRAME, Journal, JournalError, claim_journal, read_journal
+from binary_log import RECORD_DTYPE
+
+
+def write_journal(path, frames, base_path=None, base_records=0):
+    """Write each list of (op, cell) edits as one committed frame."""
+    journal = Journal.create(str(path), base_path, base_records, commit_interval=3600)
+    for frame in frames:
+        for op, cell in frame:
+            journal.append(op, cell)
+        journal.commit()
+    journal.close()
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "autosave.cubejournal"
+    write_journal(path, [[(0, (1, 2, 3)), (1, (-4, 5, 0))], [(0, (7, 8, 9))]], "log.txt", 12)
+    base_path, base_records, ops, cells, end = read_journal(path)
+    assert base_path == os.path.abspath("log.txt") and base_records == 12
+    assert ops.tolist() == [0, 1, 0]
+    assert cells.tolist() == [[1, 2, 3], [-4, 5, 0], [7, 8, 9]]
+    assert end == os.path.getsize(path)
+
+
+def test_torn_and_corrupt_frames_end_the_journal(tmp_path):
+    path = tmp_path / "autosave.cubejournal"
+    write_journal(path, [[(0, (1, 1, 1))], [(0, (2, 2, 2)), (0, (3, 3, 3))], [(1, (1, 1, 1))]])
+    first_end = HEADER.size + FRAME.size + RECORD_DTYPE.itemsize
+    second_end = first_end + FRAME.size + 2 * RECORD_DTYPE.itemsize
+    data = path.read_bytes()
+
+    path.write_bytes(data[:-3])  # Torn last frame
+    _, _, ops, cells, end = read_journal(path)
+    assert cells.tolist() == [[1, 1, 1], [2, 2, 2], [3, 3, 3]] and end == second_end
+
+    corrupt = bytearray(data)
+    corrupt[first_end + FRAME.size] ^= 0xFF  # A flipped byte in the second frame
+    path.write_bytes(bytes(corrupt))
+    _, _, ops, cells, end = read_journal(path)
+    assert cells.tolist() == [[1, 1, 1]] and end == first_end
+
+    # Resuming cuts the bad tail off before appending
+    journal = Journal.resume(str(path), end, 1, commit_interval=3600)
+    journal.append(0, (9, 9, 9))
+    journal.close()
+    _, _, ops, cells, end = read_journal(path)
+    assert cells.tolist() == [[1, 1, 1], [9, 9, 9]] and end == os.path.getsize(path)
+
+
+def test_not_a_journal(tmp_path):
+    path = tmp_path / "other.cubejournal"
+    path.write_bytes(b"1: P(1,2)\n" * 4)
+    with pytest.raises(JournalError):
+        read_journal(path)
+    path.write_bytes(b"CUBE")
+    with pytest.raises(JournalError):
+        read_journal(path)
+
+
+def test_writer_error_is_raised_on_next_append(tmp_path):
+    path = str(tmp_path / "autosave.cubejournal")
+    journal = Journal.create(path, commit_interval=0.01)
+    journal.file.close()
+    journal.file = open(path, "rb")  # Writes now fail with an OSError
+    journal.append(0, (1, 2, 3))
+    journal.writer.join(5)
+    assert isinstance(journal.error, OSError)
+    with pytest.raises(OSError):
+        journal.append(0, (4, 5, 6))
+    with pytest.raises(OSError):
+        journal.close()
+
+
+def test_claim_journal_takes_free_slots(tmp_path):
+    directory = str(tmp_path / "data")
+    first, first_lock = claim_journal(directory, slots=2)
+    second, second_lock = claim_journal(directory, slots=2)
+    assert os.path.basename(first) == "autosave.cubejournal"
+    assert os.path.basename(second) == "autosave-2.cubejournal"
+    assert claim_journal(directory, slots=2) == (None, None)
+    first_lock.close()
+    assert claim_journal(directory, slots=2)[0] == first
+    second_lock.close()
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
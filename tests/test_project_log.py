@@ -0,0 +1,92 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import numpy as np
+from project_log import (ERASE, PLACE, EventLog, LogStreamParser, cell_difference, parse_log_bytes, parse_log_text,
+                         read_project_log, replay_records)
+
+
+def as_set(cells):
+    return set(map(tuple, np.asarray(cells).tolist()))
+
+
+def test_parse_canonical_lines():
+    ops, cells, errors = parse_log_text("1: P(3,4)\n2: E(-3,-40,7)\n3: P(123456789,-987654321,-1)\n")
+    assert ops.tolist() == [PLACE, ERASE, PLACE]
+    assert cells.tolist() == [[3, 4, 0], [-3, -40, 7], [123456789, -987654321, -1]]
+    assert errors == []
+
+
+def test_parse_crlf_and_loose_spacing():
+    text = "1: P(3,4)\r\n 2:E(5,6,7)  \r\n\r\n3:\tP(-1,-2)\n4: P(8,9)"
+    ops, cells, errors = parse_log_text(text)
+    assert ops.tolist() == [PLACE, ERASE, PLACE, PLACE]
+    assert cells.tolist() == [[3, 4, 0], [5, 6, 7], [-1, -2, 0], [8, 9, 0]]
+    assert errors == []
+
+
+def test_parse_errors_keep_line_numbers():
+    text = "1: P(1,2)\n2: Q(1,2)\n\n4: P(1-2,3)\n5: P(1,2,3,4)\n6: P(--1,2)\n7: E(4,5)\n8: P(1234567890,0)\n"
+    ops, cells, errors = parse_log_text(text)
+    assert cells.tolist() == [[1, 2, 0], [4, 5, 0]]
+    assert [number for number, _ in errors] == [2, 4, 5, 6, 8]
+    assert errors[0] == (2, "2: Q(1,2)")
+
+
+def test_stream_parser_matches_whole_parse(random_log):
+    ops, cells = random_log(5000, extent=2000)
+    log = EventLog.from_columns(ops, cells)
+    data = ("\n".join(log.lines()) + "\n3: X(1)\n").encode()
+    whole = parse_log_bytes(data)
+    parser = LogStreamParser()
+    for start in range(0, len(data), 997):
+        parser.feed(data[start:start + 997])
+    streamed = parser.finish()
+    assert (streamed[0] == whole[0]).all() and (streamed[1] == whole[1]).all()
+    assert streamed[2] == whole[2] == [(5001, "3: X(1)")]
+    assert (whole[0] == ops).all() and (whole[1] == cells).all()
+
+
+def test_read_project_log_in_small_chunks(tmp_path, random_log):
+    ops, cells = random_log(3000)
+    path = tmp_path / "project_log_test.txt"
+    path.write_text("\n".join(EventLog.from_columns(ops, cells).lines()) + "\n")
+    read_ops, read_cells, errors = read_project_log(path, chunk_size=101)
+    assert (read_ops == ops).all() and (read_cells == cells).all() and errors == []
+
+
+def test_replay_records_matches_set_updates(random_log):
+    ops, cells = random_log(4000, extent=8)
+    present = set()
+    for op, cell in zip(ops.tolist(), map(tuple, cells.tolist())):
+        if op == PLACE:
+            present.add(cell)
+        else:
+            present.discard(cell)
+    assert as_set(replay_records(ops, cells)) == present
+    base = replay_records(ops[:1000], cells[:1000])
+    assert as_set(replay_records(ops[1000:], cells[1000:], base)) == present
+
+
+def test_cell_difference():
+    cells = np.array([[0, 0, 0], [1, 2, 3], [-5, 0, 1]])
+    other = np.array([[1, 2, 3], [9, 9, 9]])
+    assert cell_difference(cells, other).tolist() == [[-5, 0, 1], [0, 0, 0]]
+    assert cell_difference(other, cells).tolist() == [[9, 9, 9]]
+    assert len(cell_difference(cells, cells)) == 0
+
+
+def test_event_log_lines_and_growth():
+    log = EventLog()
+    for i in range(3000):
+        log.append(i % 2, (i, -i, i % 3))
+    assert len(log) == 3000
+    assert log[0] == "1: P(0,0)"
+    assert log[-1] == "3000: E(2999,-2999,2)"
+    assert list(log.lines(1, 3)) == ["2: E(1,-1,1)", "3: P(2,-2,2)"]
+    assert log.counts() == {"P": 1500, "E": 1500}
+    ops, cells, errors = parse_log_text("\n".join(log))
+    assert (ops == log.columns()[0]).all() and (cells == log.columns()[1]).all()
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
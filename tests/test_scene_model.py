@@ -0,0 +1,67 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import numpy as np
+from scene_model import FACE_OFFSETS, ChunkedVoxelGrid
+
+
+def random_grid(count=3000, extent=24):
+    rng = np.random.default_rng(0)
+    cells = rng.integers(-extent, extent, (count, 3))
+    grid = ChunkedVoxelGrid()
+    grid.add_many(cells)
+    return grid, set(map(tuple, cells.tolist()))
+
+
+def test_neighbour_mask_and_count_cross_chunk_borders():
+    grid, cells = random_grid()
+    n = grid.chunk_size
+    for key in grid.chunks:
+        origin = np.asarray(key) * n
+        local = np.indices((n,) * 3).reshape(3, -1).T
+        world = [tuple(cell) for cell in (local + origin).tolist()]
+        expected_count = np.zeros(len(world), dtype=np.int8)
+        for offset in FACE_OFFSETS:
+            expected = np.array([(x + offset[0], y + offset[1], z + offset[2]) in cells for x, y, z in world])
+            assert (grid.neighbour_mask(key, offset).reshape(-1) == expected).all()
+            expected_count += expected
+        assert (grid.neighbour_count(key).reshape(-1) == expected_count).all()
+
+
+def test_add_many_counts_repeated_cells_once():
+    grid = ChunkedVoxelGrid()
+    grid.add_many([(0, 0, 0), (0, 0, 0), (-1, -1, -1), (1, 0, 0)])
+    assert len(grid) == 3
+    assert grid.chunk_counts == {(0, 0, 0): 2, (-1, -1, -1): 1}
+    grid.add_many([(0, 0, 0), (2, 0, 0)])
+    assert len(grid) == 4 and len(grid.octree) == 4
+
+
+def test_raycast_without_octree_matches_octree():
+    grid, _ = random_grid(800, extent=12)
+    view = grid.copy(octree=False)
+    rng = np.random.default_rng(1)
+    hits = 0
+    for _ in range(200):
+        origin = tuple(rng.uniform(-30, 30, 3))
+        direction = tuple(rng.uniform(-60, 60, 3))
+        expected = grid.raycast(origin, direction)
+        got = view.raycast(origin, direction)
+        assert (got is None) == (expected is None)
+        if expected is not None:
+            hits += 1
+            assert got[0] == expected[0] and got[1] == expected[1] and abs(got[2] - expected[2]) < 1e-9
+    assert hits
+    assert ChunkedVoxelGrid(octree=False).raycast((0, 0, 0), (1, 1, 1)) is None
+
+
+def test_grid_without_octree():
+    grid, cells = random_grid(500)
+    view = grid.copy(octree=False)
+    assert view.octree is None and set(view) == cells
+    view.add((100, 100, 100))
+    view.discard(next(iter(cells)))
+    assert len(view) == len(cells) and len(grid) == len(cells)
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
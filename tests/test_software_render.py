@@ -0,0 +1,44 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import struct
+import zlib
+import numpy as np
+from software_render import BACKGROUND, render_cells, scene_from_cells, write_png
+from voxel_mesh import surface_from_cells
+
+
+def test_sparse_cells_render_without_dense_volume():
+    # A dense volume over this bounding box would need terabytes
+    cells = np.array([[0, 0, 0], [1000000, 1000000, 5], [-700000, 3, 0]])
+    image = render_cells(cells, (64, 64))
+    assert image.shape == (64, 64, 3)
+    assert len(scene_from_cells(cells)) == 3
+
+
+def test_greedy_quads_cover_the_same_pixels():
+    rng = np.random.default_rng(0)
+    xy = np.stack(np.meshgrid(np.arange(24), np.arange(24)), -1).reshape(-1, 2)
+    top = xy[rng.random(len(xy)) < 0.3]
+    cells = np.concatenate([np.c_[xy, np.zeros(len(xy), dtype=int)], np.c_[top, np.ones(len(top), dtype=int)]])
+    scene = scene_from_cells(cells)
+    assert len(surface_from_cells(scene, greedy=True)) < len(surface_from_cells(scene))
+    background = (np.array(BACKGROUND) * 255).astype(np.uint8)
+    greedy = (render_cells(cells, (96, 96)) != background).any(axis=2)
+    faces = (render_cells(cells, (96, 96), greedy=False) != background).any(axis=2)
+    assert (greedy != faces).sum() <= greedy.size // 200
+
+
+def test_write_png(tmp_path):
+    image = np.random.default_rng(0).integers(0, 256, (5, 7, 3), dtype=np.uint8)
+    write_png(image, tmp_path / "image.png")
+    data = (tmp_path / "image.png").read_bytes()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    assert struct.unpack(">II", data[16:24]) == (7, 5)
+    length = struct.unpack(">I", data[33:37])[0]
+    rows = np.frombuffer(zlib.decompress(data[41:41 + length]), dtype=np.uint8).reshape(5, -1)
+    assert not rows[:, 0].any()
+    assert (rows[:, 1:].reshape(5, 7, 3) == image).all()
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
@@ -0,0 +1,109 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+import math
+import numpy as np
+import pytest
+import voxel_octree
+from voxel_octree import PackedLevel, VoxelOctree
+from voxel_raycast import voxel_raycast
+
+
+@pytest.fixture(autouse=True)
+def small_packed_levels(monkeypatch):
+    # Exercise the PackedLevel path without huge scenes
+    monkeypatch.setattr(voxel_octree, "PACKED_LEVEL_NODES", 64)
+
+
+def random_cells(count=1500, extent=30, seed=0):
+    rng = np.random.default_rng(seed)
+    cells = rng.integers(-extent, extent, (count, 3))
+    return cells, set(map(tuple, cells.tolist()))
+
+
+def level_contents(tree):
+    return [dict(nodes.items()) for nodes in tree.levels]
+
+
+def test_rebuild_matches_incremental_adds():
+    cells, present = random_cells()
+    built = VoxelOctree()
+    built.rebuild(cells)
+    added = VoxelOctree()
+    for cell in present:
+        added.add(cell)
+    assert isinstance(built.levels[0], PackedLevel)
+    assert len(built) == len(present)
+    assert level_contents(built) == level_contents(added)
+
+    # Edits on packed levels keep every level's counts consistent
+    rng = np.random.default_rng(1)
+    for cell in map(tuple, rng.integers(-32, 32, (500, 3)).tolist()):
+        if cell in built:
+            built.discard(cell)
+            added.discard(cell)
+        else:
+            built.add(cell)
+            added.add(cell)
+    assert level_contents(built) == level_contents(added)
+
+
+def test_raycast_matches_grid_stepping():
+    cells, present = random_cells(800, extent=12)
+    tree = VoxelOctree()
+    tree.rebuild(cells)
+    rng = np.random.default_rng(2)
+    hits = 0
+    for _ in range(300):
+        origin = tuple(rng.uniform(-25, 25, 3))
+        direction = tuple(rng.uniform(-50, 50, 3))
+        expected = voxel_raycast(origin, direction, present.__contains__, (-12, -12, -12), (12, 12, 12))
+        got = tree.raycast(origin, direction)
+        assert (got is None) == (expected is None)
+        if got is not None:
+            hits += 1
+            assert got[:2] == expected[:2] and abs(got[2] - expected[2]) < 1e-9
+    assert hits
+
+
+def test_box_queries():
+    cells, present = random_cells()
+    tree = VoxelOctree()
+    tree.rebuild(cells)
+    for lo, hi in (((-5, -5, -5), (5, 5, 5)), ((0, -30, 3), (29, 0, 3)), ((40, 40, 40), (50, 50, 50)),
+                   ((-30, -30, -30), (29, 29, 29))):
+        inside = {c for c in present if all(lo[a] <= c[a] <= hi[a] for a in range(3))}
+        assert tree.count_in_box(lo, hi) == len(inside)
+        assert set(tree.cells_in_box(lo, hi)) == inside
+
+
+def test_nearest():
+    cells, present = random_cells(300)
+    tree = VoxelOctree()
+    tree.rebuild(cells)
+    rng = np.random.default_rng(3)
+    for point in rng.uniform(-40, 40, (50, 3)).tolist():
+        best = min(math.dist(point, (c[0] + 0.5, c[1] + 0.5, c[2] + 0.5)) for c in present)
+        cell, distance = tree.nearest(point)
+        assert cell in present and distance == pytest.approx(best)
+    assert tree.nearest((1000, 1000, 1000), max_distance=10) is None
+    assert VoxelOctree().nearest((0, 0, 0)) is None
+
+
+def test_visible_nodes_in_box_frustum():
+    cells, present = random_cells()
+    tree = VoxelOctree()
+    tree.rebuild(cells)
+    # Inside means -7 <= x <= 9, -3 <= y <= 12 and 0 <= z <= 4
+    planes = [(1, 0, 0, 7), (-1, 0, 0, 9), (0, 1, 0, 3), (0, -1, 0, 12), (0, 0, 1, 0), (0, 0, -1, 4)]
+    for level in (0, 2):
+        expected = set()
+        for c in present:
+            lo = [v >> level << level for v in c]
+            hi = [v + (1 << level) for v in lo]
+            if hi[0] >= -7 and lo[0] <= 9 and hi[1] >= -3 and lo[1] <= 12 and hi[2] >= 0 and lo[2] <= 4:
+                expected.add(tuple(v >> level for v in c))
+        assert tree.visible_nodes(planes, level) == expected
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
@@ -0,0 +1,176 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Thumbnails and scene statistics for a whole directory of project logs, on a
+# process pool. Every log is loaded with load_project, the loader behind
+# OpenGLGrid.load_project_log, so the thumbnail shows the scene the editor
+# shows, and drawn by the GL-free software_render.
+#
+# The output directory holds one PNG per log and manifest.json, which records
+# the SHA-256 of every log with its statistics. On the next run a log whose
+# hash is unchanged and whose thumbnail still exists is skipped. Workers run
+# with an address space limit (RLIMIT_AS) so one huge log fails on its own
+# with a MemoryError instead of taking the machine down, and are replaced
+# after WORKER_TASKS logs so memory does not creep up over a long batch.
+import fnmatch
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from log_loader import load_project
+from software_render import render_cells, write_png
+
+LOG_PATTERNS = ("project_log_*.txt", "*.cubelog")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+THUMBNAIL_SIZE = (256, 256)
+WORKER_MEMORY_MB = 2048
+WORKER_TASKS = 100  # Logs per worker process before it is replaced
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_hash(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def limit_memory(megabytes):
+    """Pool initializer: cap the address space of the worker process, where the platform allows."""
+    if not megabytes:
+        return
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return
+    limit = megabytes << 20
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def process_log(job):
+    """Worker: thumbnail and statistics of one log. Returns (name, manifest entry).
+
+    The entry is None if the log hash matches previous_hash and the thumbnail
+    exists, meaning the previous entry still holds.
+    """
+    log_path, thumbnail_path, previous_hash, size = job
+    name = os.path.basename(log_path)
+    start = time.perf_counter()
+    try:
+        digest = file_hash(log_path)
+        if digest == previous_hash and os.path.exists(thumbnail_path):
+            return name, None
+        event_log, scene, errors = load_project(log_path)
+        write_png(render_cells(scene, size), thumbnail_path)
+    except (OSError, ValueError, MemoryError) as e:
+        return name, {"sha256": None, "error": f"{type(e).__name__}: {e}"}
+    counts = event_log.counts()
+    bounds = scene.bounding_box()
+    return name, {
+        "sha256": digest,
+        "thumbnail": os.path.basename(thumbnail_path),
+        "records": len(event_log),
+        "places": counts["P"],
+        "erases": counts["E"],
+        "invalid_lines": len(errors),
+        "cubes": len(scene),
+        "chunks": len(scene.chunks),
+        "bounds": [list(bounds[0]), list(bounds[1])] if bounds else None,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def read_manifest(path, size):
+    """Entries of an earlier manifest, or {} if there is none or it was made with other settings."""
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("thumbnail_size") != list(size):
+        return {}
+    return manifest.get("logs", {})
+
+
+def write_manifest(path, entries, size):
+    """Write the manifest in one step, so a stopped run never leaves half of one."""
+    temporary = path + ".new"
+    with open(temporary, "w") as file:
+        json.dump({"version": MANIFEST_VERSION, "thumbnail_size": list(size),
+                   "logs": dict(sorted(entries.items()))}, file, indent=1)
+    os.replace(temporary, path)
+
+
+def find_logs(log_dir, patterns=LOG_PATTERNS):
+    return sorted(name for name in os.listdir(log_dir)
+                  if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+                  and os.path.isfile(os.path.join(log_dir, name)))
+
+
+def build_thumbnails(log_dir, output_dir, workers=None, size=THUMBNAIL_SIZE, memory_mb=WORKER_MEMORY_MB,
+                     patterns=LOG_PATTERNS, progress=None):
+    """Thumbnail every matching log in log_dir into output_dir and update its manifest.
+
+    progress(done, total, name, entry) is called as each log finishes; entry
+    is None for a skipped log. Returns (rendered, skipped, failed) counts.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    previous = read_manifest(manifest_path, size)
+    names = find_logs(log_dir, patterns)
+    jobs = [(os.path.join(log_dir, name), os.path.join(output_dir, os.path.splitext(name)[0] + ".png"),
+             previous.get(name, {}).get("sha256"), size) for name in names]
+
+    entries = {}  # Logs that are gone from log_dir drop out of the manifest
+    rendered = skipped = failed = 0
+    with multiprocessing.Pool(workers, initializer=limit_memory, initargs=(memory_mb,),
+                              maxtasksperchild=WORKER_TASKS) as pool:
+        for done, (name, entry) in enumerate(pool.imap_unordered(process_log, jobs), 1):
+            if entry is None:
+                entries[name] = previous[name]
+                skipped += 1
+            else:
+                entries[name] = entry
+                if entry.get("error"):
+                    failed += 1
+                else:
+                    rendered += 1
+            if progress:
+                progress(done, len(jobs), name, entry)
+    write_manifest(manifest_path, entries, size)
+    return rendered, skipped, failed
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--workers": None, "--size": "x".join(map(str, THUMBNAIL_SIZE)), "--memory-mb": str(WORKER_MEMORY_MB)}
+    while args and args[0] in options and len(args) > 1:
+        options[args[0]] = args[1]
+        del args[:2]
+    if len(args) != 2:
+        print("usage: python thumbnail_farm.py [--workers N] [--size WxH] [--memory-mb MB] LOG_DIR OUTPUT_DIR")
+        sys.exit(2)
+
+    def report(done, total, name, entry):
+        if entry and entry.get("error"):
+            print(f"{name}: {entry['error']}")
+        if done == total or done % 100 == 0:
+            print(f"{done}/{total} logs")
+
+    rendered, skipped, failed = build_thumbnails(
+        args[0], args[1],
+        workers=int(options["--workers"]) if options["--workers"] else None,
+        size=tuple(int(n) for n in options["--size"].split("x")),
+        memory_mb=int(options["--memory-mb"]),
+        progress=report)
+    print(f"{rendered} rendered, {skipped} unchanged, {failed} failed")
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
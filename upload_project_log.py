@@ -4,17 +4,35 @@ If you download or copy this material then you agree to this. If you remix, tran
 '''
 import sys
 import math
+import os
 import datetime
 #from PyQt5.QtWidgets import QApplication, QMainWindow, QOpenGLWidget, QAction, QToolBar, QToolButton, QTextEdit, QVBoxLayout, QWidget
-from PyQt5.QtWidgets import QApplication, QMainWindow, QOpenGLWidget, QAction, QToolBar, QToolButton, QTextEdit, QVBoxLayout, QWidget, QLabel, QFileDialog
+from PyQt5.QtWidgets import QApplication, QMainWindow, QOpenGLWidget, QAction, QToolBar, QToolButton, QVBoxLayout, QWidget, QLabel, QFileDialog, QComboBox, QProgressDialog, QSlider, QHBoxLayout
 
 from PyQt5.QtCore import Qt, QPoint
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
 import numpy as np
+from cube_renderer import ImmediateCubeRenderer, VBOCubeRenderer, InstancedCubeRenderer, SurfaceCubeRenderer
+from voxel_mesh import surface_from_cells, write_obj
+from grid_renderer import GridRenderer
+from frame_scheduler import FrameScheduler, CAMERA, SCENE, OVERLAY
+from camera import ViewCamera
+from log_view import EventLogView
+from project_log import EventLog, PLACE, ERASE
+from log_loader import load_project, make_loader
+from binary_log import BINARY_LOG_EXTENSION, write_binary_log, write_text_log
+from scene_model import ChunkedVoxelGrid
+from history import HistoryIndex
+from journal import Journal, JournalError, claim_journal, read_journal
+from compact_log import compact_records
+from framebuffer import Framebuffer, bound_framebuffer
+from frame_metrics import FrameMetrics, MetricsOverlay
+
+MAX_REPORTED_LOG_ERRORS = 20  # Invalid project log lines printed on load
+PROJECT_LOG_FILTERS = "Text Files (*.txt);;Binary Project Log (*.cubelog);;All Files (*)"
 
-glutInit()
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -24,13 +42,27 @@ class MainWindow(QMainWindow):
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.opengl_grid = OpenGLGrid(self)
-        self.event_log_widget = QTextEdit()
-        self.event_log_widget.setStyleSheet("background-color: #f0f0f0;")        
+        self.log_loader = None  # Worker of the project log load in progress
+        self.log_loader_thread = None
+        self.running_loaders = set()
+        self.load_progress = None  # Progress dialog of the load in progress
+        self.event_log_widget = EventLogView()  # Virtualized: only the visible rows are laid out
+        self.event_log_widget.set_records(self.opengl_grid.event_log)
         # Project log label
         self.event_log_label = QLabel("Project Log")
         #self.event_log_label.setStyleSheet("font-weight: bold;")
-        self.event_log_widget.setReadOnly(True)
     
+        # History scrubber: drag to see the scene after any edit, all the way right is live
+        self.history_slider = QSlider(Qt.Horizontal)
+        self.history_slider.setRange(0, 0)
+        self.history_slider.valueChanged.connect(self.scrub_history)
+        self.history_label = QLabel()
+        history_layout = QHBoxLayout()
+        history_layout.addWidget(QLabel("History"))
+        history_layout.addWidget(self.history_slider, 1)
+        history_layout.addWidget(self.history_label)
+        self.update_history_label()
+
         # Layout
         layout = QVBoxLayout()
         #layout.addWidget(self.event_log_label)
@@ -43,6 +75,7 @@ class MainWindow(QMainWindow):
         # Add to central widget
         main_layout = QVBoxLayout()
         main_layout.addWidget(self.opengl_grid, 10)
+        main_layout.addLayout(history_layout)
         main_layout.addWidget(container)
         self.central_widget.setLayout(main_layout)
 
@@ -62,6 +95,18 @@ class MainWindow(QMainWindow):
         upload_button.clicked.connect(self.upload_project_log)
         toolbar.addWidget(upload_button)
 
+        # Export Mesh Button
+        export_button = QToolButton()
+        export_button.setText("Export Mesh")
+        export_button.clicked.connect(self.export_mesh)
+        toolbar.addWidget(export_button)
+
+        # Compact Log Button
+        compact_button = QToolButton()
+        compact_button.setText("Compact Log")
+        compact_button.clicked.connect(self.compact_event_log)
+        toolbar.addWidget(compact_button)
+
         self.initUI()
 
     def initUI(self):
@@ -80,8 +125,24 @@ class MainWindow(QMainWindow):
         self.place_button = toolbar.widgetForAction(self.place_action)
         self.erase_button = toolbar.widgetForAction(self.erase_action)
 
+        # Cube renderer selection; immediate mode is kept as a fallback to compare frame times
+        self.render_mode_box = QComboBox()
+        self.render_mode_box.addItems(["instanced", "greedy", "culled", "vbo", "immediate"])
+        self.render_mode_box.setCurrentText(self.opengl_grid.render_mode)
+        self.render_mode_box.currentTextChanged.connect(self.set_render_mode)
+        toolbar.addWidget(self.render_mode_box)
+
+        # Frame time, draw call and repaint statistics drawn over the scene
+        self.metrics_action = QAction("Frame Stats", self)
+        self.metrics_action.setCheckable(True)
+        self.metrics_action.toggled.connect(self.opengl_grid.set_metrics_overlay)
+        toolbar.addAction(self.metrics_action)
+
         self.update_button_styles()
 
+        # Recover edits a crash left unsaved, and journal new ones
+        self.opengl_grid.open_autosave_journal()
+
     def set_placing_mode(self):
         self.opengl_grid.set_placing_mode()  # Fix here
         self.update_button_styles()
@@ -90,6 +151,17 @@ class MainWindow(QMainWindow):
         self.opengl_grid.set_erasing_mode()  # Fix here
         self.update_button_styles()
 
+    def set_render_mode(self, mode):
+        self.opengl_grid.set_render_mode(mode)
+        self.render_mode_box.setCurrentText(self.opengl_grid.render_mode)
+
+    def closeEvent(self, event):
+        self.opengl_grid.close_journal()
+        super().closeEvent(event)
+
+    def update_frame_time(self, render_mode, frame_ms):
+        self.statusBar().showMessage(f"Renderer: {render_mode}  |  Frame: {frame_ms:.2f} ms")
+
     
 
     def update_button_styles(self):
@@ -101,27 +173,156 @@ class MainWindow(QMainWindow):
             self.place_button.setStyleSheet("")
     
 
-    def update_event_log(self, text):
-        self.event_log_widget.setPlainText(text)
+    def update_event_log(self, records):
+        """Show a new or rewritten log; the panel reads the records in place."""
+        self.event_log_widget.set_records(records)
+        self.history_slider.setRange(0, len(records))
+        self.history_slider.setValue(len(records))
+        self.update_history_label()
+
+    def append_event_log(self):
+        """Show records appended to the log since the last update."""
+        self.event_log_widget.records_appended()
+        count = len(self.opengl_grid.event_log)
+        live = self.history_slider.value() == self.history_slider.maximum()
+        self.history_slider.setMaximum(count)
+        if live:
+            self.history_slider.setValue(count)
+        self.update_history_label()
+
+    def scrub_history(self, position):
+        self.opengl_grid.show_history(position)
+        self.update_history_label()
+
+    def update_history_label(self):
+        position, count = self.history_slider.value(), self.history_slider.maximum()
+        if position == count:
+            self.history_label.setText(f"Edit {count} of {count} (live)")
+        else:
+            self.history_label.setText(f"Edit {position} of {count}")
         
     def save_event_log(self):
-        """Save the event log to a text file with date and time as filename."""
+        """Save the event log, as text or binary, with date and time as filename."""
         filename = datetime.datetime.now().strftime("project_log_%Y-%m-%d_%H-%M-%S.txt")
         options = QFileDialog.Options()
-        filepath, _ = QFileDialog.getSaveFileName(self, "Save Project Log", filename, "Text Files (*.txt);;All Files (*)", options=options)
+        filepath, selected_filter = QFileDialog.getSaveFileName(self, "Save Project Log", filename, PROJECT_LOG_FILTERS, options=options)
         if filepath:
-            with open(filepath, "w") as file:
-                file.write(self.event_log_widget.toPlainText()) 
-   
+            filepath = self.write_project_log(self.opengl_grid.event_log, filepath, selected_filter)
+            # Everything up to here is in the saved file; the journal starts over from it
+            self.opengl_grid.restart_journal(filepath)
+
+    def write_project_log(self, event_log, filepath, selected_filter):
+        """Write event_log as text, or binary for the binary filter or extension; return the path written."""
+        if selected_filter.startswith("Binary") and not filepath.endswith(BINARY_LOG_EXTENSION):
+            filepath = os.path.splitext(filepath)[0] + BINARY_LOG_EXTENSION
+        if filepath.endswith(BINARY_LOG_EXTENSION):
+            write_binary_log(event_log, filepath)
+        else:
+            # The text is generated here from the log records
+            write_text_log(event_log, filepath)
+        return filepath
+
+    def compact_event_log(self):
+        """Save the log compacted to the fewest edits that give the same scene, and continue from it.
+
+        If the history slider is on an earlier edit, that point of the history is kept.
+        """
+        grid = self.opengl_grid
+        filename = datetime.datetime.now().strftime("project_log_%Y-%m-%d_%H-%M-%S_compacted.txt")
+        options = QFileDialog.Options()
+        filepath, selected_filter = QFileDialog.getSaveFileName(self, "Save Compacted Project Log", filename, PROJECT_LOG_FILTERS, options=options)
+        if not filepath:
+            return
+        checkpoints = [grid.history_position] if grid.history_position else []
+        compacted, records_in, marks = compact_records([grid.event_log.columns()], checkpoints)
+        filepath = self.write_project_log(compacted, filepath, selected_filter)
+        scene = ChunkedVoxelGrid()
+        scene.add_many(compacted.replay())
+        grid.publish_project_log(compacted, scene, [])
+        grid.restart_journal(filepath)
+        print(f"{records_in} entries compacted to {len(compacted)}")
+        for entry, compacted_entry in marks:
+            print(f"Entry {entry} is entry {compacted_entry} of the compacted log")
 
     #UPLOAD PROJECT LOG FILE DIALOG           
     def upload_project_log(self):
         """Upload a Project Log file and update the scene accordingly."""
         options = QFileDialog.Options()
-        filepath, _ = QFileDialog.getOpenFileName(self, "Open Project Log", "", "Text Files (*.txt);;All Files (*)", options=options)
+        filepath, _ = QFileDialog.getOpenFileName(self, "Open Project Log", "", "Project Logs (*.txt *.cubelog);;" + PROJECT_LOG_FILTERS, options=options)
     
         if filepath:
-            self.opengl_grid.load_project_log(filepath)
+            self.start_project_log_load(filepath)
+
+    def start_project_log_load(self, filepath):
+        """Load a project log on a worker thread; the scene and log panel stay as they are until it is done."""
+        if self.log_loader is not None:
+            self.log_loader.cancel()  # The newer request wins
+        self.log_loader_thread, self.log_loader = make_loader(filepath, self)
+        self.running_loaders.add(self.log_loader)  # Referenced until its thread is done with it
+        self.log_loader.finished.connect(self.forget_project_log_loader)
+        self.log_loader.progress.connect(self.project_log_load_progress)
+        self.log_loader.loaded.connect(self.project_log_loaded)
+        self.log_loader.failed.connect(self.project_log_load_failed)
+        self.log_loader.cancelled.connect(self.project_log_load_cancelled)
+
+        self.close_load_progress()
+        self.load_progress = QProgressDialog("Loading project log...", "Cancel", 0, 100, self)
+        self.load_progress.setWindowModality(Qt.WindowModal)
+        self.load_progress.setMinimumDuration(300)
+        self.load_progress.setAutoClose(False)
+        self.load_progress.setAutoReset(False)
+        self.load_progress.canceled.connect(self.cancel_project_log_load)
+        self.log_loader_thread.start()
+
+    def cancel_project_log_load(self):
+        # Called directly: a queued call would wait for the busy worker thread
+        if self.log_loader is not None:
+            self.log_loader.cancel()
+
+    def forget_project_log_loader(self):
+        self.running_loaders.discard(self.sender())
+
+    def finish_project_log_load(self):
+        if self.sender() is not self.log_loader:
+            return False  # A superseded load reporting back
+        self.close_load_progress()
+        self.log_loader = None
+        self.log_loader_thread = None
+        return True
+
+    def close_load_progress(self):
+        if self.load_progress is not None:
+            # Closing the dialog emits canceled; that is not a cancel request
+            self.load_progress.canceled.disconnect(self.cancel_project_log_load)
+            self.load_progress.close()
+            self.load_progress.deleteLater()
+            self.load_progress = None
+
+    def project_log_load_progress(self, percent):
+        if self.sender() is self.log_loader and self.load_progress is not None:
+            self.load_progress.setValue(percent)
+
+    def project_log_loaded(self, event_log, scene, errors):
+        filepath = self.log_loader.filepath if self.log_loader else None
+        if self.finish_project_log_load():
+            self.opengl_grid.publish_project_log(event_log, scene, errors)
+            self.opengl_grid.restart_journal(filepath)
+
+    def project_log_load_failed(self, message):
+        if self.finish_project_log_load():
+            print(f"Error reading file: {message}")
+
+    def project_log_load_cancelled(self):
+        if self.finish_project_log_load():
+            print("Loading the project log was cancelled")
+
+    def export_mesh(self):
+        """Export the exposed cube faces, greedy-merged, as an OBJ file."""
+        filename = datetime.datetime.now().strftime("cubecad_mesh_%Y-%m-%d_%H-%M-%S.obj")
+        options = QFileDialog.Options()
+        filepath, _ = QFileDialog.getSaveFileName(self, "Export Mesh", filename, "OBJ Files (*.obj);;All Files (*)", options=options)
+        if filepath:
+            write_obj(surface_from_cells(self.opengl_grid.cube_positions, greedy=True), filepath)
 
     
 
@@ -136,7 +337,7 @@ class OpenGLGrid(QOpenGLWidget):
         super().__init__(parent)
         self.main_window = main_window  # Store reference to MainWindow
         self.grid_size = (16, 16)
-        self.cube_positions = set()
+        self.cube_positions = ChunkedVoxelGrid()  # (x, y, z) cells, stacking allowed
         self.hover_cell = None
         self.hover_face = None
         self.zoom = 1.3 #grid zoom
@@ -149,46 +350,236 @@ class OpenGLGrid(QOpenGLWidget):
         self.tilting = False
         self.setMouseTracking(True)
         self.placing_mode = True  # True for placing, False for erasing
-        self.event_log = []  # Store event logs
+        self.event_log = EventLog()  # (op, x, y, z) records; text is made only for display and saving
+        self.cube_renderers = {
+            "instanced": InstancedCubeRenderer(),
+            "greedy": SurfaceCubeRenderer(greedy=True),
+            "culled": SurfaceCubeRenderer(),
+            "vbo": VBOCubeRenderer(),
+            "immediate": ImmediateCubeRenderer(),
+        }
+        self.render_mode = "instanced"
+        self.grid_renderer = GridRenderer()
+        self.scheduler = FrameScheduler(self)
+        self.frame_dirty = set()  # What changed since the previous frame
+        self.camera = ViewCamera()
+        self.visible_chunks = None
+        self.visible_chunks_key = None  # (camera key, scene, scene version) visible_chunks was found for
+        self.history = HistoryIndex(self.event_log)
+        self.history_position = None  # Edit count shown while scrubbing the history, None for the live scene
+        self.history_scene = ChunkedVoxelGrid(octree=False)  # View-only, so no octree to keep up
+        self.history_scene_position = None  # Position history_scene holds, None until it is first built
+        self.journal = None  # Autosave journal every logged edit is appended to
+        self.journal_path = None  # Where the journal is kept, also while it is stopped by an error
+        self.journal_lock = None  # Lock file that keeps other instances off journal_path
+        self.scene_cache = Framebuffer()  # Grid and cubes of the last frame; None draws every frame directly
+        self.scene_cache_key = None  # (camera key, render mode, scene, scene version) the cache holds
+        self.metrics = FrameMetrics()  # Timings and draw counts of every frame, see frame_metrics()
+        self.metrics_overlay = None  # MetricsOverlay while the statistics are shown
 
 
     def set_placing_mode(self):
         self.placing_mode = True
+        self.update_hover()
 
     def set_erasing_mode(self):
         self.placing_mode = False
+        self.update_hover()
+
+    def set_render_mode(self, mode):
+        """Switch to one of the cube renderers in self.cube_renderers."""
+        if mode in self.cube_renderers:
+            self.render_mode = mode
+        self.request_redraw(SCENE)
+
+    def view_camera(self):
+        """Return the camera for the current pan/zoom/rotation; matrices are cached until they change."""
+        return self.camera.update(self.pan_x, self.pan_y, self.zoom, self.rot_x, self.rot_y,
+                                  self.width(), self.height())
+
+    def set_metrics_overlay(self, shown):
+        """Show or hide the frame statistics over the scene."""
+        if shown and self.metrics_overlay is None:
+            self.metrics_overlay = MetricsOverlay()
+        elif not shown and self.metrics_overlay is not None:
+            self.makeCurrent()
+            self.metrics_overlay.release()
+            self.doneCurrent()
+            self.metrics_overlay = None
+        self.request_redraw(OVERLAY)
+
+    def frame_metrics(self):
+        """Frame statistics as a dict; see FrameMetrics.snapshot."""
+        return self.metrics.snapshot(self.scheduler)
+
+    def request_redraw(self, *kinds):
+        """Schedule a repaint for the given dirty kinds (CAMERA, SCENE, OVERLAY)."""
+        self.scheduler.request(*kinds)
+
+    def show_history(self, position):
+        """Show the scene as it was after `position` edits; None or the log length shows the live scene.
+
+        Editing is disabled while an earlier point of the history is shown.
+        """
+        if position is not None and position >= len(self.event_log):
+            position = None
+        if position == self.history_position:
+            return
+        if (position is None) != (self.history_position is None):
+            self.scene_changed()  # The renderers switch to another grid
+        else:
+            self.request_redraw(SCENE)  # displayed_scene() applies the step
+        self.history_position = position
+        self.update_hover()
+
+    def displayed_scene(self):
+        """The grid to draw: the live scene, or the history scene moved to history_position."""
+        if self.history_position is None:
+            return self.cube_positions
+        if self.history_scene_position != self.history_position:
+            self.step_history_scene(self.history_position)
+        return self.history_scene
+
+    def step_history_scene(self, position):
+        """Move history_scene to `position`, changing only the cells that differ.
+
+        The first time, it starts from whichever of the empty scene and the live
+        scene is fewer records away.
+        """
+        start = self.history_scene_position
+        if start is None:
+            start = len(self.event_log)
+            if position < start - position:
+                self.history_scene.clear()
+                start = 0
+            else:
+                self.history_scene.take(self.cube_positions.copy(octree=False))
+            for renderer in self.cube_renderers.values():
+                renderer.scene_changed()
+        added, removed = self.history_scene.change_many(*self.history.step(start, position, self.history_scene))
+        self.history_scene_position = position
+        for renderer in self.cube_renderers.values():
+            renderer.cubes_changed(added, removed)
+
+    def scene_changed(self):
+        """Tell the cube renderers that cube_positions was bulk-modified."""
+        for renderer in self.cube_renderers.values():
+            renderer.scene_changed()
+        self.request_redraw(SCENE)
+
+    def place_cube(self, pos):
+        """Add one cube and patch only its slot in the renderers."""
+        self.cube_positions.add(pos)
+        for renderer in self.cube_renderers.values():
+            renderer.cube_added(pos)
+        self.request_redraw(SCENE)
+
+    def erase_cube(self, pos):
+        """Remove one cube and patch only its slot in the renderers."""
+        self.cube_positions.discard(pos)
+        for renderer in self.cube_renderers.values():
+            renderer.cube_removed(pos)
+        self.request_redraw(SCENE)
 
     def initializeGL(self):
         glEnable(GL_DEPTH_TEST)
         glClearColor(1.0, 1.0, 1.0, 1.0)
+        if not Framebuffer.supported():
+            self.scene_cache = None
+        instanced = self.cube_renderers.get("instanced")
+        if instanced and not instanced.init_gl():
+            del self.cube_renderers["instanced"]
+            if self.main_window:
+                self.main_window.set_render_mode("vbo")
+            else:
+                self.set_render_mode("vbo")
 
     def resizeGL(self, w, h):
         glViewport(0, 0, w, h)
         glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(45, w / h, 1.0, 200.0)
+        glLoadMatrixd(self.view_camera().gl_projection())
         glMatrixMode(GL_MODELVIEW)
 
     def paintGL(self):
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glLoadIdentity()
-        glTranslatef(self.pan_x, self.pan_y, -20 * self.zoom)
-        glRotatef(self.rot_x, 1, 0, 0)
-        glRotatef(self.rot_y, 0, 1, 0)
-
-        self.draw_grid()
-        for pos in self.cube_positions:
-            self.draw_cube(pos[0], pos[1])
+        metrics = self.metrics
+        metrics.begin_frame()
+        self.frame_dirty = self.scheduler.begin_frame()
+        camera = self.view_camera()
+        scene = self.displayed_scene()
+        if self.scene_cache is not None:
+            # Grid and cubes are drawn into the cache only when the camera or
+            # the scene changed; a hover move just copies it and adds the overlay
+            target = bound_framebuffer()
+            if self.update_scene_cache(camera, scene):
+                self.scene_cache.bind()
+                self.draw_scene(camera, scene)
+            with metrics.timed("composite"):
+                self.scene_cache.blit_to(target)
+        else:
+            self.draw_scene(camera, scene)
 
         if self.hover_cell:
-            glDisable(GL_DEPTH_TEST)
-            glEnable(GL_BLEND)
-            glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-            self.draw_highlight(self.hover_cell[0], self.hover_cell[1])
-            glDisable(GL_BLEND)
-            glEnable(GL_DEPTH_TEST)
+            with metrics.timed("highlight"):
+                glDisable(GL_DEPTH_TEST)
+                glEnable(GL_BLEND)
+                glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+                self.draw_highlight(*self.hover_cell)
+                glDisable(GL_BLEND)
+                glEnable(GL_DEPTH_TEST)
+            metrics.count(1, 4)
+
+        if self.metrics_overlay is not None:
+            with metrics.timed("overlay"):
+                self.metrics_overlay.draw(metrics, self.scheduler)
+
+        frame_ms = metrics.end_frame()
+        if self.main_window:
+            self.main_window.update_frame_time(self.render_mode, frame_ms)
+
+    def draw_scene(self, camera, scene):
+        """Clear and draw the floor grid and the cubes into the bound framebuffer."""
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glMatrixMode(GL_PROJECTION)
+        glLoadMatrixd(camera.gl_projection())
+        glMatrixMode(GL_MODELVIEW)
+        glLoadMatrixd(camera.gl_modelview())
+
+        with self.metrics.timed("grid"):
+            self.draw_grid()
+        renderer = self.cube_renderers[self.render_mode]
+        with self.metrics.timed("cubes"):
+            renderer.draw(scene, self.find_visible_chunks(scene))
+        self.metrics.count(*renderer.last_draw)
+
+    def update_scene_cache(self, camera, scene):
+        """Size the scene cache to the widget; return True if it has to be redrawn."""
+        ratio = self.devicePixelRatioF()
+        if not self.scene_cache.resize(max(1, round(self.width() * ratio)), max(1, round(self.height() * ratio))):
+            print("Scene cache unavailable, drawing every frame")
+            self.scene_cache = None
+            return False
+        key = (camera.key, self.render_mode, id(scene), scene.version, self.scene_cache.size)
+        if key == self.scene_cache_key and SCENE not in self.frame_dirty:
+            return False
+        self.scene_cache_key = key
+        return True
+
+    def find_visible_chunks(self, scene):
+        """Chunks inside the view frustum; cached until the camera or scene changes."""
+        camera = self.view_camera()
+        key = (camera.key, id(scene), scene.version)
+        if key != self.visible_chunks_key:
+            self.visible_chunks = scene.visible_chunks(camera.frustum_planes())
+            self.visible_chunks_key = key
+        return self.visible_chunks
 
     def draw_grid(self):
+        if self.render_mode != "immediate":
+            camera = self.view_camera()
+            self.grid_renderer.draw(self.grid_size, camera.gl_modelview(), camera.gl_projection())
+            self.metrics.count(*self.grid_renderer.last_draw)
+            return
+
         glColor3f(0.0, 0.0, 0.0)
         glBegin(GL_LINES)
         for i in range(self.grid_size[0] + 1):
@@ -198,24 +589,14 @@ class OpenGLGrid(QOpenGLWidget):
             glVertex3f(0, j, 0)
             glVertex3f(self.grid_size[0], j, 0)
         glEnd()
+        self.metrics.count(1, 2 * (self.grid_size[0] + self.grid_size[1] + 2))
 
-    def draw_cube(self, x, y):
-        glPushMatrix()
-        glTranslatef(x + 0.5, y + 0.5, 0.5)
-
-        # Draw solid cube (gray)
-        glColor3f(0.5, 0.5, 0.5)
-        glutSolidCube(1)
-
-        # Draw black edges
-        glColor3f(0.0, 0.0, 0.0)
-        glutWireCube(1.02)
+    def draw_cube(self, x, y, z=0):
+        self.cube_renderers["immediate"].draw_cube(x, y, z)
 
-        glPopMatrix()
-
-    def draw_highlight(self, x, y):
+    def draw_highlight(self, x, y, z=0):
         glPushMatrix()
-        glTranslatef(x + 0.5, y + 0.5, 0.01)
+        glTranslatef(x + 0.5, y + 0.5, z + 0.01)
         glDisable(GL_DEPTH_TEST)
         glColor4f(1.0, 0.75, 0.8, 0.6)  # Pink with transparency
 
@@ -233,56 +614,72 @@ class OpenGLGrid(QOpenGLWidget):
         dx = event.x() - self.last_mouse_pos.x()
         dy = event.y() - self.last_mouse_pos.y()
 
+        camera_moved = (self.tilting or self.panning) and (dx or dy)
         if self.tilting:
             self.rot_x += dy * 0.5
             self.rot_y += dx * 0.5
         elif self.panning:
             self.pan_x += dx * 0.01
             self.pan_y += -dy * 0.01
-
-        self.makeCurrent()
-
-        viewport = glGetIntegerv(GL_VIEWPORT)
-        modelview = glGetDoublev(GL_MODELVIEW_MATRIX)
-        projection = glGetDoublev(GL_PROJECTION_MATRIX)
-
-        x = event.x()
-        y = viewport[3] - event.y()
-
-        near_x, near_y, near_z = gluUnProject(x, y, 0, modelview, projection, viewport)
-        far_x, far_y, far_z = gluUnProject(x, y, 1, modelview, projection, viewport)
-
-        t = -near_z / (far_z - near_z) if (far_z - near_z) != 0 else 0
-        world_x = near_x + t * (far_x - near_x)
-        world_y = near_y + t * (far_y - near_y)
-
-        grid_x = int(math.floor(world_x))
-        grid_y = int(math.floor(world_y))
-
-        if 0 <= grid_x < self.grid_size[0] and 0 <= grid_y < self.grid_size[1]:
-            self.hover_cell = (grid_x, grid_y)
-        else:
-            self.hover_cell = None
+        if camera_moved:
+            self.request_redraw(CAMERA)
 
         self.last_mouse_pos = event.pos()
-        self.update()
+        self.update_hover()
     
+    def update_hover(self):
+        """Pick the cube face or floor cell under the mouse, all on the CPU.
+
+        A raycast through the scene (ChunkedVoxelGrid.raycast) finds the first
+        cube and the face that was hit (stored in hover_face). In placing mode the target cell is the
+        one in front of that face, so cubes stack on top faces; in erasing mode it
+        is the cube itself. Without a cube under the mouse the view ray is
+        intersected with the z=0 floor grid.
+        """
+        x, y = self.last_mouse_pos.x(), self.last_mouse_pos.y()
+        origin, direction = self.view_camera().ray(x, y)
+
+        hover_cell = None
+        hover_face = None
+        editable = self.history_position is None  # Earlier points of the history are view-only
+        hit = self.cube_positions.raycast(origin, direction) if editable else None
+        if hit is not None:
+            cell, normal, _ = hit
+            hover_face = (cell, normal)
+            if not self.placing_mode:
+                hover_cell = cell
+            elif normal is not None:
+                target = (cell[0] + normal[0], cell[1] + normal[1], cell[2] + normal[2])
+                if target[2] >= 0:
+                    hover_cell = target
+        elif editable:
+            world = self.view_camera().pick_plane(x, y)
+            if world is not None:
+                grid_x = int(math.floor(world[0]))
+                grid_y = int(math.floor(world[1]))
+                if 0 <= grid_x < self.grid_size[0] and 0 <= grid_y < self.grid_size[1]:
+                    hover_cell = (grid_x, grid_y, 0)
+
+        self.hover_face = hover_face
+        if hover_cell != self.hover_cell:
+            self.hover_cell = hover_cell
+            self.request_redraw(OVERLAY)
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton and self.hover_cell:
             if self.placing_mode:
                 if self.hover_cell not in self.cube_positions:  # Avoid duplicate logs
-                    self.cube_positions.add(self.hover_cell)
-                    self.log_event(f"P({self.hover_cell[0]},{self.hover_cell[1]})")
+                    self.place_cube(self.hover_cell)
+                    self.log_event(PLACE, self.hover_cell)
             else:
                 if self.hover_cell in self.cube_positions:  # Only log if it was present
-                    self.cube_positions.discard(self.hover_cell)
-                    self.log_event(f"E({self.hover_cell[0]},{self.hover_cell[1]})")
+                    self.erase_cube(self.hover_cell)
+                    self.log_event(ERASE, self.hover_cell)
+            self.update_hover()  # The cube under the mouse changed
         elif event.button() == Qt.RightButton:
             self.tilting = True
         elif event.button() == Qt.MidButton:
             self.panning = True
-
-        self.update()
      
      
     def mouseReleaseEvent(self, event):
@@ -292,54 +689,144 @@ class OpenGLGrid(QOpenGLWidget):
     def wheelEvent(self, event):
         delta = event.angleDelta().y() / 120
         self.zoom = max(0.1, min(self.zoom * math.pow(1.2, delta), 50.0))
-        self.update()
-
-    def log_event(self, event_str):
-        """Log the event and update the event log display"""
-        self.event_log.append(f"{len(self.event_log) + 1}: {event_str}")
+        self.request_redraw(CAMERA)
+        self.update_hover()
+
+    def log_event(self, op, cell):
+        """Log the event and append it to the event log display"""
+        self.event_log.append(op, cell)
+        if self.journal:
+            try:
+                self.journal.append(op, cell)
+            except OSError as e:
+                self.stop_journal(e)
         #if self.parent():
         #    self.parent().update_event_log("\n".join(self.event_log))
         if self.main_window:  # Ensure reference exists
-            self.main_window.update_event_log("\n".join(self.event_log))
+            self.main_window.append_event_log()
 
 
     #UPLOAD PROJECT LOG IN GRID
     def load_project_log(self, filepath):
-        """Load a project log file, clear the scene, and process commands."""
-        self.cube_positions.clear()  # Clear all cubes
-        print(f"Cubes cleared: ")
-        self.event_log.clear()  # Clear the event log
-
+        """Load a project log file on the calling thread, replacing the scene and the log."""
         try:
-            with open(filepath, "r") as file:
-                for line in file:
-                    line = line.strip()
-                    if line:
-                        self.process_log_entry(line)
-            self.update()
-        except Exception as e:
+            project = load_project(filepath)
+        except (OSError, ValueError) as e:
             print(f"Error reading file: {e}")
+            return
+        self.publish_project_log(*project)
+        self.restart_journal(filepath)
+
+    def publish_project_log(self, event_log, scene, errors):
+        """Swap in a loaded log and scene in one step."""
+        for line_number, line in errors[:MAX_REPORTED_LOG_ERRORS]:
+            print(f"Invalid entry on line {line_number} of the log: {line}")
+        if len(errors) > MAX_REPORTED_LOG_ERRORS:
+            print(f"... {len(errors) - MAX_REPORTED_LOG_ERRORS} more invalid lines skipped")
+
+        self.cube_positions.take(scene)
+        self.event_log = event_log
+        self.history.reset(event_log)
+        self.history_position = None
+        self.history_scene_position = None
+        self.scene_changed()
+        self.update_hover()
+        if self.main_window:
+            self.main_window.update_event_log(self.event_log)
+
+    def open_autosave_journal(self, directory=None):
+        """Claim an autosave journal in the per-user data directory that no other instance uses, and open it."""
+        try:
+            path, self.journal_lock = claim_journal(directory)
+        except OSError as e:
+            print(f"Autosave disabled: {e}")
+            return
+        if path is None:
+            print("Autosave disabled: every autosave journal is in use by another instance")
+            return
+        self.open_journal(path)
+
+    def open_journal(self, path):
+        """Recover the unsaved edits of an autosave journal, then keep journaling to it."""
+        self.journal_path = path
+        if os.path.exists(path):
+            try:
+                base_path, base_records, ops, cells, end = read_journal(path)
+            except (OSError, JournalError) as e:
+                print(f"Autosave journal not recovered: {e}")
+            else:
+                if len(ops):
+                    self.recover_journal(path, base_path, base_records, ops, cells)
+                    try:
+                        self.journal = Journal.resume(path, end, len(ops))
+                    except OSError as e:
+                        print(f"Autosave disabled: {e}")
+                    return
+        try:
+            self.journal = Journal.create(path)
+        except OSError as e:
+            print(f"Autosave disabled: {e}")
+
+    def recover_journal(self, path, base_path, base_records, ops, cells):
+        event_log, errors = EventLog(), []
+        if base_path:
+            try:
+                event_log, _, errors = load_project(base_path)
+            except (OSError, ValueError) as e:
+                print(f"Project log {base_path} of the autosave journal could not be read: {e}")
+            if len(event_log) != base_records:
+                print(f"Warning: {base_path} has {len(event_log)} entries, the journal was started with {base_records}")
+        event_log.extend(ops, cells)
+        scene = ChunkedVoxelGrid()
+        scene.add_many(event_log.replay())
+        self.publish_project_log(event_log, scene, errors)
+        print(f"Recovered {len(ops)} unsaved edits from {path}")
+
+    def restart_journal(self, base_path):
+        """Start the journal over from a project log file that holds the whole current log.
+
+        This also resumes autosaving after a write error stopped it.
+        """
+        if not self.journal_path:
+            return
+        if self.journal:
+            try:
+                self.journal.close()
+            except OSError:
+                pass  # The saved file holds these edits
+            self.journal = None
+        try:
+            self.journal = Journal.create(self.journal_path, base_path, len(self.event_log))
+        except OSError as e:
+            print(f"Autosave disabled: {e}")
 
-
-    def process_log_entry(self, entry):
-        """Process a log entry to place or erase a cube."""
-        parts = entry.split(":")
-        if len(parts) == 2:
-            action, position = parts
-            coords = position.strip("P()").split(",")
-        
-            if len(coords) == 2:
-                try:
-                    x, y = map(int, coords)
-                    if action == "1":  # Place cube
-                        self.cube_positions.add((x, y))
-                    elif action == "0":  # Erase cube
-                        self.cube_positions.discard((x, y))
-                except ValueError:
-                    print(f"Invalid coordinates in log: {entry}")
+    def stop_journal(self, error):
+        """Report a failed journal write and stop autosaving until the next save or load."""
+        print(f"Autosave stopped, edits since the last save are not protected: {error}")
+        try:
+            self.journal.close()
+        except OSError:
+            pass
+        self.journal = None
+
+    def close_journal(self):
+        """Commit the journal; it is removed if nothing was edited since the last save or load."""
+        if self.journal:
+            try:
+                self.journal.close()
+            except OSError as e:
+                print(f"Autosave journal not completed: {e}")
+            else:
+                if not self.journal.records:
+                    os.remove(self.journal.path)
+            self.journal = None
+        if self.journal_lock:
+            self.journal_lock.close()
+            self.journal_lock = None
 
 
 if __name__ == "__main__":
+    glutInit()  # Only the immediate renderer draws with GLUT; headless rendering runs without it
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
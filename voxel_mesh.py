@@ -0,0 +1,209 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Surface extraction for voxel scenes: only faces that are not pressed against a
+# neighbouring cube (or the ground plane) are emitted, optionally greedy-merged
+# into large coplanar quads. No OpenGL needed, so it also drives mesh export.
+import numpy as np
+
+# (normal axis, sign) for the six face directions
+DIRECTIONS = [(0, -1), (0, 1), (1, -1), (1, 1), (2, -1), (2, 1)]
+
+# In-plane axes for each normal axis, chosen so that u x v points along +normal
+_PLANE_AXES = {0: (1, 2), 1: (2, 0), 2: (0, 1)}
+
+
+class SurfaceMesh:
+    """Exposed faces of a voxel scene as quads.
+
+    quads is an (M, 4, 3) float32 array of corners in counter-clockwise order seen
+    from outside, normals is the matching (M, 3) float32 array.
+    """
+
+    def __init__(self, quads, normals):
+        self.quads = quads
+        self.normals = normals
+
+    def __len__(self):
+        return len(self.quads)
+
+    @property
+    def vertex_count(self):
+        return len(self.quads) * 4
+
+    def triangles(self):
+        """Return the quads as an (M*6, 3) float32 triangle list."""
+        return self.quads[:, [0, 1, 2, 0, 2, 3]].reshape(-1, 3)
+
+    def outlines(self):
+        """Return the quad borders as an (M*8, 3) float32 GL_LINES vertex list."""
+        return self.quads[:, [0, 1, 1, 2, 2, 3, 3, 0]].reshape(-1, 3)
+
+    def unique_edges(self):
+        """Return each quad border segment once, as a GL_LINES vertex list.
+
+        Adjacent coplanar faces share a border; drawing it once halves the line count.
+        """
+        segments = self.outlines().reshape(-1, 2, 3)
+        if not len(segments):
+            return segments.reshape(-1, 3)
+        # Sort the two endpoints of every segment so duplicates compare equal
+        first, second = segments[:, 0], segments[:, 1]
+        keep_order = (first[:, 0] < second[:, 0]) | (
+            (first[:, 0] == second[:, 0]) & ((first[:, 1] < second[:, 1]) | (
+                (first[:, 1] == second[:, 1]) & (first[:, 2] <= second[:, 2]))))
+        ordered = np.where(keep_order[:, None, None], segments, segments[:, ::-1])
+        unique = np.unique(ordered.reshape(-1, 6), axis=0)
+        return unique.reshape(-1, 3)
+
+
+def cells_to_volume(cells):
+    """Pack (x, y) or (x, y, z) cells into a dense boolean volume.
+
+    Returns (volume, origin) where volume[i, j, k] is the cell origin + (i, j, k).
+    Two-column cells are placed on the ground layer z = 0. Scene models with a
+    volume() method (see scene_model.py) hand over their array directly.
+    """
+    if hasattr(cells, "volume"):
+        return cells.volume()
+    cells = np.asarray(list(cells) if not isinstance(cells, np.ndarray) else cells, dtype=np.int64)
+    if cells.size == 0:
+        return np.zeros((0, 0, 0), dtype=bool), np.zeros(3, dtype=np.int64)
+    if cells.shape[1] == 2:
+        cells = np.column_stack([cells, np.zeros(len(cells), dtype=np.int64)])
+    origin = cells.min(axis=0)
+    local = cells - origin
+    volume = np.zeros(local.max(axis=0) + 1, dtype=bool)
+    volume[local[:, 0], local[:, 1], local[:, 2]] = True
+    return volume, origin
+
+
+def exposed_face_mask(volume, axis, sign, solid_below=None):
+    """Return a mask of cells whose face in direction (axis, sign) is not covered.
+
+    solid_below, if given, is the highest z index (may be -1) that counts as solid;
+    it is used to hide bottom faces resting on the ground plane.
+    """
+    padded = np.pad(volume, [(1, 1) if a == axis else (0, 0) for a in range(3)])
+    if axis == 2 and sign < 0 and solid_below is not None and solid_below >= -1:
+        padded[:, :, :solid_below + 2] = True
+    n = volume.shape[axis]
+    neighbour = np.take(padded, np.arange(n) + 1 + sign, axis=axis)
+    return volume & ~neighbour
+
+
+def _merge_runs(w, u, v0, v1):
+    """Greedy-merge 1-wide runs (w, u, v0..v1) into rectangles across consecutive u.
+
+    Runs on the same slice w with the same [v0, v1) extent on consecutive rows are
+    joined. Returns (w, u0, u1, v0, v1) arrays.
+    """
+    if not len(w):
+        return w, u, u + 1, v0, v1
+    order = np.lexsort((u, v1, v0, w))
+    w, u, v0, v1 = w[order], u[order], v0[order], v1[order]
+    new_group = np.ones(len(w), dtype=bool)
+    new_group[1:] = (w[1:] != w[:-1]) | (v0[1:] != v0[:-1]) | (v1[1:] != v1[:-1]) | (u[1:] != u[:-1] + 1)
+    starts = np.flatnonzero(new_group)
+    ends = np.append(starts[1:], len(w)) - 1
+    return w[starts], u[starts], u[ends] + 1, v0[starts], v1[starts]
+
+
+def _face_rectangles(mask, greedy):
+    """Return (w, u0, u1, v0, v1) rectangles covering mask, which is ordered (w, u, v)."""
+    if not greedy:
+        w, u, v = np.nonzero(mask)
+        return w, u, u + 1, v, v + 1
+    # Runs along v: +1 steps in the padded row mark run starts, -1 steps mark ends
+    step = np.diff(np.pad(mask, [(0, 0), (0, 0), (1, 1)]).astype(np.int8), axis=2)
+    w, u, v0 = np.nonzero(step == 1)
+    v1 = np.nonzero(step == -1)[2]
+    return _merge_runs(w, u, v0, v1)
+
+
+def extract_surface(volume, origin=(0, 0, 0), greedy=False, ground_z=0, border=0):
+    """Build a SurfaceMesh of the exposed faces of a dense boolean volume.
+
+    greedy joins coplanar neighbouring faces into large quads. Bottom faces at
+    world z == ground_z are dropped since they lie on the ground plane; pass
+    ground_z=None to keep them. The outer `border` cells of the volume are only
+    used to test whether faces are covered and emit no faces themselves; origin
+    is the world cell of volume[0, 0, 0], border included.
+    """
+    origin = np.asarray(origin, dtype=np.int64)
+    solid_below = None if ground_z is None else int(ground_z - origin[2]) - 1
+    inner = tuple(slice(border, n - border) for n in volume.shape)
+    origin = origin + border
+    all_quads = []
+    all_normals = []
+    for axis, sign in DIRECTIONS:
+        u_axis, v_axis = _PLANE_AXES[axis]
+        mask = exposed_face_mask(volume, axis, sign, solid_below)[inner]
+        w, u0, u1, v0, v1 = _face_rectangles(mask.transpose(axis, u_axis, v_axis), greedy)
+        if not len(w):
+            continue
+
+        plane = (w + (1 if sign > 0 else 0) + origin[axis]).astype(np.float32)
+        u0 = (u0 + origin[u_axis]).astype(np.float32)
+        u1 = (u1 + origin[u_axis]).astype(np.float32)
+        v0 = (v0 + origin[v_axis]).astype(np.float32)
+        v1 = (v1 + origin[v_axis]).astype(np.float32)
+
+        quads = np.empty((len(w), 4, 3), dtype=np.float32)
+        quads[:, :, axis] = plane[:, None]
+        quads[:, :, u_axis] = np.stack([u0, u1, u1, u0], axis=1)
+        quads[:, :, v_axis] = np.stack([v0, v0, v1, v1], axis=1)
+        if sign < 0:
+            quads = quads[:, ::-1]  # Keep counter-clockwise winding seen from outside
+
+        normals = np.zeros((len(w), 3), dtype=np.float32)
+        normals[:, axis] = sign
+        all_quads.append(quads)
+        all_normals.append(normals)
+
+    if not all_quads:
+        return SurfaceMesh(np.zeros((0, 4, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.float32))
+    return SurfaceMesh(np.ascontiguousarray(np.concatenate(all_quads)), np.concatenate(all_normals))
+
+
+def chunk_surface(scene, key, greedy=False, ground_z=0):
+    """Build the SurfaceMesh of one chunk of a ChunkedVoxelGrid (see scene_model.py)."""
+    origin = np.asarray(key, dtype=np.int64) * scene.chunk_size - 1
+    return extract_surface(scene.chunk_volume(key, border=1), origin, greedy=greedy, ground_z=ground_z, border=1)
+
+
+def merge_surfaces(meshes):
+    """Concatenate SurfaceMeshes into one."""
+    meshes = [mesh for mesh in meshes if len(mesh)]
+    if not meshes:
+        return SurfaceMesh(np.zeros((0, 4, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.float32))
+    return SurfaceMesh(np.concatenate([mesh.quads for mesh in meshes]), np.concatenate([mesh.normals for mesh in meshes]))
+
+
+def surface_from_cells(cells, greedy=False, ground_z=0):
+    """Build the SurfaceMesh of a set of cells or a scene model.
+
+    Chunked scenes are meshed chunk by chunk, so sparse scenes never need a dense
+    array over their whole bounding volume.
+    """
+    if hasattr(cells, "chunk_volume"):
+        return merge_surfaces(chunk_surface(cells, key, greedy, ground_z) for key in cells.chunks)
+    volume, origin = cells_to_volume(cells)
+    return extract_surface(volume, origin, greedy=greedy, ground_z=ground_z)
+
+
+def write_obj(mesh, filepath):
+    """Write a SurfaceMesh as a Wavefront OBJ file of quads."""
+    vertices = mesh.quads.reshape(-1, 3)
+    with open(filepath, "w") as file:
+        file.write("# CubeCAD surface mesh\n")
+        np.savetxt(file, vertices, fmt="v %g %g %g")
+        np.savetxt(file, mesh.normals, fmt="vn %g %g %g")
+        index = np.arange(1, len(mesh.quads) + 1)
+        corners = np.arange(1, len(vertices) + 1).reshape(-1, 4)
+        faces = np.column_stack([corners[:, 0], index, corners[:, 1], index,
+                                 corners[:, 2], index, corners[:, 3], index])
+        np.savetxt(file, faces, fmt="f %d//%d %d//%d %d//%d %d//%d")
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
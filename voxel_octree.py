@@ -0,0 +1,350 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Sparse voxel octree kept as one hash map per level (a "linear" octree): the node
+# at level L with key (i, j, k) covers cells [i << L, (i + 1) << L) on x and the
+# same on y and z, and maps to the number of cubes inside it. Only non-empty nodes
+# exist, so queries skip empty space a whole node at a time and edits touch one
+# node per level.
+import heapq
+import math
+import numpy as np
+from voxel_raycast import clip_ray_to_box
+
+MAX_DEPTH = 30  # Root nodes are 2^30 cells wide
+PACKED_LEVEL_NODES = 4096  # Larger levels are rebuilt as PackedLevel arrays
+
+
+def node_box(level, key):
+    """Return the world-space (lo, hi) corners of a node."""
+    size = 1 << level
+    lo = (key[0] * size, key[1] * size, key[2] * size)
+    return lo, (lo[0] + size, lo[1] + size, lo[2] + size)
+
+
+def _box_distance_sq(point, lo, hi):
+    d = 0.0
+    for axis in range(3):
+        if point[axis] < lo[axis]:
+            d += (lo[axis] - point[axis]) ** 2
+        elif point[axis] > hi[axis]:
+            d += (point[axis] - hi[axis]) ** 2
+    return d
+
+
+def _box_in_planes(planes, lo, hi):
+    """Classify a box against inward-facing planes: 0 outside, 1 intersecting, 2 inside."""
+    result = 2
+    for a, b, c, d in planes:
+        # Corner furthest along the plane normal, and the one furthest against it
+        px, nx = (hi[0], lo[0]) if a >= 0 else (lo[0], hi[0])
+        py, ny = (hi[1], lo[1]) if b >= 0 else (lo[1], hi[1])
+        pz, nz = (hi[2], lo[2]) if c >= 0 else (lo[2], hi[2])
+        if a * px + b * py + c * pz + d < 0:
+            return 0
+        if a * nx + b * ny + c * nz + d < 0:
+            result = 1
+    return result
+
+
+def pack_keys(keys):
+    """Pack (N, 3) int64 keys into one int64 each over their bounding box.
+
+    Returns (packed, lo, span), or None if the box has too many cells to fit.
+    Packing keeps the x, y, z order of the rows.
+    """
+    lo = keys.min(axis=0)
+    span = keys.max(axis=0) - lo + 1
+    if float(span[0]) * float(span[1]) * float(span[2]) >= 2.0 ** 62:
+        return None
+    packed = ((keys[:, 0] - lo[0]) * span[1] + (keys[:, 1] - lo[1])) * span[2] + (keys[:, 2] - lo[2])
+    return packed, lo, span
+
+
+def unpack_keys(packed, lo, span):
+    keys = np.empty((len(packed), 3), dtype=np.int64)
+    packed, keys[:, 2] = np.divmod(packed, span[2])
+    keys[:, 0], keys[:, 1] = np.divmod(packed, span[1])
+    return keys + lo
+
+
+def unique_keys(keys):
+    """Return (unique rows, inverse) of an (N, 3) int64 array, with a 1-D sort where the keys pack."""
+    packing = pack_keys(keys)
+    if packing is None:
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        return unique, inverse.reshape(-1)
+    packed, lo, span = packing
+    packed, inverse = np.unique(packed, return_inverse=True)
+    return unpack_keys(packed, lo, span), inverse.reshape(-1)
+
+
+class PackedLevel:
+    """Node counts of one large octree level, as rebuild() makes them.
+
+    The nodes are a sorted array of packed keys with their counts, so a bulk
+    load makes no Python object per node; later edits go to a dict on top. It
+    answers the dict operations VoxelOctree uses on a level.
+    """
+
+    def __init__(self, packed, counts, lo, span):
+        self.packed = packed
+        self.counts = counts
+        self.lo = tuple(int(v) for v in lo)
+        self.span = tuple(int(v) for v in span)
+        self.edits = {}  # key -> count, 0 for a node removed since the rebuild
+        self.size = len(packed)
+
+    def base_count(self, key):
+        x, y, z = key[0] - self.lo[0], key[1] - self.lo[1], key[2] - self.lo[2]
+        if not (0 <= x < self.span[0] and 0 <= y < self.span[1] and 0 <= z < self.span[2]):
+            return 0
+        packed = (x * self.span[1] + y) * self.span[2] + z
+        index = int(np.searchsorted(self.packed, packed))
+        if index < len(self.packed) and self.packed[index] == packed:
+            return int(self.counts[index])
+        return 0
+
+    def get(self, key, default=None):
+        count = self.edits.get(key)
+        if count is None:
+            count = self.base_count(key)
+        return count if count else default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        count = self.get(key)
+        if count is None:
+            raise KeyError(key)
+        return count
+
+    def __setitem__(self, key, count):
+        if key not in self:
+            self.size += 1
+        self.edits[key] = count
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.size -= 1
+        self.edits[key] = 0
+
+    def __len__(self):
+        return self.size
+
+    def items(self):
+        for key, count in zip(map(tuple, unpack_keys(self.packed, self.lo, self.span).tolist()), self.counts.tolist()):
+            if key not in self.edits:
+                yield key, count
+        for key, count in self.edits.items():
+            if count:
+                yield key, count
+
+    def __iter__(self):
+        return (key for key, _ in self.items())
+
+
+class VoxelOctree:
+    """Hierarchical index over a set of (x, y, z) cubes.
+
+    levels[0] holds the cubes themselves, levels[L] the non-empty nodes of size
+    2^L with their cube counts. add/discard are O(depth); raycast, count_in_box,
+    cells_in_box, nearest and visible_nodes descend from the roots and only open
+    nodes that can matter, which is logarithmic in the scene extent for typical
+    sparse scenes instead of a scan over every cube.
+    """
+
+    def __init__(self, depth=MAX_DEPTH):
+        self.depth = depth
+        self.levels = [{} for _ in range(depth + 1)]
+
+    def __len__(self):
+        return len(self.levels[0])
+
+    def __contains__(self, cell):
+        return cell in self.levels[0]
+
+    def clear(self):
+        self.levels = [{} for _ in range(self.depth + 1)]
+
+    def add(self, cell):
+        x, y, z = cell
+        if (x, y, z) in self.levels[0]:
+            return
+        for level, nodes in enumerate(self.levels):
+            key = (x >> level, y >> level, z >> level)
+            nodes[key] = nodes.get(key, 0) + 1
+
+    def discard(self, cell):
+        x, y, z = cell
+        if (x, y, z) not in self.levels[0]:
+            return
+        for level, nodes in enumerate(self.levels):
+            key = (x >> level, y >> level, z >> level)
+            count = nodes[key] - 1
+            if count:
+                nodes[key] = count
+            else:
+                del nodes[key]
+
+    def rebuild(self, positions):
+        """Replace the contents with an (N, 3) array of cells, one 1-D sort per level.
+
+        Levels of more than PACKED_LEVEL_NODES nodes are kept as PackedLevel
+        arrays rather than dicts. Once a level has a single node, the levels
+        above are its ancestors and need no sorting.
+        """
+        self.clear()
+        keys = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        if not len(keys):
+            return
+        keys = unique_keys(keys)[0]
+        counts = np.ones(len(keys), dtype=np.int64)
+        for level in range(self.depth + 1):
+            if level:
+                if len(keys) > 1:
+                    keys, inverse = unique_keys(keys >> 1)
+                    counts = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+                else:
+                    keys = keys >> 1
+            packing = pack_keys(keys) if len(keys) > PACKED_LEVEL_NODES else None
+            if packing is not None:
+                self.levels[level] = PackedLevel(packing[0], counts, packing[1], packing[2])
+            else:
+                self.levels[level] = dict(zip(map(tuple, keys.tolist()), counts.tolist()))
+
+    def roots(self):
+        return self.levels[self.depth]
+
+    def children(self, level, key):
+        """Yield the keys of the existing children of a node."""
+        nodes = self.levels[level - 1]
+        x, y, z = key[0] << 1, key[1] << 1, key[2] << 1
+        for dx in (0, 1):
+            for dy in (0, 1):
+                for dz in (0, 1):
+                    child = (x + dx, y + dy, z + dz)
+                    if child in nodes:
+                        yield child
+
+    def raycast(self, origin, direction, t_max=1.0):
+        """Return the first cube along origin + t * direction, 0 <= t <= t_max.
+
+        Returns (cell, normal, t), where normal is the (dx, dy, dz) of the face
+        that was hit (None if the ray starts inside the cube), or None.
+        Nodes are opened nearest-entry-first, so the first cube popped is the hit.
+        """
+        heap = []
+        for key in self.roots():
+            lo, hi = node_box(self.depth, key)
+            clipped = clip_ray_to_box(origin, direction, lo, hi, 0.0, t_max)
+            if clipped is not None:
+                heap.append((clipped[0], self.depth, key, clipped[2]))
+        heapq.heapify(heap)
+        while heap:
+            t, level, key, entry_axis = heapq.heappop(heap)
+            if level == 0:
+                normal = None
+                if entry_axis is not None:
+                    normal = [0, 0, 0]
+                    normal[entry_axis] = -1 if direction[entry_axis] > 0 else 1
+                    normal = tuple(normal)
+                return key, normal, t
+            for child in self.children(level, key):
+                lo, hi = node_box(level - 1, child)
+                clipped = clip_ray_to_box(origin, direction, lo, hi, 0.0, t_max)
+                if clipped is not None:
+                    heapq.heappush(heap, (clipped[0], level - 1, child, clipped[2]))
+        return None
+
+    def _overlapping(self, lo, hi):
+        """Yield (level, key, inside) for the largest nodes overlapping the inclusive cell box lo..hi.
+
+        inside is True when the node lies entirely within the box; such nodes are not opened.
+        """
+        stack = [(self.depth, key) for key in self.roots()]
+        while stack:
+            level, key = stack.pop()
+            node_lo, node_hi = node_box(level, key)
+            if any(node_hi[a] <= lo[a] or node_lo[a] > hi[a] for a in range(3)):
+                continue
+            if all(node_lo[a] >= lo[a] and node_hi[a] - 1 <= hi[a] for a in range(3)):
+                yield level, key, True
+            elif level == 0:
+                yield level, key, True
+            else:
+                stack.extend((level - 1, child) for child in self.children(level, key))
+
+    def count_in_box(self, lo, hi):
+        """Number of cubes in the inclusive cell range lo..hi."""
+        return sum(self.levels[level][key] for level, key, _ in self._overlapping(lo, hi))
+
+    def cells_in_box(self, lo, hi):
+        """Yield every cube in the inclusive cell range lo..hi."""
+        for level, key, _ in self._overlapping(lo, hi):
+            yield from self.descendants(level, key, 0)
+
+    def descendants(self, level, key, target_level):
+        """Yield the keys at target_level under a node."""
+        stack = [(level, key)]
+        while stack:
+            level, key = stack.pop()
+            if level == target_level:
+                yield key
+            else:
+                stack.extend((level - 1, child) for child in self.children(level, key))
+
+    def nearest(self, point, max_distance=math.inf):
+        """Return (cell, distance) of the cube whose center is closest to point, or None.
+
+        Best-first search: nodes are opened in order of their distance to point.
+        """
+        heap = []
+        limit = max_distance * max_distance
+        for key in self.roots():
+            lo, hi = node_box(self.depth, key)
+            heap.append((_box_distance_sq(point, lo, hi), self.depth, key))
+        heapq.heapify(heap)
+        while heap:
+            d, level, key = heapq.heappop(heap)
+            if d > limit:
+                return None
+            if level == 0:
+                return key, math.sqrt(d)
+            for child in self.children(level, key):
+                if level == 1:
+                    center = (child[0] + 0.5, child[1] + 0.5, child[2] + 0.5)
+                    d = sum((center[a] - point[a]) ** 2 for a in range(3))
+                else:
+                    lo, hi = node_box(level - 1, child)
+                    d = _box_distance_sq(point, lo, hi)
+                heapq.heappush(heap, (d, level - 1, child))
+        return None
+
+    def visible_nodes(self, planes, level):
+        """Return the set of node keys at `level` whose box intersects the frustum.
+
+        planes are (a, b, c, d) rows with a*x + b*y + c*z + d >= 0 inside, as from
+        camera.ViewCamera.frustum_planes(). Nodes entirely inside the frustum are
+        not tested any further.
+        """
+        visible = set()
+        stack = [(self.depth, key) for key in self.roots()]
+        while stack:
+            node_level, key = stack.pop()
+            lo, hi = node_box(node_level, key)
+            state = _box_in_planes(planes, lo, hi)
+            if state == 0:
+                continue
+            if node_level == level:
+                visible.add(key)
+            elif state == 2:
+                visible.update(self.descendants(node_level, key, level))
+            else:
+                stack.extend((node_level - 1, child) for child in self.children(node_level, key))
+        return visible
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==
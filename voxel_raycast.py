@@ -0,0 +1,101 @@
+'''
+LIMITED LICENSE (ZERO-FIVE LICENSE) – Material contained are free for individual use, commercial use subject to royalty:  Free use of this material is allowed for personal use only.  Credit must be provided to the License owner, Sam Wechsler.  Any commercial use of this material is subject to a 5% royalty on gross income on any sale or transaction which utilizes this material.
+If you download or copy this material then you agree to this. If you remix, transform, or build upon the material, you may not distribute the modified material. Exemptions may be made with Sam Wechsler's consent on a signed waiver. Contact Sam Wechsler with any questions: info@wexventures.net
+'''
+# Grid-stepping (DDA) raycast over unit cubes, after Amanatides & Woo. The ray
+# visits only the cells it crosses inside the scene bounds, so the cost depends
+# on the length of the ray, not on the number of cubes. It picks in grids kept
+# without an octree; VoxelOctree.raycast uses clip_ray_to_box for its nodes.
+import math
+
+
+def clip_ray_to_box(origin, direction, lo, hi, t_min=0.0, t_max=1.0):
+    """Clip origin + t * direction to the box lo..hi (world coordinates).
+
+    Returns (t_enter, t_exit, entry_axis) or None if the ray misses the box.
+    entry_axis is the axis whose slab the ray entered last, or None if the ray
+    starts inside the box.
+    """
+    t_enter, t_exit, entry_axis = t_min, t_max, None
+    for axis in range(3):
+        o, d = origin[axis], direction[axis]
+        if d == 0:
+            if o < lo[axis] or o > hi[axis]:
+                return None
+            continue
+        t0 = (lo[axis] - o) / d
+        t1 = (hi[axis] - o) / d
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_enter:
+            t_enter, entry_axis = t0, axis
+        t_exit = min(t_exit, t1)
+        if t_enter > t_exit:
+            return None
+    return t_enter, t_exit, entry_axis
+
+
+def voxel_raycast(origin, direction, is_solid, lo, hi, t_max=1.0):
+    """Return the first solid cell along origin + t * direction, 0 <= t <= t_max.
+
+    is_solid(cell) is called with (x, y, z) integer tuples; cell (x, y, z) spans
+    [x, x+1] x [y, y+1] x [z, z+1]. Only cells in the inclusive cell range lo..hi
+    are visited. Returns (cell, normal, t) where normal is the (dx, dy, dz) of the
+    face that was hit, or None if nothing was hit. normal is None if the ray
+    starts inside the hit cell.
+    """
+    box_hi = (hi[0] + 1, hi[1] + 1, hi[2] + 1)
+    clipped = clip_ray_to_box(origin, direction, lo, box_hi, 0.0, t_max)
+    if clipped is None:
+        return None
+    t, t_exit, entry_axis = clipped
+
+    step = [0, 0, 0]
+    t_next = [math.inf, math.inf, math.inf]
+    t_delta = [math.inf, math.inf, math.inf]
+    cell = [0, 0, 0]
+    for axis in range(3):
+        d = direction[axis]
+        p = origin[axis] + t * d
+        c = int(math.floor(p))
+        if axis == entry_axis:
+            # Entering through a face: floating point may land on the wrong side of it
+            c = int(round(p)) if d > 0 else int(round(p)) - 1
+        cell[axis] = min(max(c, lo[axis]), hi[axis])
+        if d > 0:
+            step[axis] = 1
+            t_next[axis] = (cell[axis] + 1 - origin[axis]) / d
+            t_delta[axis] = 1.0 / d
+        elif d < 0:
+            step[axis] = -1
+            t_next[axis] = (cell[axis] - origin[axis]) / d
+            t_delta[axis] = -1.0 / d
+
+    normal = None
+    if entry_axis is not None:
+        normal = [0, 0, 0]
+        normal[entry_axis] = -step[entry_axis]
+        normal = tuple(normal)
+
+    while True:
+        key = (cell[0], cell[1], cell[2])
+        if is_solid(key):
+            return key, normal, t
+        if t_next[0] <= t_next[1] and t_next[0] <= t_next[2]:
+            axis = 0
+        elif t_next[1] <= t_next[2]:
+            axis = 1
+        else:
+            axis = 2
+        t = t_next[axis]
+        if t > t_exit:
+            return None
+        cell[axis] += step[axis]
+        if not lo[axis] <= cell[axis] <= hi[axis]:
+            return None
+        t_next[axis] += t_delta[axis]
+        normal = [0, 0, 0]
+        normal[axis] = -step[axis]
+        normal = tuple(normal)
+
+#Q29weXJpZ2h0IFNhbSBXZWNoc2xlcg==